@@ -1,44 +1,37 @@
-from natsort import natsorted
-import requests
 import glob
 
-from src.blockchain_utils.credentials import (get_algo_client,
-                                              get_account_credentials,
-                                              get_pinata_credentials)
-from src.services.nft_service import NFTService
-from src.services.nft_marketplace import NFTMarketplace
-
-client = get_algo_client()
-admin_pk, admin_addr, _ = get_account_credentials(1)
-buyer_pk, buyer_addr, _ = get_account_credentials(2)
+from src.blockchain_utils.credentials import get_account_credentials, get_pinata_credentials
+from src.services.onboarding_pipeline import NFTSpec, get_onboarding_pipeline
 
 
 def create_nft_services(manufacturer_name, unit_name, id, nft_url=None):
-    nft_service = NFTService(nft_creator_address=admin_addr,
-                             nft_creator_pk=admin_pk,
-                             client=client,
-                             unit_name=unit_name,
-                             asset_name=manufacturer_name + '-' + str(id),
-                             nft_url=nft_url)
-
-    nft_id = nft_service.create_nft()
-    print("NFT CREATED WITH ID %s in account %s" % (nft_id, admin_addr))
-
-    nft_marketplace_service = NFTMarketplace(admin_pk=admin_pk,
-                                             admin_address=admin_addr,
-                                             client=client,
-                                             nft_id=nft_service.nft_id)
-
-    app_id = nft_marketplace_service.app_initialization(nft_owner_address=admin_addr)
-    print("APP ID", app_id)
-
-    nft_service.change_nft_credentials_txn(escrow_address=nft_marketplace_service.escrow_address)
-    nft_marketplace_service.initialize_escrow()
-    nft_marketplace_service.fund_escrow()
+    onboarding_pipeline = get_onboarding_pipeline()
+    nft_marketplace_service, nft_service = onboarding_pipeline.onboard_one(
+        unit_name=unit_name,
+        asset_name=manufacturer_name + '-' + str(id),
+        nft_url=nft_url)
+
+    print("NFT CREATED WITH ID %s in account %s" % (nft_service.nft_id, onboarding_pipeline.admin_address))
+    print("APP ID", nft_marketplace_service.app_id)
     return nft_marketplace_service, nft_service
 
 
+def create_nft_collection(manufacturer_name, unit_name, ids, nft_url=None):
+    onboarding_pipeline = get_onboarding_pipeline()
+    specs = [NFTSpec(unit_name, manufacturer_name + '-' + str(id), nft_url) for id in ids]
+    services = onboarding_pipeline.onboard(specs)
+
+    for nft_marketplace_service, nft_service in services:
+        print("NFT CREATED WITH ID %s in account %s, APP ID %s" % (nft_service.nft_id,
+                                                                   onboarding_pipeline.admin_address,
+                                                                   nft_marketplace_service.app_id))
+    return services
+
+
 def get_nft_cid(n, image_path, api_key, api_secret):
+    from natsort import natsorted
+    import requests
+
     img = natsorted(glob.glob(image_path))
     files = [img]
     headers = {'pinata_api_key': api_key,'pinata_secret_api_key': api_secret}
@@ -52,6 +45,9 @@ def get_nft_cid(n, image_path, api_key, api_secret):
 
 
 def main():
+    admin_pk, admin_addr, _ = get_account_credentials(1)
+    buyer_pk, buyer_addr, _ = get_account_credentials(2)
+
     product_ids = range(1,5)
     manufacturer_name = "ManufacturerA@collection1"
     unit_name = "MANA@C1"
@@ -59,11 +55,9 @@ def main():
     pinata_key, pinata_secret = get_pinata_credentials()
     sell_price = 100000
     nft_url = "QmYf24YppoPFyWe1aDNXjNMTqewAoJ4S4esucYNbR9dmoz"
-    for id in product_ids:
-        print("\n\nCREATING NFT %s" % id)
-        nft_smart_contract_service, nft_service = create_nft_services(
-            manufacturer_name, unit_name, id, nft_url=nft_url
-        )
+    print("\n\nCREATING NFTS %s" % list(product_ids))
+    services = create_nft_collection(manufacturer_name, unit_name, product_ids, nft_url=nft_url)
+    nft_smart_contract_service, nft_service = services[-1]
 
     # On the last contract, let's list our NFT and run a transaction
     nft_smart_contract_service.open_sell(sell_price=sell_price, caller_pk=admin_pk)
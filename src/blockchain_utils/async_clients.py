@@ -0,0 +1,228 @@
+import asyncio
+import base64
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from algosdk import constants, encoding
+from algosdk.future.transaction import SuggestedParams
+
+from src.blockchain_utils.http_transport import (UrllibHTTPTransport, decode_algod_response,
+                                                 decode_indexer_response, prepare_request)
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class ThreadedHTTPTransport:
+    """
+    Async transport running the requests of a blocking UrllibHTTPTransport in a thread pool.
+    Used when aiohttp is not installed.
+    """
+
+    def __init__(self, max_workers: int = 32, timeout: float = 30.0):
+        self.timeout = timeout
+        self._transport = UrllibHTTPTransport(timeout=timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="algod-http")
+
+    async def send(self, method: str, url: str, headers: Dict[str, str],
+                   data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          functools.partial(self._transport.send, method, url, headers, data))
+
+    async def request(self, method: str, url: str, headers: Dict[str, str],
+                      data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = await self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class AiohttpTransport:
+    """
+    Async transport sharing one aiohttp session, and its keep-alive connections, between all the requests.
+    """
+
+    def __init__(self, pool_size: int = 100, timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size),
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def send(self, method: str, url: str, headers: Dict[str, str],
+                   data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        async with self._get_session().request(method, url, headers=headers, data=data) as response:
+            return response.status, await response.read(), response.headers
+
+    async def request(self, method: str, url: str, headers: Dict[str, str],
+                      data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = await self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+def default_async_transport():
+    if aiohttp is not None:
+        return AiohttpTransport()
+    return ThreadedHTTPTransport()
+
+
+class _AsyncAPIClient:
+    auth_header = None
+
+    def _decode_response(self, status: int, body: bytes, response_format: str):
+        return decode_algod_response(status, body, response_format)
+
+    def __init__(self, token: str, address: str, headers: Optional[Dict[str, str]] = None, transport=None):
+        self.token = token
+        self.address = address.rstrip('/')
+        self.headers = headers
+        self.transport = transport or default_async_transport()
+
+    async def request(self, method: str, requrl: str, params: Optional[dict] = None, data: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None, response_format: str = "json"):
+        url, header = prepare_request(address=self.address,
+                                      requrl=requrl,
+                                      params=params,
+                                      auth_header=self.auth_header,
+                                      token=self.token,
+                                      client_headers=self.headers,
+                                      headers=headers)
+
+        status, body = await self.transport.request(method, url, headers=header, data=data)
+        return self._decode_response(status, body, response_format)
+
+    async def close(self):
+        await self.transport.close()
+
+
+class AsyncAlgodClient(_AsyncAPIClient):
+    """
+    Async counterpart of algod.AlgodClient for the endpoints used by the marketplace services.
+    """
+
+    auth_header = constants.algod_auth_header
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Optional[Dict[str, str]] = None,
+                 transport=None):
+        super().__init__(token=algod_token, address=algod_address, headers=headers, transport=transport)
+
+    async def status(self):
+        return await self.request("GET", "/status")
+
+    async def status_after_block(self, block_num: int):
+        return await self.request("GET", "/status/wait-for-block-after/" + str(block_num))
+
+    async def pending_transaction_info(self, transaction_id: str):
+        return await self.request("GET", "/transactions/pending/" + transaction_id, params={"format": "json"})
+
+    async def suggested_params(self) -> SuggestedParams:
+        res = await self.request("GET", "/transactions/params")
+        return SuggestedParams(res["fee"],
+                               res["last-round"],
+                               res["last-round"] + 1000,
+                               res["genesis-hash"],
+                               res["genesis-id"],
+                               False,
+                               res["consensus-version"],
+                               res["min-fee"])
+
+    async def send_raw_transaction(self, txn) -> str:
+        """
+        :param txn: base64 encoded signed transaction(s), as for algod.AlgodClient.send_raw_transaction.
+        :return:
+            Id of the first transaction.
+        """
+        res = await self.request("POST", "/transactions", data=base64.b64decode(txn),
+                                 headers={"Content-Type": "application/x-binary"})
+        return res["txId"]
+
+    async def send_transaction(self, txn) -> str:
+        return await self.send_raw_transaction(encoding.msgpack_encode(txn))
+
+    async def send_transactions(self, txns: List) -> str:
+        serialized = b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        return await self.send_raw_transaction(base64.b64encode(serialized))
+
+    async def compile(self, source: str):
+        return await self.request("POST", "/teal/compile", data=source.encode("utf-8"),
+                                  headers={"Content-Type": "application/x-binary"})
+
+    async def application_info(self, application_id: int):
+        return await self.request("GET", "/applications/" + str(application_id))
+
+    async def account_info(self, address: str):
+        return await self.request("GET", "/accounts/" + address)
+
+
+class AsyncIndexerClient(_AsyncAPIClient):
+    """
+    Async counterpart of indexer.IndexerClient for the endpoints used by the repositories.
+    """
+
+    auth_header = constants.indexer_auth_header
+
+    def _decode_response(self, status: int, body: bytes, response_format: str):
+        return decode_indexer_response(status, body)
+
+    def __init__(self, indexer_token: str, indexer_address: str, headers: Optional[Dict[str, str]] = None,
+                 transport=None):
+        # As the SDK, an empty indexer token is not sent at all.
+        super().__init__(token=indexer_token or None, address=indexer_address, headers=headers,
+                         transport=transport)
+
+    async def health(self):
+        return await self.request("GET", "/health")
+
+    async def search_applications(self, application_id: Optional[int] = None, limit: Optional[int] = None,
+                                  next_page: Optional[str] = None):
+        return await self.request("GET", "/applications",
+                                  params={"application-id": application_id, "limit": limit, "next": next_page})
+
+    async def search_assets(self, limit: Optional[int] = None, next_page: Optional[str] = None,
+                            creator: Optional[str] = None, name: Optional[str] = None, unit: Optional[str] = None,
+                            asset_id: Optional[int] = None):
+        return await self.request("GET", "/assets",
+                                  params={"limit": limit, "next": next_page, "creator": creator, "name": name,
+                                          "unit": unit, "asset-id": asset_id})
+
+    async def asset_balances(self, asset_id: int, limit: Optional[int] = None, next_page: Optional[str] = None):
+        return await self.request("GET", "/assets/" + str(asset_id) + "/balances",
+                                  params={"limit": limit, "next": next_page})
+
+
+class AsyncClientAdapter:
+    """
+    Exposes the methods of a blocking client (e.g. an in-process algod stand-in) as coroutines,
+    so the async services can run against it.
+    """
+
+    def __init__(self, client, executor: Optional[ThreadPoolExecutor] = None):
+        self.client = client
+        self._executor = executor
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attribute, *args, **kwargs))
+
+        return call
+
+    async def close(self):
+        pass
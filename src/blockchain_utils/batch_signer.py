@@ -0,0 +1,128 @@
+import base64
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from algosdk import constants, encoding
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
+from nacl.signing import SigningKey
+
+from src.blockchain_utils.signer import AccountSigner, Signer, as_signer
+
+
+def _sign_chunk(private_key: str, transactions: List[Transaction]) -> List[str]:
+    """
+    Signs the transactions of one sender key, runs in a worker process.
+    :return:
+        base64 signature of every transaction, in order.
+    """
+    signing_key = SigningKey(base64.b64decode(private_key)[:constants.key_len_bytes])
+    signatures = []
+    for txn in transactions:
+        to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+        signatures.append(base64.b64encode(signing_key.sign(to_sign).signature).decode())
+    return signatures
+
+
+class BatchSigner:
+    """
+    Signs many transactions across a process pool.
+    The transactions are split by signing key into chunks, each chunk is msgpack encoded and signed in a worker
+    with a single SigningKey. The signed transactions come back in input order, so they can be sent as they are
+    with send_transactions.
+    Batches smaller than min_batch_size are signed on the calling thread.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 256, min_batch_size: int = 64):
+        """
+        :param max_workers: number of worker processes, defaults to the number of CPUs.
+        :param chunk_size: maximum number of transactions sent to a worker at once.
+        :param min_batch_size: batches below this size are not worth the inter-process round trip.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_batch_size = min_batch_size
+        self._executor = None
+        self._addresses: Dict[str, str] = dict()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _address(self, private_key: str) -> str:
+        address = self._addresses.get(private_key)
+        if address is None:
+            address = as_signer(private_key).address
+            self._addresses[private_key] = address
+        return address
+
+    def _chunks(self, transactions: List[Transaction],
+                private_keys: List[str]) -> List[Tuple[str, List[int]]]:
+        """
+        :return:
+            (private key, indexes of its transactions) of every chunk.
+        """
+        indexes_by_key: "OrderedDict[str, List[int]]" = OrderedDict()
+        for index, private_key in enumerate(private_keys):
+            indexes_by_key.setdefault(private_key, []).append(index)
+
+        chunks = []
+        for private_key, indexes in indexes_by_key.items():
+            for start in range(0, len(indexes), self.chunk_size):
+                chunks.append((private_key, indexes[start:start + self.chunk_size]))
+        return chunks
+
+    def sign(self, transactions: List[Transaction],
+             private_keys: List[Union[str, Signer]]) -> List[SignedTransaction]:
+        """
+        :param transactions: unsigned transactions, with their group id if they are part of a group.
+        :param private_keys: private key, or signer, signing each transaction, in the same order.
+        Only the private keys and AccountSigners can be shipped to the workers.
+        :return:
+            Signed transactions, in the order of transactions.
+        """
+        if len(transactions) != len(private_keys):
+            raise ValueError("A private key is needed for every transaction.")
+
+        private_keys = [key.private_key if isinstance(key, AccountSigner) else key for key in private_keys]
+        if len(transactions) < self.min_batch_size or not all(isinstance(key, str) for key in private_keys):
+            return [as_signer(private_key).sign(txn) for txn, private_key in zip(transactions, private_keys)]
+
+        chunks = self._chunks(transactions, private_keys)
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_sign_chunk, private_key, [transactions[index] for index in indexes])
+            for private_key, indexes in chunks
+        ]
+
+        signed_transactions: List[Optional[SignedTransaction]] = [None] * len(transactions)
+        for (private_key, indexes), future in zip(chunks, futures):
+            signer_address = self._address(private_key)
+            for index, signature in zip(indexes, future.result()):
+                txn = transactions[index]
+                authorizing_address = signer_address if txn.sender != signer_address else None
+                signed_transactions[index] = SignedTransaction(txn, signature, authorizing_address)
+
+        return signed_transactions
+
+    def sign_group(self, transactions: List[Transaction],
+                   private_keys: List[Union[str, Signer]]) -> List[SignedTransaction]:
+        """
+        Assigns a group id to the transactions and signs them, ready for send_transactions.
+        """
+        algo_txn.assign_group_id(transactions)
+        return self.sign(transactions, private_keys)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
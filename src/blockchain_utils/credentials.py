@@ -2,49 +2,259 @@ from algosdk.v2client import algod
 from algosdk import account as algo_acc
 import yaml
 import os
+import tempfile
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 from algosdk import mnemonic
 from algosdk.v2client import indexer
 
+from src.blockchain_utils import endpoint_router, http_transport, rate_limiter
+from src.blockchain_utils.signer import AccountSigner
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on windows
+    fcntl = None
+
+
+DEFAULT_INDEXER_ADDRESS = "https://testnet-algorand.api.purestake.io/idx2"
+
 
 def get_project_root_path() -> Path:
     path = Path(os.path.dirname(__file__))
     return path.parent.parent
 
 
-def load_config():
+def get_config_location() -> str:
     root_path = get_project_root_path()
-    config_location = os.path.join(root_path, 'config.yml')
+    return os.path.join(root_path, 'config.yml')
 
-    with open(config_location) as file:
-        return yaml.full_load(file)
 
+class ConfigStore:
+    """
+    Process wide view of the config.yml file.
+    The file is parsed once and parsed again only when its modification time changes. Values derived from
+    the config (private keys, clients) are cached until the next reload.
+    """
 
-def get_algo_client():
+    def __init__(self, config_location: str):
+        self.config_location = config_location
+
+        self._lock = threading.RLock()
+        self._config: Optional[dict] = None
+        self._file_signature: Optional[tuple] = None
+        self._derived: Dict[Any, Any] = dict()
+
+    def _current_file_signature(self) -> tuple:
+        # The inode changes on every atomic replace, which catches rewrites within the mtime resolution.
+        file_stat = os.stat(self.config_location)
+        return file_stat.st_mtime_ns, file_stat.st_ino, file_stat.st_size
+
+    def load(self) -> dict:
+        """
+        :return:
+            Returns the parsed config, reloading it if the file changed since the last parse.
+        """
+        file_signature = self._current_file_signature()
+
+        with self._lock:
+            if self._config is None or file_signature != self._file_signature:
+                with open(self.config_location) as file:
+                    self._config = yaml.full_load(file)
+                self._file_signature = file_signature
+                self._derived.clear()
+
+            return self._config
+
+    def cached(self, key, factory: Callable[[dict], Any]):
+        """
+        Returns a value derived from the config, computing it only once per config revision.
+        :param key: hashable key identifying the derived value.
+        :param factory: function building the value from the parsed config.
+        :return:
+        """
+        config = self.load()
+
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory(config)
+            return self._derived[key]
+
+    def update(self, mutator: Callable[[dict], None]):
+        """
+        Applies the mutator to a fresh copy of the config and atomically replaces the file with the result.
+        Readers only ever see the previous or the new version of the file.
+        :param mutator: function modifying the parsed config in place.
+        :return:
+        """
+        config_dir = os.path.dirname(self.config_location) or '.'
+        lock_location = self.config_location + '.lock'
+
+        with self._lock, open(lock_location, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            with open(self.config_location) as file:
+                config = yaml.full_load(file)
+
+            mutator(config)
+
+            fd, tmp_location = tempfile.mkstemp(dir=config_dir, prefix='.config.', suffix='.yml')
+            try:
+                with os.fdopen(fd, 'w') as file:
+                    yaml.safe_dump(config, file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.chmod(tmp_location, os.stat(self.config_location).st_mode & 0o777)
+                os.replace(tmp_location, self.config_location)
+            except BaseException:
+                os.unlink(tmp_location)
+                raise
+
+            self._config = None
+            self._derived.clear()
+
+
+_config_store: Optional[ConfigStore] = None
+_config_store_lock = threading.Lock()
+
+
+def get_config_store() -> ConfigStore:
+    global _config_store
+
+    with _config_store_lock:
+        if _config_store is None:
+            _config_store = ConfigStore(get_config_location())
+        return _config_store
+
+
+def load_config():
+    return get_config_store().load()
+
+
+def _build_http_transport(config: dict):
+    """
+    Connection pool shared by the algod and indexer clients, configured by the optional
+    client_credentials.http section (pool_size, connect_timeout, read_timeout).
+    With the optional client_credentials.rate_limit section (requests_per_second, burst, max_retries,
+    host_rates), every request of the clients goes through a RateLimitedTransport keeping each host under its quota.
+    Returns None when requests is not installed and no rate limit is configured, the clients then use the
+    SDK transport.
+    """
+    http_config = config.get('client_credentials').get('http') or dict()
+    rate_limit_config = config.get('client_credentials').get('rate_limit')
+
+    if http_transport.requests is not None:
+        transport = http_transport.PooledHTTPTransport(pool_size=http_config.get('pool_size', 10),
+                                                       connect_timeout=http_config.get('connect_timeout', 5.0),
+                                                       read_timeout=http_config.get('read_timeout', 30.0))
+    elif rate_limit_config:
+        transport = http_transport.UrllibHTTPTransport(timeout=http_config.get('read_timeout', 30.0))
+    else:
+        return None
+
+    if not rate_limit_config:
+        return transport
+    return rate_limiter.RateLimitedTransport(transport,
+                                             requests_per_second=rate_limit_config.get('requests_per_second', 10.0),
+                                             burst=rate_limit_config.get('burst'),
+                                             max_retries=rate_limit_config.get('max_retries', 5),
+                                             host_rates=rate_limit_config.get('host_rates'))
+
+
+def get_http_transport():
+    return get_config_store().cached('http_transport', _build_http_transport)
+
+
+def get_async_http_transport():
     """
     :return:
-        Returns algod_client
+        A new transport for the clients of src.blockchain_utils.async_clients, sharing the buckets of the rate
+        limiter when one is configured.
     """
-    config = load_config()
+    from src.blockchain_utils import async_clients
+
+    transport = async_clients.default_async_transport()
+    limiter = get_http_transport()
+    if isinstance(limiter, rate_limiter.RateLimitedTransport):
+        return rate_limiter.AsyncRateLimitedTransport(transport, limiter)
+    return transport
+
+
+def get_rate_limit_stats() -> dict:
+    """
+    :return:
+        Counters of the rate limiter by host, empty when no rate limit is configured.
+    """
+    transport = get_http_transport()
+    if isinstance(transport, rate_limiter.RateLimitedTransport):
+        return transport.stats()
+    return dict()
+
+
+def _build_router(endpoints_config: list) -> endpoint_router.EndpointRouter:
+    """
+    Router over the endpoints of a client_credentials.algod_endpoints or indexer_endpoints list, each entry
+    having an address, an optional token and optional headers (an X-Api-key header with the token by default).
+    """
+    endpoints = [
+        endpoint_router.Endpoint(address=endpoint_config['address'],
+                                 token=endpoint_config.get('token'),
+                                 headers=endpoint_config.get('headers', {'X-Api-key': endpoint_config.get('token')}))
+        for endpoint_config in endpoints_config
+    ]
+    transport = get_http_transport()
+    if isinstance(transport, rate_limiter.RateLimitedTransport):
+        # The router fails over on 5xx and connection errors, retrying them on the same host first only delays it.
+        transport = transport.without_server_retries()
+    return endpoint_router.EndpointRouter(endpoints, transport=transport)
+
+
+def _build_algo_client(config: dict) -> algod.AlgodClient:
+    algod_endpoints = config.get('client_credentials').get('algod_endpoints')
+    if algod_endpoints:
+        return endpoint_router.RoutedAlgodClient(_build_router(algod_endpoints))
 
     api_key = config.get('client_credentials').get('purestake_api_key')
     address = config.get('client_credentials').get('algo_api_address')
     purestake_token = {'X-Api-key': api_key}
 
-    algod_client = algod.AlgodClient(api_key, address, headers=purestake_token)
-    return algod_client
+    transport = get_http_transport()
+    if transport is None:
+        return algod.AlgodClient(api_key, address, headers=purestake_token)
+    return http_transport.PooledAlgodClient(api_key, address, headers=purestake_token, transport=transport)
 
 
-def get_indexer():
-    config = load_config()
+def _build_indexer(config: dict) -> indexer.IndexerClient:
+    indexer_endpoints = config.get('client_credentials').get('indexer_endpoints')
+    if indexer_endpoints:
+        return endpoint_router.RoutedIndexerClient(_build_router(indexer_endpoints))
 
     token = config.get('client_credentials').get('token')
     headers = {'X-Api-key': token}
-    my_indexer = indexer.IndexerClient(indexer_token=token,
-                                       indexer_address="https://testnet-algorand.api.purestake.io/idx2",
-                                       headers=headers)
+    address = config.get('client_credentials').get('indexer_api_address', DEFAULT_INDEXER_ADDRESS)
+
+    transport = get_http_transport()
+    if transport is None:
+        return indexer.IndexerClient(indexer_token=token, indexer_address=address, headers=headers)
+    return http_transport.PooledIndexerClient(indexer_token=token,
+                                              indexer_address=address,
+                                              headers=headers,
+                                              transport=transport)
+
+
+def get_algo_client():
+    """
+    :return:
+        Returns the algod_client shared by the process, until the config changes.
+    """
+    return get_config_store().cached('algo_client', _build_algo_client)
+
+
+def get_indexer():
+    return get_config_store().cached('indexer', _build_indexer)
 
-    return my_indexer
 
 def get_pinata_credentials():
     config = load_config()
@@ -52,18 +262,35 @@ def get_pinata_credentials():
     api_secret = config.get('pinata').get('api_secret')
     return api_key, api_secret
 
+
 def get_account_credentials(account_id: int) -> (str, str, str):
     """
     Gets the credentials for the account with number: account_id
     :param account_id: Number of the account for which we want the credentials
     :return: (str, str, str) private key, address and mnemonic
     """
-    config = load_config()
     account_name = f"account_{account_id}"
 
-    account = config.get("accounts").get(account_name)
-    account_private_key = mnemonic.to_private_key(account.get("mnemonic"))
-    return account_private_key, account.get("address"), account.get("mnemonic")
+    def account_credentials(config: dict):
+        account = config.get("accounts").get(account_name)
+        account_private_key = mnemonic.to_private_key(account.get("mnemonic"))
+        return account_private_key, account.get("address"), account.get("mnemonic")
+
+    return get_config_store().cached(('account', account_name), account_credentials)
+
+
+def get_account_signer(account_id: int) -> AccountSigner:
+    """
+    Signer of the account with number: account_id, holding its decoded key until the config changes.
+    It can be passed everywhere a private key is expected.
+    """
+    account_name = f"account_{account_id}"
+
+    def account_signer(config: dict):
+        private_key, _, _ = get_account_credentials(account_id)
+        return AccountSigner(private_key)
+
+    return get_config_store().cached(('signer', account_name), account_signer)
 
 
 def get_account_with_name(account_name: str) -> (str, str, str):
@@ -84,11 +311,7 @@ def add_account_to_config():
         "mnemonic": mnemonic.from_private_key(private_key)
     }
 
-    root_path = get_project_root_path()
-    config_location = os.path.join(root_path, 'config.yml')
-
-    with open(config_location, 'r') as file:
-        cur_yaml = yaml.full_load(file)
+    def add_account(cur_yaml: dict):
         total_accounts = cur_yaml.get("accounts").get("total")
 
         curr_account = total_accounts + 1
@@ -99,5 +322,4 @@ def add_account_to_config():
         cur_yaml["accounts"].update(curr_account_credentials)
         cur_yaml["accounts"]["total"] = curr_account
 
-    with open(config_location, 'w') as file:
-        yaml.safe_dump(cur_yaml, file)
+    get_config_store().update(add_account)
@@ -0,0 +1,309 @@
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib import parse
+
+from algosdk import constants, error
+from algosdk.v2client import algod, indexer
+
+from src.blockchain_utils.http_transport import (
+    UrllibHTTPTransport,
+    decode_algod_response,
+    decode_indexer_response,
+    prepare_request,
+)
+
+
+class Endpoint:
+    """
+    One algod or indexer node, with the recent latency and error rate of the requests it served.
+    """
+
+    def __init__(self, address: str, token: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        self.address = address.rstrip("/")
+        self.token = token
+        self.headers = headers or dict()
+
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.unavailable_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def score(self, error_penalty: float) -> float:
+        # The endpoints never measured score 0, so that they are tried once before being ranked.
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1.0 + error_penalty * self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            "address": self.address,
+            "latency_ms": round(self.latency * 1000, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "failures": self.failures,
+            "available": self.unavailable_until <= time.monotonic(),
+        }
+
+    def __repr__(self):
+        return f"Endpoint({self.address!r})"
+
+
+class _EndpointFailure(Exception):
+    """
+    The endpoint did not answer, or answered with a status worth trying another endpoint for.
+    """
+
+    def __init__(self, endpoint: Endpoint, cause: Optional[Exception] = None, response: Optional[tuple] = None):
+        super().__init__(f"{endpoint.address}: {cause if cause is not None else f'HTTP {response[0]}'}")
+        self.endpoint = endpoint
+        self.cause = cause
+        self.response = response
+
+
+class EndpointRouter:
+    """
+    Routes every request to the healthiest of several equivalent endpoints.
+
+    The endpoints are ranked by the exponentially weighted moving average of their latency, penalized by their
+    recent error rate. A request failing on an endpoint (connection error, timeout, 429 or 5xx) is retried on
+    the next one, and an endpoint failing several times in a row is set aside for a cooldown. Idempotent reads
+    are hedged: when the best endpoint did not answer within hedge_factor times its usual latency, the request
+    is also sent to the next endpoint and the first answer wins.
+
+    The long-polls (LONG_POLL_PATHS), which are held by the node until something happens, are never hedged and
+    their duration is not counted in the latency of the endpoint.
+    """
+
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+    LONG_POLL_PATHS = ("/v2/status/wait-for-block-after/",)
+
+    def __init__(self,
+                 endpoints: List[Endpoint],
+                 transport=None,
+                 smoothing: float = 0.2,
+                 error_penalty: float = 10.0,
+                 failure_threshold: int = 3,
+                 cooldown: float = 10.0,
+                 hedge_factor: float = 3.0,
+                 min_hedge_delay: float = 0.05,
+                 max_workers: int = 16):
+        """
+        :param endpoints: endpoints serving the same network.
+        :param transport: HTTP transport shared by all the endpoints, defaults to an UrllibHTTPTransport.
+        :param smoothing: weight of the last request in the latency and error rate averages.
+        :param error_penalty: score multiplier of an endpoint failing every request.
+        :param failure_threshold: consecutive failures after which an endpoint is set aside.
+        :param cooldown: seconds an endpoint is set aside for.
+        :param hedge_factor: a read is hedged after this many times the usual latency of its endpoint,
+        0 to disable hedging.
+        :param min_hedge_delay: minimum seconds to wait before hedging a read.
+        :param max_workers: maximum number of requests in flight for hedged reads.
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required.")
+
+        self.endpoints = list(endpoints)
+        self.transport = transport or UrllibHTTPTransport()
+        self.smoothing = smoothing
+        self.error_penalty = error_penalty
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_factor = hedge_factor
+        self.min_hedge_delay = min_hedge_delay
+
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="endpoint-router")
+        self.hedged_requests = 0
+
+    def ranked(self) -> List[Endpoint]:
+        """
+        :return:
+            The available endpoints, best first, followed by the endpoints set aside.
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [endpoint for endpoint in self.endpoints if endpoint.unavailable_until <= now]
+            set_aside = [endpoint for endpoint in self.endpoints if endpoint.unavailable_until > now]
+            available.sort(key=lambda endpoint: endpoint.score(self.error_penalty))
+            set_aside.sort(key=lambda endpoint: endpoint.unavailable_until)
+        return available + set_aside
+
+    def is_long_poll(self, url: str) -> bool:
+        path = parse.urlsplit(url).path
+        return any(long_poll_path in path for long_poll_path in self.LONG_POLL_PATHS)
+
+    def _record(self, endpoint: Endpoint, latency: Optional[float], failed: bool):
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.error_rate += self.smoothing * ((1.0 if failed else 0.0) - endpoint.error_rate)
+            if failed:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.failure_threshold:
+                    endpoint.unavailable_until = time.monotonic() + self.cooldown
+            else:
+                endpoint.consecutive_failures = 0
+                endpoint.unavailable_until = 0.0
+            if latency is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.smoothing * (latency - endpoint.latency)
+
+    def _attempt(self, endpoint: Endpoint, method: str,
+                 build_request: Callable[[Endpoint], Tuple[str, Dict[str, str]]],
+                 data: Optional[bytes], long_poll: bool = False) -> Tuple[int, bytes]:
+        url, headers = build_request(endpoint)
+        started_at = time.monotonic()
+        try:
+            status, body = self.transport.request(method, url, headers=headers, data=data)
+        except Exception as e:
+            self._record(endpoint, latency=None, failed=True)
+            raise _EndpointFailure(endpoint, cause=e)
+
+        failed = status in self.RETRYABLE_STATUSES
+        latency = time.monotonic() - started_at if not long_poll else None
+        self._record(endpoint, latency=latency, failed=failed)
+        if failed:
+            raise _EndpointFailure(endpoint, response=(status, body))
+        return status, body
+
+    def _hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        if not self.hedge_factor:
+            return None
+        if endpoint.latency is None:
+            return None
+        return max(self.min_hedge_delay, self.hedge_factor * endpoint.latency)
+
+    def _failover(self, candidates: List[Endpoint], attempt: Callable[[Endpoint], Tuple[int, bytes]]):
+        last_failure = None
+        for endpoint in candidates:
+            try:
+                return attempt(endpoint)
+            except _EndpointFailure as failure:
+                last_failure = failure
+        raise last_failure
+
+    def _hedged(self, candidates: List[Endpoint], attempt: Callable[[Endpoint], Tuple[int, bytes]]):
+        remaining = list(candidates)
+        in_flight = dict()
+        last_failure = None
+
+        def launch():
+            endpoint = remaining.pop(0)
+            in_flight[self._executor.submit(attempt, endpoint)] = endpoint
+            return endpoint
+
+        leader = launch()
+        while in_flight:
+            timeout = self._hedge_delay(leader) if remaining else None
+            done, _ = concurrent.futures.wait(in_flight, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                # The leader is slow: the next endpoint races it, the slower answer is discarded.
+                with self._lock:
+                    self.hedged_requests += 1
+                leader = launch()
+                continue
+
+            for future in done:
+                in_flight.pop(future)
+                try:
+                    return future.result()
+                except _EndpointFailure as failure:
+                    last_failure = failure
+            if not in_flight and remaining:
+                leader = launch()
+
+        raise last_failure
+
+    def request(self, method: str, build_request: Callable[[Endpoint], Tuple[str, Dict[str, str]]],
+                data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        """
+        Sends the request to the best endpoint, failing over to the others.
+        :param method: HTTP method, the GET requests other than the long-polls are hedged.
+        :param build_request: builds the url and headers of the request for an endpoint.
+        :param data: body of the request.
+        :return:
+            (int, bytes) status and body of the first conclusive answer. When every endpoint failed, the last
+            retryable answer, or the last connection error is raised.
+        """
+        candidates = self.ranked()
+        long_poll = self.is_long_poll(build_request(candidates[0])[0])
+
+        def attempt(endpoint: Endpoint) -> Tuple[int, bytes]:
+            return self._attempt(endpoint, method, build_request, data, long_poll=long_poll)
+
+        try:
+            if method.upper() == "GET" and not long_poll and len(candidates) > 1:
+                return self._hedged(candidates, attempt)
+            return self._failover(candidates, attempt)
+        except _EndpointFailure as failure:
+            if failure.response is not None:
+                return failure.response
+            raise failure.cause
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class RoutedAlgodClient(algod.AlgodClient):
+    """
+    AlgodClient spreading its requests over several algod nodes through an EndpointRouter.
+    """
+
+    def __init__(self, router: EndpointRouter, headers: Optional[Dict[str, str]] = None):
+        first_endpoint = router.endpoints[0]
+        super().__init__(first_endpoint.token, first_endpoint.address, headers)
+        self.router = router
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        def build_request(endpoint: Endpoint):
+            return prepare_request(address=endpoint.address,
+                                   requrl=requrl,
+                                   params=params,
+                                   auth_header=constants.algod_auth_header,
+                                   token=endpoint.token,
+                                   client_headers=dict(self.headers or {}, **endpoint.headers),
+                                   headers=headers)
+
+        try:
+            status, body = self.router.request(method, build_request, data=data)
+        except Exception as e:
+            raise error.AlgodHTTPError(str(e))
+        return decode_algod_response(status, body, response_format)
+
+
+class RoutedIndexerClient(indexer.IndexerClient):
+    """
+    IndexerClient spreading its requests over several indexers through an EndpointRouter.
+    """
+
+    def __init__(self, router: EndpointRouter, headers: Optional[Dict[str, str]] = None):
+        first_endpoint = router.endpoints[0]
+        super().__init__(first_endpoint.token or "", first_endpoint.address, headers)
+        self.router = router
+
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None):
+        def build_request(endpoint: Endpoint):
+            return prepare_request(address=endpoint.address,
+                                   requrl=requrl,
+                                   params=params,
+                                   auth_header=constants.indexer_auth_header,
+                                   token=endpoint.token or None,
+                                   client_headers=dict(self.headers or {}, **endpoint.headers),
+                                   headers=headers)
+
+        try:
+            status, body = self.router.request(method, build_request, data=data)
+        except Exception as e:
+            raise error.IndexerHTTPError(str(e))
+        return decode_indexer_response(status, body)
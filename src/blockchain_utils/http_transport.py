@@ -0,0 +1,197 @@
+import json
+from typing import Dict, Mapping, Optional, Tuple
+from urllib import error as urllib_error, parse, request as urllib_request
+
+from algosdk import constants, error
+from algosdk.v2client import algod, indexer
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # pragma: no cover - optional dependency
+    requests = None
+
+
+API_VERSION_PATH_PREFIX = "/v2"
+
+
+class PooledHTTPTransport:
+    """
+    Blocking HTTP transport sharing keep-alive connections between all the requests, so that small calls
+    such as pending_transaction_info do not pay a TLS handshake each.
+    One transport is meant to be shared by every client of the process, it is thread safe.
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5.0, read_timeout: float = 30.0):
+        """
+        :param pool_size: maximum number of connections kept open per host.
+        :param connect_timeout: seconds to wait for a connection to be established.
+        :param read_timeout: seconds to wait for the response.
+        """
+        if requests is None:
+            raise ImportError("The pooled HTTP transport requires the requests package.")
+
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def send(self, method: str, url: str, headers: Dict[str, str],
+             data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        """
+        :return:
+            (int, bytes, mapping) status, body and headers of the response.
+        """
+        response = self._session.request(method, url, headers=headers, data=data, timeout=self.timeout)
+        return response.status_code, response.content, response.headers
+
+    def request(self, method: str, url: str, headers: Dict[str, str],
+                data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    def close(self):
+        self._session.close()
+
+
+class UrllibHTTPTransport:
+    """
+    Blocking HTTP transport on the standard library, with the interface of PooledHTTPTransport, for the
+    environments without requests. It opens one connection per request.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+
+    def send(self, method: str, url: str, headers: Dict[str, str],
+             data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        http_request = urllib_request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib_request.urlopen(http_request, timeout=self.timeout) as response:
+                return response.status, response.read(), response.headers
+        except urllib_error.HTTPError as e:
+            return e.code, e.read(), e.headers
+
+    def request(self, method: str, url: str, headers: Dict[str, str],
+                data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    def close(self):
+        pass
+
+
+def prepare_request(address: str,
+                    requrl: str,
+                    params: Optional[dict],
+                    auth_header: str,
+                    token: Optional[str],
+                    client_headers: Optional[Dict[str, str]],
+                    headers: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, str]]:
+    """
+    Builds the url and the headers of a request the same way the SDK clients do, for the blocking and the async
+    clients. The parameters set to None are left out of the query.
+    :return:
+        (str, dict) full url and headers of the request.
+    """
+    header = {"User-Agent": "py-algorand-sdk"}
+    if client_headers:
+        header.update(client_headers)
+    if headers:
+        header.update(headers)
+    if requrl not in constants.no_auth and token is not None:
+        header[auth_header] = token
+    if requrl not in constants.unversioned_paths:
+        requrl = API_VERSION_PATH_PREFIX + requrl
+    params = {key: value for key, value in (params or dict()).items() if value is not None}
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return address + requrl, header
+
+
+def _error_message(body: bytes) -> str:
+    message = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(message)["message"]
+    except (ValueError, KeyError, TypeError):
+        return message
+
+
+def decode_algod_response(status: int, body: bytes, response_format: str = "json"):
+    """
+    Turns an algod response into the value returned by the SDK client, or raises its AlgodHTTPError.
+    """
+    if status >= 400:
+        raise error.AlgodHTTPError(_error_message(body), status)
+
+    if response_format == "json":
+        try:
+            return json.loads(body)
+        except Exception as e:
+            raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+    return body
+
+
+def decode_indexer_response(status: int, body: bytes) -> dict:
+    """
+    Turns an indexer response into the value returned by the SDK client, or raises its IndexerHTTPError.
+    """
+    if status >= 400:
+        raise error.IndexerHTTPError(_error_message(body))
+
+    def recursively_sort_dict(dictionary):
+        return {
+            k: recursively_sort_dict(v) if isinstance(v, dict) else v
+            for k, v in sorted(dictionary.items())
+        }
+
+    return recursively_sort_dict(json.loads(body.decode("utf-8")))
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """
+    AlgodClient sending its requests through a PooledHTTPTransport instead of one urllib connection per call.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Optional[Dict[str, str]] = None,
+                 transport=None):
+        super().__init__(algod_token, algod_address, headers)
+        self.transport = transport or PooledHTTPTransport()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        url, header = prepare_request(address=self.algod_address,
+                                      requrl=requrl,
+                                      params=params,
+                                      auth_header=constants.algod_auth_header,
+                                      token=self.algod_token,
+                                      client_headers=self.headers,
+                                      headers=headers)
+
+        status, body = self.transport.request(method, url, headers=header, data=data)
+        return decode_algod_response(status, body, response_format)
+
+
+class PooledIndexerClient(indexer.IndexerClient):
+    """
+    IndexerClient sending its requests through a PooledHTTPTransport instead of one urllib connection per call.
+    """
+
+    def __init__(self, indexer_token: str, indexer_address: str, headers: Optional[Dict[str, str]] = None,
+                 transport=None):
+        super().__init__(indexer_token, indexer_address, headers)
+        self.transport = transport or PooledHTTPTransport()
+
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None):
+        url, header = prepare_request(address=self.indexer_address,
+                                      requrl=requrl,
+                                      params=params,
+                                      auth_header=constants.indexer_auth_header,
+                                      token=self.indexer_token or None,
+                                      client_headers=self.headers,
+                                      headers=headers)
+
+        status, body = self.transport.request(method, url, headers=header, data=data)
+        return decode_indexer_response(status, body)
@@ -0,0 +1,287 @@
+"""
+Lightweight timing of the network interactions.
+
+Spans time the phases of a call (compile, params, build, sign, submit, confirm, indexer_read...) and feed
+in-memory latency histograms, keyed by operation and by label (e.g. the AppMethods name of the call in progress):
+
+    from src.blockchain_utils.instrumentation import instrumentation, JSONExporter
+
+    instrumentation.enable()
+    with instrumentation.labeled("openSell"):
+        marketplace.open_sell(...)
+    instrumentation.export(JSONExporter("timings.json"))
+
+When disabled, a span is a shared no-op context manager.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+INSTRUMENTATION_ENV = "EVERMORE_INSTRUMENTATION"
+
+NO_LABEL = "-"
+
+# Upper bounds of the histogram buckets, in seconds: 50us doubling up to ~100s.
+BUCKET_BOUNDS = tuple(0.00005 * 2 ** i for i in range(22))
+
+
+class LatencyHistogram:
+    """
+    Fixed bucket histogram of durations, with exact count, sum, min and max.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, duration: float):
+        self.buckets[bisect_left(BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the percentile, capped by the maximum.
+        """
+        if not self.count:
+            return None
+
+        rank = fraction * self.count
+        cumulated = 0
+        for index, bucket_count in enumerate(self.buckets):
+            cumulated += bucket_count
+            if cumulated >= rank and bucket_count:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "total_ms": ms(self.total),
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "min_ms": ms(self.min),
+            "max_ms": ms(self.max),
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+        }
+
+
+class _NoopContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_CONTEXT = _NoopContext()
+
+# A context variable rather than a thread local, so that the label also follows the asyncio tasks.
+_current_label: ContextVar[Optional[str]] = ContextVar("instrumentation_label", default=None)
+
+
+class _Span:
+    __slots__ = ("instrumentation", "operation", "label", "started_at")
+
+    def __init__(self, instrumentation: "Instrumentation", operation: str, label: Optional[str]):
+        self.instrumentation = instrumentation
+        self.operation = operation
+        self.label = label
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.instrumentation.record(self.operation, time.perf_counter() - self.started_at, label=self.label,
+                                    failed=exc_type is not None)
+        return False
+
+
+class _Labeled:
+    __slots__ = ("label", "token")
+
+    def __init__(self, label: str):
+        self.label = label
+
+    def __enter__(self):
+        self.token = _current_label.set(self.label)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_label.reset(self.token)
+        return False
+
+
+class Instrumentation:
+    """
+    Registry of the latency histograms, per (operation, label).
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = dict()
+        self._errors: Dict[Tuple[str, str], int] = dict()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, str, float, bool], None]] = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def current_label(self) -> Optional[str]:
+        return _current_label.get()
+
+    def span(self, operation: str, label: Optional[str] = None):
+        """
+        Times the block as one occurrence of the operation. Without a label, the label of the enclosing
+        labeled() block is used.
+        """
+        if not self.enabled:
+            return _NOOP_CONTEXT
+        return _Span(self, operation, label)
+
+    def labeled(self, label: str):
+        """
+        Labels the spans opened within the block, by the current thread or task, e.g. with an AppMethods name.
+        """
+        if not self.enabled:
+            return _NOOP_CONTEXT
+        return _Labeled(label)
+
+    def _decorator(self, context_factory: Callable):
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await function(*args, **kwargs)
+                    with context_factory():
+                        return await function(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with context_factory():
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def timed(self, operation: str):
+        """
+        Decorator timing every call of the function, or coroutine function, as the operation.
+        """
+        return self._decorator(lambda: _Span(self, operation, None))
+
+    def label(self, label: str):
+        """
+        Decorator running every call of the function within labeled(label).
+        """
+        return self._decorator(lambda: _Labeled(label))
+
+    def add_listener(self, listener: Callable[[str, str, float, bool], None]):
+        """
+        Calls listener(operation, label, duration, failed) at the end of every span, e.g. a LogExporter.on_span.
+        """
+        self._listeners.append(listener)
+
+    def record(self, operation: str, duration: float, label: Optional[str] = None, failed: bool = False):
+        if label is None:
+            label = self.current_label() or NO_LABEL
+
+        key = (operation, label)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self._histograms[key] = histogram
+            histogram.record(duration)
+            if failed:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+        for listener in self._listeners:
+            listener(operation, label, duration, failed)
+
+    def snapshot(self) -> Dict[str, Dict[str, dict]]:
+        """
+        :return:
+            operation -> label -> summary of the histogram.
+        """
+        with self._lock:
+            snapshot = dict()
+            for (operation, label), histogram in sorted(self._histograms.items()):
+                summary = histogram.summary()
+                summary["errors"] = self._errors.get((operation, label), 0)
+                snapshot.setdefault(operation, dict())[label] = summary
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+    def export(self, *exporters):
+        snapshot = self.snapshot()
+        for exporter in exporters:
+            exporter.export(snapshot)
+
+
+class LogExporter:
+    """
+    Writes one line per operation and label, and optionally one line per span when added as a listener.
+    """
+
+    def __init__(self, write: Callable[[str], None] = print):
+        self.write = write
+
+    def on_span(self, operation: str, label: str, duration: float, failed: bool):
+        self.write(f"[timing] {operation} {label} {duration * 1000:.3f}ms{' failed' if failed else ''}")
+
+    def export(self, snapshot: Dict[str, Dict[str, dict]]):
+        for operation, labels in snapshot.items():
+            for label, summary in labels.items():
+                self.write(f"[timing] {operation} {label} count={summary['count']} errors={summary['errors']} "
+                           f"mean={summary['mean_ms']}ms p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms "
+                           f"p99={summary['p99_ms']}ms max={summary['max_ms']}ms")
+
+
+class JSONExporter:
+    """
+    Dumps the snapshot as JSON to a file, or to the write callable.
+    """
+
+    def __init__(self, path: Optional[str] = None, write: Optional[Callable[[str], None]] = None):
+        self.path = path
+        self.write = write
+
+    def export(self, snapshot: Dict[str, Dict[str, dict]]):
+        payload = json.dumps({"exported_at": time.time(), "operations": snapshot}, indent=2, sort_keys=True)
+        if self.path is not None:
+            with open(self.path, "w") as file:
+                file.write(payload)
+        if self.write is not None:
+            self.write(payload)
+
+
+instrumentation = Instrumentation(enabled=os.environ.get(INSTRUMENTATION_ENV, "") not in ("", "0", "false"))
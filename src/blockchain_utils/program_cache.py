@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
+
+from importlib.metadata import version as _package_version, PackageNotFoundError
+
+
+PROGRAM_CACHE_DIR_ENV = "EVERMORE_PROGRAM_CACHE_DIR"
+
+
+def get_pyteal_version() -> str:
+    try:
+        return _package_version("pyteal")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def program_cache_key(teal_source: str, teal_version: int, pyteal_version: Optional[str] = None) -> str:
+    """
+    Content address of a compiled program.
+    :param teal_source: TEAL source code generated by compileTeal.
+    :param teal_version: TEAL version the source was generated for.
+    :param pyteal_version: pyteal version used to generate the source, defaults to the installed one.
+    :return:
+        Returns the hex sha256 digest identifying the program.
+    """
+    if pyteal_version is None:
+        pyteal_version = get_pyteal_version()
+
+    digest = hashlib.sha256()
+    digest.update(f"teal:{teal_version}\npyteal:{pyteal_version}\n".encode("utf-8"))
+    digest.update(teal_source.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CompiledProgramCache:
+    """
+    Content-addressed cache of compiled TEAL bytecode.
+    Entries are kept in memory and, when a cache directory is set, persisted on disk so that
+    other processes and later runs reuse the same bytecode.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._programs: Dict[str, bytes] = dict()
+        self._lock = threading.Lock()
+
+    def _program_path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.teal.b64")
+
+    def _read_from_disk(self, key: str) -> Optional[bytes]:
+        path = self._program_path(key)
+        if path is None or not os.path.isfile(path):
+            return None
+
+        with open(path, "rb") as file:
+            return base64.b64decode(file.read())
+
+    def _write_to_disk(self, key: str, program: bytes):
+        path = self._program_path(key)
+        if path is None:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(base64.b64encode(program))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        program = self._programs.get(key)
+        if program is not None:
+            return program
+
+        program = self._read_from_disk(key)
+        if program is not None:
+            with self._lock:
+                self._programs[key] = program
+        return program
+
+    def put(self, key: str, program: bytes):
+        with self._lock:
+            self._programs[key] = program
+        self._write_to_disk(key, program)
+
+    def get_or_compile(self,
+                       teal_source: str,
+                       teal_version: int,
+                       compile_function: Callable[[str], bytes]) -> bytes:
+        """
+        Returns the bytecode for the given TEAL source, compiling it only on a cache miss.
+        :param teal_source: TEAL source code.
+        :param teal_version: TEAL version of the source code.
+        :param compile_function: function turning TEAL source into bytecode, e.g. a call to algod.
+        :return:
+            Compiled program bytes.
+        """
+        key = program_cache_key(teal_source=teal_source, teal_version=teal_version)
+
+        program = self.get(key)
+        if program is None:
+            program = compile_function(teal_source)
+            self.put(key, program)
+
+        return program
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+
+
+default_program_cache = CompiledProgramCache(cache_dir=os.environ.get(PROGRAM_CACHE_DIR_ENV))
@@ -0,0 +1,313 @@
+import asyncio
+import copy
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+from urllib import parse
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second, up to `capacity` tokens.
+    The rate adapts to the quota of the server: it is halved when the server answers 429 and grows back
+    slowly with every successful request, up to the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, min_rate: Optional[float] = None,
+                 recovery: float = 0.02):
+        """
+        :param rate: requests per second allowed at most.
+        :param capacity: burst size, defaults to one second of requests.
+        :param min_rate: rate never gone under when adapting, defaults to a tenth of the rate.
+        :param recovery: fraction of the configured rate regained with each successful request.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.recovery = recovery
+
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _take(self) -> float:
+        """
+        Takes a token if one is available.
+        :return:
+            0 when the token was taken, otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+    def acquire(self) -> float:
+        """
+        Blocks until a token is available and takes it.
+        :return:
+            Seconds waited.
+        """
+        waited = 0.0
+        delay = self._take()
+        while delay:
+            time.sleep(delay)
+            waited += delay
+            delay = self._take()
+        return waited
+
+    async def acquire_async(self) -> float:
+        """
+        Waits without blocking the event loop until a token is available and takes it.
+        :return:
+            Seconds waited.
+        """
+        waited = 0.0
+        delay = self._take()
+        while delay:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self._take()
+        return waited
+
+    def pause(self, seconds: float):
+        """
+        Holds every request of the bucket for the given seconds, e.g. the Retry-After of the server.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.recovery * self.max_rate)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    :param value: Retry-After header, in seconds or as an HTTP date.
+    :return:
+        Seconds to wait, None when the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimitedTransport:
+    """
+    HTTP transport wrapper keeping the requests of every host under its quota.
+    Each host (netloc) gets a TokenBucket. The requests answered by 429, and the reads answered by 5xx or
+    failing to connect, are retried with a jittered exponential backoff, or after the Retry-After of the server.
+    Writes are only retried on 429, which guarantees that the server did not process them.
+    Under an EndpointRouter, the 5xx answers and the connection errors are left to the router, which fails over
+    to another endpoint instead: see without_server_retries.
+    """
+
+    RETRYABLE_STATUSES = (500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    def __init__(self,
+                 transport,
+                 requests_per_second: float = 10.0,
+                 burst: Optional[float] = None,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.25,
+                 backoff_max: float = 30.0,
+                 host_rates: Optional[Dict[str, float]] = None,
+                 retry_server_errors: bool = True):
+        """
+        :param transport: wrapped transport, e.g. a PooledHTTPTransport.
+        :param requests_per_second: quota of every host.
+        :param burst: requests which can be sent at once after an idle period, defaults to one second of quota.
+        :param max_retries: retries of a request before its last answer, or error, is returned.
+        :param backoff_base: seconds waited before the first retry, doubled with every retry.
+        :param backoff_max: longest backoff.
+        :param host_rates: quota of specific hosts, by netloc.
+        :param retry_server_errors: retries the reads answered by 5xx or failing to connect, otherwise only the
+        429 answers are retried.
+        """
+        self.transport = transport
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.host_rates = host_rates or dict()
+        self.retry_server_errors = retry_server_errors
+
+        self._buckets: Dict[str, TokenBucket] = dict()
+        self._counters: Dict[str, Dict[str, float]] = dict()
+        self._lock = threading.Lock()
+
+    def bucket(self, netloc: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(netloc)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rates.get(netloc, self.requests_per_second), capacity=self.burst)
+                self._buckets[netloc] = bucket
+                self._counters[netloc] = {"requests": 0, "retries": 0, "throttled": 0, "server_errors": 0,
+                                          "connection_errors": 0, "wait_seconds": 0.0}
+            return bucket
+
+    def _count(self, netloc: str, counter: str, amount: float = 1):
+        with self._lock:
+            self._counters[netloc][counter] += amount
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def without_server_retries(self) -> "RateLimitedTransport":
+        """
+        :return:
+            Transport sharing the buckets and counters of this one, which only retries the 429 answers.
+        """
+        transport = copy.copy(self)
+        transport.retry_server_errors = False
+        return transport
+
+    def _retry_delay(self, netloc: str, bucket: TokenBucket, method: str, attempt: int, status: Optional[int],
+                     response_headers: Optional[Mapping[str, str]] = None) -> Optional[float]:
+        """
+        :param status: status of the answer, None when the request failed to connect.
+        :return:
+            Seconds to wait before retrying the request, None when the answer, or error, is final.
+        """
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        if status is None:
+            self._count(netloc, "connection_errors")
+            retryable = idempotent and self.retry_server_errors
+            delay = self._backoff(attempt)
+        elif status == 429:
+            self._count(netloc, "throttled")
+            bucket.throttled()
+            retry_after = parse_retry_after((response_headers or {}).get("Retry-After"))
+            if retry_after is not None:
+                bucket.pause(retry_after)
+            retryable = True
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+        elif status in self.RETRYABLE_STATUSES:
+            self._count(netloc, "server_errors")
+            retryable = idempotent and self.retry_server_errors
+            delay = self._backoff(attempt)
+        else:
+            bucket.succeeded()
+            return None
+
+        if not retryable or attempt >= self.max_retries:
+            return None
+        return delay
+
+    def send(self, method: str, url: str, headers: Dict[str, str],
+             data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        netloc = parse.urlsplit(url).netloc
+        bucket = self.bucket(netloc)
+
+        attempt = 0
+        while True:
+            self._count(netloc, "wait_seconds", bucket.acquire())
+            self._count(netloc, "requests")
+
+            try:
+                status, body, response_headers = self.transport.send(method, url, headers=headers, data=data)
+            except Exception:
+                delay = self._retry_delay(netloc, bucket, method, attempt, status=None)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(netloc, bucket, method, attempt, status, response_headers)
+                if delay is None:
+                    return status, body, response_headers
+
+            attempt += 1
+            self._count(netloc, "retries")
+            time.sleep(delay)
+
+    def request(self, method: str, url: str, headers: Dict[str, str],
+                data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        :return:
+            Counters and current rate of every host.
+        """
+        with self._lock:
+            return {netloc: dict(self._counters[netloc], rate=round(bucket.rate, 3))
+                    for netloc, bucket in self._buckets.items()}
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport:
+    """
+    Wrapper of the async transports of src.blockchain_utils.async_clients, waiting and retrying the same way as
+    the RateLimitedTransport whose buckets it shares, so that the blocking and async clients of the process stay
+    under the quota of each host together.
+    """
+
+    def __init__(self, transport, limiter: RateLimitedTransport):
+        """
+        :param transport: wrapped async transport, e.g. an AiohttpTransport.
+        :param limiter: transport holding the buckets, counters and retry settings.
+        """
+        self.transport = transport
+        self.limiter = limiter
+
+    async def send(self, method: str, url: str, headers: Dict[str, str],
+                   data: Optional[bytes] = None) -> Tuple[int, bytes, Mapping[str, str]]:
+        limiter = self.limiter
+        netloc = parse.urlsplit(url).netloc
+        bucket = limiter.bucket(netloc)
+
+        attempt = 0
+        while True:
+            limiter._count(netloc, "wait_seconds", await bucket.acquire_async())
+            limiter._count(netloc, "requests")
+
+            try:
+                status, body, response_headers = await self.transport.send(method, url, headers=headers, data=data)
+            except Exception:
+                delay = limiter._retry_delay(netloc, bucket, method, attempt, status=None)
+                if delay is None:
+                    raise
+            else:
+                delay = limiter._retry_delay(netloc, bucket, method, attempt, status, response_headers)
+                if delay is None:
+                    return status, body, response_headers
+
+            attempt += 1
+            limiter._count(netloc, "retries")
+            await asyncio.sleep(delay)
+
+    async def request(self, method: str, url: str, headers: Dict[str, str],
+                      data: Optional[bytes] = None) -> Tuple[int, bytes]:
+        status, body, _ = await self.send(method, url, headers=headers, data=data)
+        return status, body
+
+    async def close(self):
+        await self.transport.close()
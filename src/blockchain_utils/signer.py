@@ -0,0 +1,117 @@
+import base64
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, Union
+
+from algosdk import constants, encoding, error
+from algosdk import account as algo_acc
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
+from nacl.signing import SigningKey
+
+
+class Signer(ABC):
+    """
+    Signs the transactions of one account. Subclasses only implement sign, the rest is derived from it.
+    """
+
+    address: str
+
+    @abstractmethod
+    def sign(self, transaction: Transaction) -> SignedTransaction:
+        pass
+
+    def sign_transactions(self, transactions: List[Transaction]) -> List[SignedTransaction]:
+        return [self.sign(txn) for txn in transactions]
+
+    def sign_group(self, transactions: List[Transaction]) -> List[SignedTransaction]:
+        """
+        Assigns a group id to the transactions and signs them, ready for send_transactions.
+        """
+        algo_txn.assign_group_id(transactions)
+        return self.sign_transactions(transactions)
+
+    def _authorizing_address(self, transaction: Transaction) -> Optional[str]:
+        # Set for the transactions of an account rekeyed to this one, as Transaction.sign does.
+        return self.address if transaction.sender != self.address else None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.address!r})"
+
+
+class AccountSigner(Signer):
+    """
+    Signer holding the ed25519 key of the account, decoded once, and its address, derived once.
+    """
+
+    def __init__(self, private_key: str):
+        """
+        :param private_key: base64 private key, as returned by get_account_credentials.
+        """
+        self.private_key = private_key
+        self.address = algo_acc.address_from_private_key(private_key)
+        self._signing_key = SigningKey(base64.b64decode(private_key)[:constants.key_len_bytes])
+
+    def sign(self, transaction: Transaction) -> SignedTransaction:
+        to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(transaction))
+        signature = base64.b64encode(self._signing_key.sign(to_sign).signature).decode()
+        return SignedTransaction(transaction, signature, self._authorizing_address(transaction))
+
+    def __repr__(self):
+        # Never the private key.
+        return f"AccountSigner({self.address!r})"
+
+
+class KMDSigner(Signer):
+    """
+    Signer delegating to a key management daemon: algosdk's KMDClient, or a stand-in with the same
+    methods such as src.tools.local_kmd.LocalKMD. The private key never leaves the daemon.
+    The wallet handle is kept between signatures and renewed once it expired.
+    """
+
+    def __init__(self, kmd_client, wallet_id: str, wallet_password: str, address: str):
+        self.kmd_client = kmd_client
+        self.wallet_id = wallet_id
+        self.wallet_password = wallet_password
+        self.address = address
+
+        self._lock = threading.Lock()
+        self._handle: Optional[str] = None
+
+    def _wallet_handle(self, renew: bool = False) -> str:
+        with self._lock:
+            if self._handle is None or renew:
+                self._handle = self.kmd_client.init_wallet_handle(self.wallet_id, self.wallet_password)
+            return self._handle
+
+    def sign(self, transaction: Transaction) -> SignedTransaction:
+        signing_address = self._authorizing_address(transaction)
+        try:
+            return self.kmd_client.sign_transaction(self._wallet_handle(), self.wallet_password, transaction,
+                                                    signing_address=signing_address)
+        except error.KMDHTTPError:
+            return self.kmd_client.sign_transaction(self._wallet_handle(renew=True), self.wallet_password,
+                                                    transaction, signing_address=signing_address)
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self.kmd_client.release_wallet_handle(self._handle)
+                self._handle = None
+
+
+@lru_cache(maxsize=256)
+def _account_signer(private_key: str) -> AccountSigner:
+    return AccountSigner(private_key)
+
+
+def as_signer(key: Union[str, Signer]) -> Signer:
+    """
+    :param key: base64 private key or signer.
+    :return:
+        The signer itself, or the AccountSigner of the private key, shared by all the calls with the same key.
+    """
+    if isinstance(key, Signer):
+        return key
+    return _account_signer(key)
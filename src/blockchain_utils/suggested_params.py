@@ -0,0 +1,167 @@
+import asyncio
+import copy
+import threading
+import time
+import weakref
+from typing import Optional, Union
+
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client import algod
+
+
+DEFAULT_FEE = 1000
+DEFAULT_VALIDITY_WINDOW = 1000
+MAX_TRANSACTION_LIFE = 1000
+DEFAULT_ROUND_TIME = 4.5
+
+
+class SuggestedParamsProvider:
+    """
+    Shares one suggested params fetch between many transactions.
+    The params are refreshed once they are older than the ttl or once the estimated current round moved
+    more than max_round_drift rounds away from the round they were fetched at. Every caller gets its own
+    copy whose last valid round is computed from the estimated current round.
+    """
+
+    _shared_providers = weakref.WeakKeyDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 ttl: float = 30.0,
+                 max_round_drift: int = 5,
+                 validity_window: int = DEFAULT_VALIDITY_WINDOW,
+                 round_time: float = DEFAULT_ROUND_TIME,
+                 fee: int = DEFAULT_FEE):
+        self.client = client
+        self.ttl = ttl
+        self.max_round_drift = max_round_drift
+        self.validity_window = validity_window
+        self.round_time = round_time
+        self.fee = fee
+
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, client: algod.AlgodClient) -> "SuggestedParamsProvider":
+        """
+        Returns the provider shared by every caller using the given client.
+        :param client:
+        :return:
+        """
+        with cls._shared_lock:
+            provider = cls._shared_providers.get(client)
+            if provider is None:
+                provider = cls(client=client)
+                cls._shared_providers[client] = provider
+            return provider
+
+    def _is_stale(self, now: float) -> bool:
+        if self._params is None:
+            return True
+
+        age = now - self._fetched_at
+        return age >= self.ttl or self._rounds_since_fetch(now) > self.max_round_drift
+
+    def _rounds_since_fetch(self, now: float) -> int:
+        if self.round_time <= 0:
+            return 0
+        return int((now - self._fetched_at) / self.round_time)
+
+    def _store(self, params: SuggestedParams):
+        with self._lock:
+            self._params = params
+            self._fetched_at = time.monotonic()
+
+    def _fresh_params(self) -> Optional[SuggestedParams]:
+        with self._lock:
+            if self._is_stale(time.monotonic()):
+                return None
+            return self._params
+
+    def refresh(self) -> SuggestedParams:
+        """
+        Fetches new suggested params from the network.
+        :return:
+        """
+        params = self.client.suggested_params()
+        self._store(params)
+        return params
+
+    def observe_round(self, current_round: int):
+        """
+        Invalidates the cached params when the network is known to be further than the allowed drift.
+        :param current_round: a round reported by the network, e.g. a confirmed round.
+        :return:
+        """
+        with self._lock:
+            if self._params is not None and current_round - self._params.first > self.max_round_drift:
+                self._params = None
+
+    def current_round(self) -> int:
+        """
+        Estimated current round of the network.
+        :return:
+        """
+        params = self._base_params()
+        return params.first + self._rounds_since_fetch(time.monotonic())
+
+    def _base_params(self) -> SuggestedParams:
+        params = self._fresh_params()
+        if params is None:
+            params = self.refresh()
+        return params
+
+    def _adjust(self, base_params: SuggestedParams, validity_window: Optional[int]) -> SuggestedParams:
+        if validity_window is None:
+            validity_window = self.validity_window
+
+        estimated_round = base_params.first + self._rounds_since_fetch(time.monotonic())
+
+        suggested_params = copy.copy(base_params)
+        suggested_params.last = min(base_params.first + MAX_TRANSACTION_LIFE, estimated_round + validity_window)
+        suggested_params.flat_fee = True
+        suggested_params.fee = self.fee
+
+        return suggested_params
+
+    def get(self, validity_window: Optional[int] = None) -> SuggestedParams:
+        """
+        Gets default suggested params with flat transaction fee.
+        The first valid round stays the fetched round, which is never ahead of the network, while the last
+        valid round is validity_window rounds after the estimated current round.
+        :param validity_window: number of rounds the transaction stays valid, defaults to the provider's window.
+        :return:
+        """
+        return self._adjust(self._base_params(), validity_window)
+
+
+class AsyncSuggestedParamsProvider(SuggestedParamsProvider):
+    """
+    SuggestedParamsProvider for clients whose suggested_params method is a coroutine.
+    """
+
+    _shared_providers = weakref.WeakKeyDictionary()
+
+    _refresh_task = None
+
+    async def _fetch(self) -> SuggestedParams:
+        params = await self.client.suggested_params()
+        self._store(params)
+        return params
+
+    async def refresh_async(self) -> SuggestedParams:
+        # Concurrent callers share the fetch already in flight.
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._refresh_task)
+
+    async def get_async(self, validity_window: Optional[int] = None) -> SuggestedParams:
+        params = self._fresh_params()
+        if params is None:
+            params = await self.refresh_async()
+        return self._adjust(params, validity_window)
+
+SuggestedParamsSource = Union[SuggestedParams, SuggestedParamsProvider]
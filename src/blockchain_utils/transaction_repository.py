@@ -2,22 +2,29 @@ import base64
 from algosdk.v2client import algod
 from algosdk.future import transaction as algo_txn
 from typing import List, Any, Optional, Union
-from algosdk import account as algo_acc
-from algosdk.future.transaction import Transaction, SignedTransaction
+from algosdk.future.transaction import Transaction, SignedTransaction, SuggestedParams
 
+from src.blockchain_utils.instrumentation import instrumentation
+from src.blockchain_utils.signer import Signer, as_signer
+from src.blockchain_utils.suggested_params import SuggestedParamsProvider, SuggestedParamsSource
 
-def get_default_suggested_params(client: algod.AlgodClient):
+
+def get_default_suggested_params(client: algod.AlgodClient,
+                                 suggested_params: Optional[SuggestedParamsSource] = None):
     """
     Gets default suggested params with flat transaction fee and fee amount of 1000.
     :param client:
+    :param suggested_params: explicit params or params provider to use instead of the client's shared provider.
     :return:
     """
-    suggested_params = client.suggested_params()
+    if isinstance(suggested_params, SuggestedParams):
+        return suggested_params
 
-    suggested_params.flat_fee = True
-    suggested_params.fee = 1000
+    if suggested_params is None:
+        suggested_params = SuggestedParamsProvider.shared(client)
 
-    return suggested_params
+    with instrumentation.span("params"):
+        return suggested_params.get()
 
 
 class ApplicationTransactionRepository:
@@ -26,19 +33,22 @@ class ApplicationTransactionRepository:
     """
 
     @classmethod
+    @instrumentation.timed("build")
     def create_application(cls,
                            client: algod.AlgodClient,
-                           creator_private_key: str,
+                           creator_private_key: Union[str, Signer],
                            approval_program: bytes,
                            clear_program: bytes,
                            global_schema: algo_txn.StateSchema,
                            local_schema: algo_txn.StateSchema,
                            app_args: Optional[List[Any]] = None,
                            foreign_assets: Optional[List[int]] = None,
-                           sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                           sign_transaction: bool = True,
+                           suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
 
-        creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        signer = as_signer(creator_private_key)
+        creator_address = signer.address
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
         txn = algo_txn.ApplicationCreateTxn(sender=creator_address,
                                             sp=suggested_params,
@@ -51,19 +61,22 @@ class ApplicationTransactionRepository:
                                             foreign_assets=foreign_assets)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            with instrumentation.span("sign"):
+                txn = signer.sign(txn)
 
         return txn
 
     @classmethod
+    @instrumentation.timed("build")
     def call_application(cls,
                          client: algod.AlgodClient,
-                         caller_private_key: str,
+                         caller_private_key: Union[str, Signer],
                          app_id: int,
                          on_complete: algo_txn.OnComplete,
                          app_args: Optional[List[Any]] = None,
                          foreign_assets: Optional[List[int]] = None,
-                         sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                         sign_transaction: bool = True,
+                         suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
         Creates a transaction that represents an application call.
         :param client: algorand client.
@@ -72,11 +85,13 @@ class ApplicationTransactionRepository:
         :param on_complete: Type of the application call.
         :param app_args: Arguments of the application.
         :param sign_transaction: boolean value that determines whether the created transaction should be signed or not.
+        :param suggested_params: explicit params or params provider, defaults to the client's shared provider.
         :return:
         Returns SignedTransaction or Transaction depending on the boolean property sign_transaction.
         """
-        caller_address = algo_acc.address_from_private_key(private_key=caller_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        signer = as_signer(caller_private_key)
+        caller_address = signer.address
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
         txn = algo_txn.ApplicationCallTxn(sender=caller_address,
                                           sp=suggested_params,
@@ -86,7 +101,8 @@ class ApplicationTransactionRepository:
                                           on_complete=on_complete)
 
         if sign_transaction:
-            txn = txn.sign(private_key=caller_private_key)
+            with instrumentation.span("sign"):
+                txn = signer.sign(txn)
 
         return txn
 
@@ -97,9 +113,10 @@ class ASATransactionRepository:
     """
 
     @classmethod
+    @instrumentation.timed("build")
     def create_asa(cls,
                    client: algod.AlgodClient,
-                   creator_private_key: str,
+                   creator_private_key: Union[str, Signer],
                    unit_name: str,
                    asset_name: str,
                    total: int,
@@ -111,7 +128,8 @@ class ASATransactionRepository:
                    clawback_address: Optional[str] = None,
                    url: Optional[str] = None,
                    default_frozen: bool = False,
-                   sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                   sign_transaction: bool = True,
+                   suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
 
         :param client:
@@ -128,12 +146,14 @@ class ASATransactionRepository:
         :param url:
         :param default_frozen:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        suggested_params = get_default_suggested_params(client=client)
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
-        creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
+        signer = as_signer(creator_private_key)
+        creator_address = signer.address
 
         txn = algo_txn.AssetConfigTxn(sender=creator_address,
                                       sp=suggested_params,
@@ -150,14 +170,15 @@ class ASATransactionRepository:
                                       note=note)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            with instrumentation.span("sign"):
+                txn = signer.sign(txn)
 
         return txn
 
     @classmethod
     def create_non_fungible_asa(cls,
                                 client: algod.AlgodClient,
-                                creator_private_key: str,
+                                creator_private_key: Union[str, Signer],
                                 unit_name: str,
                                 asset_name: str,
                                 note: Optional[bytes] = None,
@@ -167,7 +188,8 @@ class ASATransactionRepository:
                                 clawback_address: Optional[str] = None,
                                 url: Optional[str] = None,
                                 default_frozen: bool = False,
-                                sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                                sign_transaction: bool = True,
+                                suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
 
         :param client:
@@ -182,6 +204,7 @@ class ASATransactionRepository:
         :param url:
         :param default_frozen:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
@@ -198,25 +221,30 @@ class ASATransactionRepository:
                                                    clawback_address=clawback_address,
                                                    url=url,
                                                    default_frozen=default_frozen,
-                                                   sign_transaction=sign_transaction)
+                                                   sign_transaction=sign_transaction,
+                                                   suggested_params=suggested_params)
 
     @classmethod
+    @instrumentation.timed("build")
     def asa_opt_in(cls,
                    client: algod.AlgodClient,
-                   sender_private_key: str,
+                   sender_private_key: Union[str, Signer],
                    asa_id: int,
-                   sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                   sign_transaction: bool = True,
+                   suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
         Opts-in the sender's account to the specified asa with an id: asa_id.
         :param client:
         :param sender_private_key:
         :param asa_id:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        suggested_params = get_default_suggested_params(client=client)
-        sender_address = algo_acc.address_from_private_key(sender_private_key)
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
+        signer = as_signer(sender_private_key)
+        sender_address = signer.address
 
         txn = algo_txn.AssetTransferTxn(sender=sender_address,
                                         sp=suggested_params,
@@ -225,11 +253,13 @@ class ASATransactionRepository:
                                         index=asa_id)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with instrumentation.span("sign"):
+                txn = signer.sign(txn)
 
         return txn
 
     @classmethod
+    @instrumentation.timed("build")
     def asa_transfer(cls,
                      client: algod.AlgodClient,
                      sender_address: str,
@@ -237,8 +267,9 @@ class ASATransactionRepository:
                      asa_id: int,
                      amount: int,
                      revocation_target: Optional[str],
-                     sender_private_key: Optional[str],
-                     sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                     sender_private_key: Optional[Union[str, Signer]],
+                     sign_transaction: bool = True,
+                     suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
         :param client:
         :param sender_address:
@@ -248,9 +279,10 @@ class ASATransactionRepository:
         :param revocation_target:
         :param sender_private_key:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
-        suggested_params = get_default_suggested_params(client=client)
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
         txn = algo_txn.AssetTransferTxn(sender=sender_address,
                                         sp=suggested_params,
@@ -260,21 +292,24 @@ class ASATransactionRepository:
                                         revocation_target=revocation_target)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with instrumentation.span("sign"):
+                txn = as_signer(sender_private_key).sign(txn)
 
         return txn
 
     @classmethod
+    @instrumentation.timed("build")
     def change_asa_management(cls,
                               client: algod.AlgodClient,
-                              current_manager_pk: str,
+                              current_manager_pk: Union[str, Signer],
                               asa_id: int,
                               manager_address: Optional[str] = None,
                               reserve_address: Optional[str] = None,
                               freeze_address: Optional[str] = None,
                               clawback_address: Optional[str] = None,
                               strict_empty_address_check: bool = True,
-                              sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                              sign_transaction: bool = True,
+                              suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
         Changes the management properties of a given ASA.
         :param client:
@@ -286,12 +321,14 @@ class ASATransactionRepository:
         :param clawback_address:
         :param strict_empty_address_check:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
 
-        params = get_default_suggested_params(client=client)
+        params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
-        current_manager_address = algo_acc.address_from_private_key(private_key=current_manager_pk)
+        signer = as_signer(current_manager_pk)
+        current_manager_address = signer.address
 
         txn = algo_txn.AssetConfigTxn(
             sender=current_manager_address,
@@ -304,7 +341,8 @@ class ASATransactionRepository:
             strict_empty_address_check=strict_empty_address_check)
 
         if sign_transaction:
-            txn = txn.sign(private_key=current_manager_pk)
+            with instrumentation.span("sign"):
+                txn = signer.sign(txn)
 
         return txn
 
@@ -312,13 +350,15 @@ class ASATransactionRepository:
 class PaymentTransactionRepository:
 
     @classmethod
+    @instrumentation.timed("build")
     def payment(cls,
                 client: algod.AlgodClient,
                 sender_address: str,
                 receiver_address: str,
                 amount: int,
-                sender_private_key: Optional[str],
-                sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                sender_private_key: Optional[Union[str, Signer]],
+                sign_transaction: bool = True,
+                suggested_params: Optional[SuggestedParamsSource] = None) -> Union[Transaction, SignedTransaction]:
         """
         Creates a payment transaction in ALGOs.
         :param client:
@@ -327,9 +367,10 @@ class PaymentTransactionRepository:
         :param amount:
         :param sender_private_key:
         :param sign_transaction:
+        :param suggested_params:
         :return:
         """
-        suggested_params = get_default_suggested_params(client=client)
+        suggested_params = get_default_suggested_params(client=client, suggested_params=suggested_params)
 
         txn = algo_txn.PaymentTxn(sender=sender_address,
                                   sp=suggested_params,
@@ -337,6 +378,7 @@ class PaymentTransactionRepository:
                                   amt=amount)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            with instrumentation.span("sign"):
+                txn = as_signer(sender_private_key).sign(txn)
 
         return txn
@@ -0,0 +1,149 @@
+"""
+Command line entry point of the marketplace:
+
+    python -m src mint MAN2@C1 Manufacturer2@collection1-1 --url <cid>
+    python -m src list <app_id> <price>
+    python -m src buy <app_id>
+    python -m src validate <app_id>
+    python -m src state <app_id>
+    python -m src owner <nft_id>
+
+The modules are imported by the command which needs them: the read-only commands (state, owner) never load
+PyTeal, and the clients and credentials are only created once a command runs.
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+ADMIN_ACCOUNT_ID = 1
+BUYER_ACCOUNT_ID = 2
+
+
+def _marketplace(app_id: int, account_id: int):
+    from src.blockchain_utils.credentials import get_account_signer, get_algo_client
+    from src.repository.marketplace_repository import NFTMarketplaceRepository
+    from src.services.nft_marketplace import NFTMarketplace
+
+    client = get_algo_client()
+    signer = get_account_signer(account_id)
+    app_state = NFTMarketplaceRepository.load_app_state(app_id, fresh=True)
+
+    nft_marketplace = NFTMarketplace(admin_pk=signer, admin_address=signer.address,
+                                     nft_id=app_state.asa_id, client=client)
+    nft_marketplace.app_id = app_id
+    return nft_marketplace, app_state, signer, signer.address
+
+
+def mint(args) -> dict:
+    from src.blockchain_utils.credentials import get_account_signer, get_algo_client
+    from src.services.onboarding_pipeline import OnboardingPipeline
+
+    admin_signer = get_account_signer(args.account)
+    onboarding_pipeline = OnboardingPipeline(admin_pk=admin_signer, admin_address=admin_signer.address,
+                                             client=get_algo_client())
+    nft_marketplace, nft_service = onboarding_pipeline.onboard_one(unit_name=args.unit_name,
+                                                                   asset_name=args.asset_name,
+                                                                   nft_url=args.url)
+    return {"nft_id": nft_service.nft_id, "app_id": nft_marketplace.app_id,
+            "escrow_address": nft_marketplace.escrow_address}
+
+
+def list_nft(args) -> dict:
+    nft_marketplace, _, signer, _ = _marketplace(args.app_id, args.account)
+    tx_id = nft_marketplace.open_sell(sell_price=args.price, caller_pk=signer)
+    return {"app_id": args.app_id, "price": args.price, "tx_id": tx_id}
+
+
+def buy(args) -> dict:
+    from src.blockchain_utils.transaction_repository import ASATransactionRepository
+    from src.services.network_interaction import NetworkInteraction
+
+    nft_marketplace, app_state, buyer_pk, buyer_address = _marketplace(args.app_id, args.account)
+    buy_price = args.price if args.price is not None else app_state.asa_price
+
+    if not args.skip_opt_in:
+        opt_in_txn = ASATransactionRepository.asa_opt_in(client=nft_marketplace.client,
+                                                         sender_private_key=buyer_pk,
+                                                         asa_id=app_state.asa_id)
+        NetworkInteraction.submit_transaction(nft_marketplace.client, transaction=opt_in_txn)
+
+    tx_id = nft_marketplace.buy_nft(nft_owner_address=app_state.asa_owner,
+                                    buyer_address=buyer_address,
+                                    buyer_pk=buyer_pk,
+                                    buy_price=buy_price)
+    return {"app_id": args.app_id, "nft_id": app_state.asa_id, "price": buy_price, "tx_id": tx_id}
+
+
+def validate(args) -> dict:
+    nft_marketplace, _, buyer_pk, _ = _marketplace(args.app_id, args.account)
+    tx_id = nft_marketplace.validate_buy(buyer_pk=buyer_pk)
+    return {"app_id": args.app_id, "tx_id": tx_id}
+
+
+def state(args) -> dict:
+    from src.repository.marketplace_repository import NFTMarketplaceRepository
+
+    app_state = NFTMarketplaceRepository.load_app_state(args.app_id, fresh=args.fresh)
+    values = {key if isinstance(key, str) else key.hex(): value.hex() if isinstance(value, bytes) else value
+              for key, value in app_state.items()}
+    return {"app_id": args.app_id, "round": app_state.round, "global_state": values}
+
+
+def owner(args) -> dict:
+    from src.repository.nft_repository import NFTRepository
+
+    return {"nft_id": args.nft_id, "owner": NFTRepository().nft_owner(args.nft_id)}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src", description="NFT marketplace on Algorand.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    mint_parser = subparsers.add_parser("mint", help="create a NFT and its marketplace application")
+    mint_parser.add_argument("unit_name")
+    mint_parser.add_argument("asset_name")
+    mint_parser.add_argument("--url", help="IPFS CID of the NFT image")
+    mint_parser.add_argument("--account", type=int, default=ADMIN_ACCOUNT_ID)
+    mint_parser.set_defaults(handler=mint)
+
+    list_parser = subparsers.add_parser("list", help="open the sale of a NFT")
+    list_parser.add_argument("app_id", type=int)
+    list_parser.add_argument("price", type=int, help="sell price in micro ALGOs")
+    list_parser.add_argument("--account", type=int, default=ADMIN_ACCOUNT_ID)
+    list_parser.set_defaults(handler=list_nft)
+
+    buy_parser = subparsers.add_parser("buy", help="opt in the NFT and buy it")
+    buy_parser.add_argument("app_id", type=int)
+    buy_parser.add_argument("--price", type=int, help="defaults to the sell price of the application")
+    buy_parser.add_argument("--skip-opt-in", action="store_true", help="the buyer already opted in the NFT")
+    buy_parser.add_argument("--account", type=int, default=BUYER_ACCOUNT_ID)
+    buy_parser.set_defaults(handler=buy)
+
+    validate_parser = subparsers.add_parser("validate", help="validate a buy and transfer the NFT")
+    validate_parser.add_argument("app_id", type=int)
+    validate_parser.add_argument("--account", type=int, default=BUYER_ACCOUNT_ID)
+    validate_parser.set_defaults(handler=validate)
+
+    state_parser = subparsers.add_parser("state", help="print the global state of a marketplace application")
+    state_parser.add_argument("app_id", type=int)
+    state_parser.add_argument("--fresh", action="store_true", help="read algod instead of the indexer")
+    state_parser.set_defaults(handler=state)
+
+    owner_parser = subparsers.add_parser("owner", help="print the owner of a NFT")
+    owner_parser.add_argument("nft_id", type=int)
+    owner_parser.set_defaults(handler=owner)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        result = args.handler(args)
+    except Exception as e:
+        sys.stderr.write(f"{args.command} failed: {type(e).__name__}: {e}\n")
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0
@@ -0,0 +1,257 @@
+import base64
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Union
+
+from algosdk.encoding import encode_address
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.repository.indexer_readiness import wait_for_indexer_round
+
+
+TEAL_BYTES_TYPE = 1
+TEAL_UINT_TYPE = 2
+
+
+def decode_state_parameter(param_value):
+    return base64.b64decode(param_value).decode('utf-8')
+
+
+def decode_state_key(param_value) -> Union[str, bytes]:
+    """
+    Named keys are decoded to str, binary keys (e.g. Itob of an asset id) are kept as bytes.
+    """
+    raw_key = base64.b64decode(param_value)
+    try:
+        key = raw_key.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw_key
+    return key if key.isprintable() else raw_key
+
+
+class AppGlobalState(Mapping):
+    """
+    Typed global state of a marketplace application, as of a given round.
+    It is a read-only mapping of the decoded keys to the decoded values.
+    """
+
+    address_keys = ("ESCROW_ADDRESS", "ASA_OWNER", "ASA_BUYER", "APP_ADMIN", "ASA_CREATOR")
+    uint_keys = ("ASA_ID", "ASA_PRICE", "APP_STATE", "CREATOR_ROYALTIES")
+
+    def __init__(self, app_id: int, values: Dict[Union[str, bytes], Any], round: Optional[int] = None):
+        self.app_id = app_id
+        self._values = values
+        self.round = round
+
+    @classmethod
+    def decode_value(cls, key: Union[str, bytes], value: dict):
+        if value['type'] == TEAL_BYTES_TYPE:
+            raw_value = base64.b64decode(value.get('bytes', ''))
+            if key in cls.address_keys or (key not in cls.uint_keys and len(raw_value) == 32):
+                return encode_address(raw_value)
+            return raw_value
+        return value.get('uint', 0)
+
+    @classmethod
+    def from_global_state(cls, app_id: int, global_state: List[dict], round: Optional[int] = None):
+        """
+        :param app_id:
+        :param global_state: 'global-state' list as returned by algod or the indexer.
+        :param round: round at which the state was read.
+        :return:
+        """
+        values = dict()
+        for state_k in global_state:
+            key = decode_state_key(state_k['key'])
+            values[key] = cls.decode_value(key, state_k['value'])
+        return cls(app_id=app_id, values=values, round=round)
+
+    def __getitem__(self, key: Union[str, bytes]):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def as_dict(self) -> Dict[Union[str, bytes], Any]:
+        return dict(self._values)
+
+    @property
+    def escrow_address(self) -> Optional[str]:
+        return self._values.get("ESCROW_ADDRESS")
+
+    @property
+    def asa_id(self) -> Optional[int]:
+        return self._values.get("ASA_ID")
+
+    @property
+    def asa_price(self) -> Optional[int]:
+        return self._values.get("ASA_PRICE")
+
+    @property
+    def asa_owner(self) -> Optional[str]:
+        return self._values.get("ASA_OWNER")
+
+    @property
+    def asa_buyer(self) -> Optional[str]:
+        return self._values.get("ASA_BUYER")
+
+    @property
+    def app_state(self) -> Optional[int]:
+        return self._values.get("APP_STATE")
+
+    @property
+    def app_admin(self) -> Optional[str]:
+        return self._values.get("APP_ADMIN")
+
+    @property
+    def asa_creator(self) -> Optional[str]:
+        return self._values.get("ASA_CREATOR")
+
+    @property
+    def creator_royalties(self) -> Optional[int]:
+        return self._values.get("CREATOR_ROYALTIES")
+
+    def __repr__(self):
+        return f"AppGlobalState(app_id={self.app_id}, round={self.round}, values={self._values})"
+
+
+class AppStateCache:
+    """
+    Read-through LRU cache of application global states, keyed by app id.
+    An entry is served as long as it was read at or after the round required by the caller and by the
+    last transaction we submitted to the application. Reads go to the indexer, or to algod when the
+    caller needs the latest state.
+    """
+
+    def __init__(self, max_size: int = 1024, indexer=None, algod_client=None, max_age_rounds: Optional[int] = None):
+        """
+        :param max_size: maximum number of cached applications.
+        :param indexer: indexer client, defaults to get_indexer().
+        :param algod_client: algod client used for fresh reads, defaults to get_algo_client().
+        :param max_age_rounds: entries read more than this many rounds before the last observed round are refreshed.
+        """
+        self.max_size = max_size
+        self.max_age_rounds = max_age_rounds
+        self._indexer = indexer
+        self._algod_client = algod_client
+
+        self._states: "OrderedDict[int, AppGlobalState]" = OrderedDict()
+        self._required_rounds: Dict[int, int] = dict()
+        self._observed_round = 0
+        self._lock = threading.Lock()
+
+    @property
+    def indexer(self):
+        if self._indexer is None:
+            from src.blockchain_utils.credentials import get_indexer
+            self._indexer = get_indexer()
+        return self._indexer
+
+    @property
+    def algod_client(self):
+        if self._algod_client is None:
+            from src.blockchain_utils.credentials import get_algo_client
+            self._algod_client = get_algo_client()
+        return self._algod_client
+
+    def _required_round(self, app_id: int, min_round: Optional[int]) -> int:
+        """
+        Oldest round a state of the application can be read at: the round required by the caller, by our last
+        transaction to the application, and by max_age_rounds. Must be called with the lock held.
+        """
+        required_round = max(min_round or 0, self._required_rounds.get(app_id, 0))
+        if self.max_age_rounds is not None:
+            required_round = max(required_round, self._observed_round - self.max_age_rounds)
+        return required_round
+
+    def _cached(self, app_id: int, required_round: int) -> Optional[AppGlobalState]:
+        with self._lock:
+            state = self._states.get(app_id)
+            if state is None:
+                return None
+
+            if state.round is None or state.round < required_round:
+                return None
+
+            self._states.move_to_end(app_id)
+            return state
+
+    def _store(self, state: AppGlobalState):
+        with self._lock:
+            self._states[state.app_id] = state
+            self._states.move_to_end(state.app_id)
+            while len(self._states) > self.max_size:
+                evicted_app_id, _ = self._states.popitem(last=False)
+                self._required_rounds.pop(evicted_app_id, None)
+
+    def fetch_from_indexer(self, app_id: int, min_round: Optional[int] = None) -> AppGlobalState:
+        wait_for_indexer_round(self.indexer, min_round)
+        with instrumentation.span("indexer_read", label="app_state"):
+            response = self.indexer.search_applications(application_id=app_id)
+        global_state = response['applications'][0]['params'].get('global-state', [])
+        return AppGlobalState.from_global_state(app_id, global_state, round=response.get('current-round'))
+
+    def fetch_from_algod(self, app_id: int, algod_client=None) -> AppGlobalState:
+        algod_client = algod_client or self.algod_client
+        with instrumentation.span("algod_read", label="app_state"):
+            current_round = algod_client.status().get('last-round')
+            response = algod_client.application_info(app_id)
+        global_state = response['params'].get('global-state', [])
+        return AppGlobalState.from_global_state(app_id, global_state, round=current_round)
+
+    def get(self, app_id: int, min_round: Optional[int] = None, fresh: bool = False,
+            algod_client=None) -> AppGlobalState:
+        """
+        :param app_id:
+        :param min_round: the returned state is at least as recent as this round.
+        :param fresh: bypasses the cache and the indexer and reads the latest state from algod.
+        :param algod_client: client of the fresh read, defaults to the client of the cache.
+        :return:
+        """
+        if not fresh:
+            with self._lock:
+                required_round = self._required_round(app_id, min_round)
+            state = self._cached(app_id, required_round)
+            if state is not None:
+                return state
+            # The indexer must have caught up with our own writes, not only with the caller's round.
+            state = self.fetch_from_indexer(app_id, min_round=required_round or None)
+        else:
+            state = self.fetch_from_algod(app_id, algod_client=algod_client)
+
+        self._store(state)
+        return state
+
+    def invalidate(self, app_id: int, confirmed_round: Optional[int] = None):
+        """
+        Invalidates the cached state of an application, e.g. after we called it.
+        :param app_id:
+        :param confirmed_round: round of the transaction which changed the state. When given, the entry is
+        refreshed only if it is older than this round, otherwise it is dropped.
+        :return:
+        """
+        with self._lock:
+            if confirmed_round is None:
+                self._states.pop(app_id, None)
+                self._required_rounds.pop(app_id, None)
+            else:
+                self._required_rounds[app_id] = max(self._required_rounds.get(app_id, 0), confirmed_round)
+
+    def observe_round(self, current_round: int):
+        """
+        Records the latest round of the network, entries older than max_age_rounds are then refreshed.
+        """
+        with self._lock:
+            self._observed_round = max(self._observed_round, current_round)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._required_rounds.clear()
+
+
+app_state_cache = AppStateCache()
@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class DeploymentStep:
+    """
+    Steps of the onboarding of a NFT, in order. A *_sent step records a transaction which was sent but whose
+    confirmation was not seen yet.
+    """
+    planned = "planned"
+    mint_sent = "mint_sent"
+    minted = "minted"
+    app_sent = "app_sent"
+    app_created = "app_created"
+    escrow_sent = "escrow_sent"
+    completed = "completed"
+
+    sent_steps = (mint_sent, app_sent, escrow_sent)
+
+
+class DeploymentRecord(NamedTuple):
+    unit_name: str
+    asset_name: str
+    nft_url: Optional[str]
+    step: str
+    nft_id: Optional[int] = None
+    mint_txid: Optional[str] = None
+    app_id: Optional[int] = None
+    app_txid: Optional[str] = None
+    escrow_address: Optional[str] = None
+    escrow_txid: Optional[str] = None
+    # Last valid round of the transaction of the current *_sent step.
+    last_valid_round: Optional[int] = None
+    error: Optional[str] = None
+    updated_at: Optional[float] = None
+
+    @property
+    def key(self) -> (str, str):
+        return self.unit_name, self.asset_name
+
+
+_COLUMNS = DeploymentRecord._fields
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    unit_name TEXT NOT NULL,
+    asset_name TEXT NOT NULL,
+    nft_url TEXT,
+    step TEXT NOT NULL,
+    nft_id INTEGER,
+    mint_txid TEXT,
+    app_id INTEGER,
+    app_txid TEXT,
+    escrow_address TEXT,
+    escrow_txid TEXT,
+    last_valid_round INTEGER,
+    error TEXT,
+    updated_at REAL,
+    position INTEGER,
+    PRIMARY KEY (unit_name, asset_name)
+);
+CREATE INDEX IF NOT EXISTS deployments_step ON deployments (step);
+"""
+
+
+class DeploymentJournal:
+    """
+    Durable record of the onboarding of every NFT, keyed by (unit_name, asset_name): the step reached, the ids
+    created so far and the transaction id of each step. Every update is committed before the next step starts,
+    so that an interrupted onboarding can be resumed without minting or deploying twice.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        :param path: SQLite database file, the journal is only kept in memory by default.
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._migrate()
+        self._connection.commit()
+
+    def _migrate(self):
+        # Journals written before the last valid rounds were recorded.
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(deployments)")}
+        if "last_valid_round" not in columns:
+            self._connection.execute("ALTER TABLE deployments ADD COLUMN last_valid_round INTEGER")
+
+    def plan(self, specs: Iterable) -> List[DeploymentRecord]:
+        """
+        Records the NFTs to onboard, the NFTs already in the journal keep their progress.
+        :param specs: NFTSpec (unit_name, asset_name, nft_url) of each NFT.
+        :return:
+            Record of every spec, in the order of specs.
+        """
+        specs = list(specs)
+        with self._lock:
+            position = self._connection.execute("SELECT COALESCE(MAX(position), 0) FROM deployments").fetchone()[0]
+            for offset, (unit_name, asset_name, nft_url) in enumerate(specs, start=1):
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO deployments (unit_name, asset_name, nft_url, step, updated_at, position) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (unit_name, asset_name, nft_url, DeploymentStep.planned, time.time(), position + offset),
+                )
+            self._connection.commit()
+            return [self.get(unit_name, asset_name) for unit_name, asset_name, _ in specs]
+
+    def get(self, unit_name: str, asset_name: str) -> Optional[DeploymentRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM deployments WHERE unit_name = ? AND asset_name = ?",
+                (unit_name, asset_name)).fetchone()
+        return DeploymentRecord(*row) if row else None
+
+    def records(self, steps: Optional[Iterable[str]] = None) -> List[DeploymentRecord]:
+        """
+        :param steps: only returns the records at one of these steps.
+        :return:
+            Records, in the order they were planned.
+        """
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM deployments"
+        parameters = []
+        if steps is not None:
+            steps = list(steps)
+            sql += f" WHERE step IN ({', '.join('?' * len(steps))})"
+            parameters = steps
+        sql += " ORDER BY position"
+
+        with self._lock:
+            return [DeploymentRecord(*row) for row in self._connection.execute(sql, parameters)]
+
+    def unfinished(self) -> List[DeploymentRecord]:
+        return [record for record in self.records() if record.step != DeploymentStep.completed]
+
+    def update(self, record: DeploymentRecord, step: str, **values) -> DeploymentRecord:
+        """
+        Moves the record to the step, with the ids and txids learned at this step, and commits it.
+        The error of the previous attempt is cleared unless a new one is given.
+        """
+        values = dict(values, step=step, updated_at=time.time())
+        values.setdefault("error", None)
+        assignments = ", ".join(f"{column} = :{column}" for column in values)
+
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE deployments SET {assignments} WHERE unit_name = :key_unit_name AND asset_name = :key_asset_name",
+                dict(values, key_unit_name=record.unit_name, key_asset_name=record.asset_name),
+            )
+            self._connection.commit()
+        return record._replace(**values)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,119 @@
+"""
+Lazy iteration over the paginated indexer searches.
+
+The indexer returns at most `limit` results per response along with a next-token. The iterators below follow the
+tokens, keep a single page in memory and fetch the next page in the background while the current one is processed:
+
+    for balance in iterate_balances(indexer, asset_id=nft_id):
+        ...
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+from src.blockchain_utils.instrumentation import instrumentation
+
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+def iterate_pages(search: Callable[..., dict],
+                  page_size: int = DEFAULT_PAGE_SIZE,
+                  prefetch: bool = True,
+                  label: Optional[str] = None,
+                  **params) -> Iterator[dict]:
+    """
+    Yields the responses of a paginated indexer search, following the next-token of every page.
+    :param search: search method of the indexer client, e.g. indexer.search_assets.
+    :param page_size: results per page.
+    :param prefetch: requests the next page while the current one is being consumed.
+    :param label: instrumentation label of the page reads, defaults to the name of the search method.
+    :param params: filters of the search.
+    :return:
+    """
+    label = label or getattr(search, "__name__", None)
+
+    def fetch(next_page: Optional[str]) -> dict:
+        with instrumentation.span("indexer_read", label=label):
+            return search(limit=page_size, next_page=next_page, **params)
+
+    if not prefetch:
+        next_page = None
+        while True:
+            response = fetch(next_page)
+            yield response
+            next_page = response.get("next-token")
+            if not next_page:
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="indexer-prefetch")
+    try:
+        pending = executor.submit(fetch, None)
+        while pending is not None:
+            response = pending.result()
+            next_page = response.get("next-token")
+            pending = executor.submit(fetch, next_page) if next_page else None
+            yield response
+    finally:
+        # Closing the generator early drops the page still being fetched.
+        executor.shutdown(wait=False)
+
+
+def _iterate_items(key: str, search: Callable[..., dict], page_size: int, prefetch: bool, **params) -> Iterator[dict]:
+    for response in iterate_pages(search, page_size=page_size, prefetch=prefetch, **params):
+        items = response.get(key, [])
+        yield from items
+        if len(items) < page_size:
+            # A short page is the last one, even when the indexer still returned a next-token.
+            return
+
+
+def iterate_applications(indexer, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True,
+                         **params) -> Iterator[dict]:
+    """
+    :param indexer:
+    :param page_size:
+    :param prefetch:
+    :param params: filters of indexer.search_applications, e.g. application_id.
+    :return:
+        Applications matching the filters.
+    """
+    return _iterate_items("applications", indexer.search_applications, page_size, prefetch, **params)
+
+
+def iterate_assets(indexer, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True, **params) -> Iterator[dict]:
+    """
+    :param indexer:
+    :param page_size:
+    :param prefetch:
+    :param params: filters of indexer.search_assets, e.g. creator, name or unit.
+    :return:
+        Assets matching the filters.
+    """
+    return _iterate_items("assets", indexer.search_assets, page_size, prefetch, **params)
+
+
+def iterate_balances(indexer, asset_id: int, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True,
+                     **params) -> Iterator[dict]:
+    """
+    :param indexer:
+    :param asset_id:
+    :param page_size:
+    :param prefetch:
+    :param params: filters of indexer.asset_balances, e.g. min_balance.
+    :return:
+        Balances of the accounts which opted in the asset.
+    """
+    return _iterate_items("balances", indexer.asset_balances, page_size, prefetch, asset_id=asset_id, **params)
+
+
+def iterate_transactions(indexer, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True,
+                         **params) -> Iterator[dict]:
+    """
+    :param indexer:
+    :param page_size:
+    :param prefetch:
+    :param params: filters of indexer.search_transactions, e.g. txn_type, min_round and max_round.
+    :return:
+        Transactions matching the filters, in confirmation order.
+    """
+    return _iterate_items("transactions", indexer.search_transactions, page_size, prefetch, **params)
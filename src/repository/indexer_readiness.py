@@ -0,0 +1,63 @@
+import threading
+import time
+import weakref
+from typing import Optional
+
+
+class IndexerNotReadyError(Exception):
+    def __init__(self, min_round: int, indexer_round: int):
+        super().__init__(f"The indexer did not reach round {min_round} in time, it is at round {indexer_round}.")
+        self.min_round = min_round
+        self.indexer_round = indexer_round
+
+
+_indexed_rounds = weakref.WeakKeyDictionary()
+_indexed_rounds_lock = threading.Lock()
+
+
+def _known_indexed_round(indexer) -> int:
+    with _indexed_rounds_lock:
+        return _indexed_rounds.get(indexer, 0)
+
+
+def _record_indexed_round(indexer, indexer_round: int):
+    with _indexed_rounds_lock:
+        _indexed_rounds[indexer] = max(_indexed_rounds.get(indexer, 0), indexer_round)
+
+
+def wait_for_indexer_round(indexer,
+                           min_round: Optional[int],
+                           timeout: float = 30.0,
+                           poll_interval: float = 0.2,
+                           max_poll_interval: float = 2.0) -> Optional[int]:
+    """
+    Waits until the indexer has processed min_round, e.g. the confirmed round of a transaction we just sent.
+    Returns immediately when no round is required or when the indexer was already seen past it.
+    :param indexer: indexer client.
+    :param min_round: round which must be indexed before reading, None to read right away.
+    :param timeout: seconds to wait before raising IndexerNotReadyError.
+    :param poll_interval: first delay between two health checks, doubled after each check.
+    :param max_poll_interval: maximum delay between two health checks.
+    :return:
+        The last round known to be indexed.
+    """
+    if min_round is None:
+        return None
+
+    indexer_round = _known_indexed_round(indexer)
+    if indexer_round >= min_round:
+        return indexer_round
+
+    deadline = time.monotonic() + timeout
+    while True:
+        indexer_round = indexer.health().get('round', 0)
+        _record_indexed_round(indexer, indexer_round)
+        if indexer_round >= min_round:
+            return indexer_round
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IndexerNotReadyError(min_round, indexer_round)
+
+        time.sleep(min(poll_interval, remaining))
+        poll_interval = min(poll_interval * 2, max_poll_interval)
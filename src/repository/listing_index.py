@@ -0,0 +1,315 @@
+import sqlite3
+import threading
+from typing import Iterable, List, NamedTuple, Optional
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.repository.app_state_cache import TEAL_BYTES_TYPE, TEAL_UINT_TYPE, AppGlobalState, decode_state_key
+from src.repository.indexer_pagination import DEFAULT_PAGE_SIZE, iterate_transactions
+
+
+class ListingState:
+    """
+    Values of APP_STATE, as set by NFTMarketplaceASC1.AppState.
+    """
+    not_initialized = 0
+    active = 1
+    selling_open = 2
+    buying_in_progress = 3
+    buy_validated = 4
+
+
+class ListingRecord(NamedTuple):
+    app_id: int
+    asa_id: Optional[int]
+    price: Optional[int]
+    state: Optional[int]
+    owner: Optional[str]
+    buyer: Optional[str]
+    creator: Optional[str]
+    escrow_address: Optional[str]
+    round: Optional[int]
+
+
+# Global state key -> column of the listings table.
+_STATE_COLUMNS = {
+    "ASA_ID": "asa_id",
+    "ASA_PRICE": "price",
+    "APP_STATE": "state",
+    "ASA_OWNER": "owner",
+    "ASA_BUYER": "buyer",
+    "ASA_CREATOR": "creator",
+    "ESCROW_ADDRESS": "escrow_address",
+}
+
+# Action of a global-state-delta entry, as returned by the indexer.
+_DELTA_SET_BYTES = 1
+_DELTA_DELETE = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    app_id INTEGER PRIMARY KEY,
+    asa_id INTEGER,
+    price INTEGER,
+    state INTEGER,
+    owner TEXT,
+    buyer TEXT,
+    creator TEXT,
+    escrow_address TEXT,
+    round INTEGER
+);
+CREATE INDEX IF NOT EXISTS listings_state_price ON listings (state, price);
+CREATE INDEX IF NOT EXISTS listings_owner ON listings (owner);
+CREATE INDEX IF NOT EXISTS listings_creator ON listings (creator);
+CREATE INDEX IF NOT EXISTS listings_asa_id ON listings (asa_id);
+CREATE TABLE IF NOT EXISTS tracked_creators (
+    address TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+class ListingIndex:
+    """
+    Local SQLite mirror of the global state of the marketplace applications, queried by state, price range,
+    owner and creator without any indexer round trip.
+
+    The index is kept current by sync(): the application calls of every tracked application confirmed since the
+    last synced round are read from the indexer and their global-state-delta are applied. The application calls
+    sent by the tracked creators (e.g. the marketplace admin) are scanned as well, so that the applications they
+    create are tracked as soon as their creation is seen. The synced round starts at the round of the first
+    tracked application or creator, older transactions are never scanned.
+
+        listing_index = ListingIndex("listings.db")
+        listing_index.track_creator(admin_address)
+        listing_index.sync()
+        listing_index.for_sale(max_price=1000000)
+    """
+
+    def __init__(self, path: str = ":memory:", indexer=None, page_size: int = DEFAULT_PAGE_SIZE):
+        """
+        :param path: SQLite database file, the index is only kept in memory by default.
+        :param indexer: indexer client, defaults to get_indexer().
+        :param page_size: transactions per indexer page during a sync.
+        """
+        self.path = path
+        self.page_size = page_size
+        self._indexer = indexer
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    @property
+    def indexer(self):
+        if self._indexer is None:
+            from src.blockchain_utils.credentials import get_indexer
+            self._indexer = get_indexer()
+        return self._indexer
+
+    @property
+    def synced_round(self) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM sync_state WHERE name = 'round'").fetchone()
+            return row[0] if row else 0
+
+    def _set_synced_round(self, synced_round: int):
+        self._connection.execute("INSERT INTO sync_state (name, value) VALUES ('round', ?) "
+                                 "ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+                                 (synced_round,))
+
+    def _start_sync_at(self, start_round: Optional[int]):
+        """
+        Starts the sync cursor at the given round, unless it already started.
+        """
+        with self._lock:
+            if self.synced_round:
+                return
+            if start_round is None:
+                with instrumentation.span("indexer_read", label="listing_index"):
+                    start_round = self.indexer.health().get('round', 0)
+            self._set_synced_round(start_round)
+            self._connection.commit()
+
+    def is_tracked(self, app_id: int) -> bool:
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM listings WHERE app_id = ?", (app_id,)).fetchone() is not None
+
+    def track(self, app_id: int, state: Optional[AppGlobalState] = None):
+        """
+        Adds an application to the index, with its current global state.
+        :param app_id:
+        :param state: current state of the application, read from the indexer when not given.
+        """
+        if state is None:
+            from src.repository.app_state_cache import app_state_cache
+            state = app_state_cache.fetch_from_indexer(app_id)
+        self.apply_state(state)
+        self._start_sync_at(state.round)
+
+    def track_creator(self, address: str):
+        """
+        Tracks every application created by the address from now on, e.g. the marketplace admin.
+        """
+        with self._lock:
+            self._connection.execute("INSERT OR IGNORE INTO tracked_creators (address) VALUES (?)", (address,))
+            self._connection.commit()
+        self._start_sync_at(None)
+
+    def untrack(self, app_id: int):
+        with self._lock:
+            self._connection.execute("DELETE FROM listings WHERE app_id = ?", (app_id,))
+            self._connection.commit()
+
+    def apply_state(self, state: AppGlobalState):
+        """
+        Replaces the listing of the application by its full global state, unless the listing is more recent.
+        """
+        values = {column: state.get(key) for key, column in _STATE_COLUMNS.items()}
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO listings (app_id, asa_id, price, state, owner, buyer, creator, escrow_address, round) "
+                "VALUES (:app_id, :asa_id, :price, :state, :owner, :buyer, :creator, :escrow_address, :round) "
+                "ON CONFLICT(app_id) DO UPDATE SET asa_id = excluded.asa_id, price = excluded.price, "
+                "state = excluded.state, owner = excluded.owner, buyer = excluded.buyer, creator = excluded.creator, "
+                "escrow_address = excluded.escrow_address, round = excluded.round "
+                "WHERE listings.round IS NULL OR excluded.round IS NULL OR listings.round <= excluded.round",
+                dict(values, app_id=state.app_id, round=state.round),
+            )
+            self._connection.commit()
+
+    def _apply_delta(self, app_id: int, global_state_delta: List[dict], confirmed_round: int):
+        assignments = dict()
+        for entry in global_state_delta:
+            key = decode_state_key(entry['key'])
+            column = _STATE_COLUMNS.get(key)
+            if column is None:
+                continue
+
+            value = entry['value']
+            if value['action'] == _DELTA_DELETE:
+                assignments[column] = None
+            else:
+                value_type = TEAL_BYTES_TYPE if value['action'] == _DELTA_SET_BYTES else TEAL_UINT_TYPE
+                assignments[column] = AppGlobalState.decode_value(key, {'type': value_type,
+                                                                        'bytes': value.get('bytes', ''),
+                                                                        'uint': value.get('uint', 0)})
+
+        columns = "".join(f"{column} = :{column}, " for column in assignments)
+        self._connection.execute(f"UPDATE listings SET {columns}round = :round "
+                                 f"WHERE app_id = :app_id AND (round IS NULL OR round <= :round)",
+                                 dict(assignments, app_id=app_id, round=confirmed_round))
+
+    def _tracked_creators(self) -> List[str]:
+        return [row[0] for row in self._connection.execute("SELECT address FROM tracked_creators ORDER BY address")]
+
+    def _tracked_apps(self) -> List[int]:
+        return [row[0] for row in self._connection.execute("SELECT app_id FROM listings ORDER BY app_id")]
+
+    def _apply_creations(self, transactions: Iterable[dict]):
+        """
+        Tracks the applications created by the transactions, with the state set by their creation.
+        """
+        for transaction in transactions:
+            app_id = transaction.get('created-application-index')
+            if not app_id:
+                continue
+            self._connection.execute("INSERT OR IGNORE INTO listings (app_id, round) VALUES (?, NULL)", (app_id,))
+            # The creation is the first delta of the application, the later ones come from its own scan.
+            if transaction.get('global-state-delta'):
+                self._apply_delta(app_id, transaction['global-state-delta'], transaction.get('confirmed-round'))
+
+    def _apply_transactions(self, app_id: int, transactions: Iterable[dict]):
+        for transaction in transactions:
+            if transaction.get('global-state-delta'):
+                self._apply_delta(app_id, transaction['global-state-delta'], transaction.get('confirmed-round'))
+
+    def sync(self, max_round: Optional[int] = None) -> int:
+        """
+        Applies the application calls confirmed since the last synced round.
+        The scan is filtered on the server: one search of the calls sent by each tracked creator, then one search
+        of the calls of each tracked application.
+        :param max_round: last round to apply, defaults to the current round of the indexer.
+        :return:
+            The synced round.
+        """
+        with self._lock:
+            min_round = self.synced_round + 1
+            if max_round is None:
+                # Pins the scan, the transactions confirmed while it runs are left to the next sync.
+                with instrumentation.span("indexer_read", label="listing_index"):
+                    max_round = self.indexer.health().get('round', 0)
+
+            if max_round >= min_round:
+                for creator in self._tracked_creators():
+                    self._apply_creations(iterate_transactions(self.indexer,
+                                                               page_size=self.page_size,
+                                                               address=creator,
+                                                               address_role="sender",
+                                                               txn_type="appl",
+                                                               min_round=min_round,
+                                                               max_round=max_round))
+                for app_id in self._tracked_apps():
+                    self._apply_transactions(app_id, iterate_transactions(self.indexer,
+                                                                          page_size=self.page_size,
+                                                                          application_id=app_id,
+                                                                          txn_type="appl",
+                                                                          min_round=min_round,
+                                                                          max_round=max_round))
+                self._set_synced_round(max_round)
+            self._connection.commit()
+            return self.synced_round
+
+    def query(self,
+              state: Optional[int] = None,
+              min_price: Optional[int] = None,
+              max_price: Optional[int] = None,
+              owner: Optional[str] = None,
+              creator: Optional[str] = None,
+              asa_id: Optional[int] = None,
+              limit: Optional[int] = None,
+              offset: int = 0) -> List[ListingRecord]:
+        """
+        Listings matching all the given criteria, by increasing price.
+        """
+        conditions = []
+        parameters = dict()
+        for column, operator, value in (("state", "=", state),
+                                        ("price", ">=", min_price),
+                                        ("price", "<=", max_price),
+                                        ("owner", "=", owner),
+                                        ("creator", "=", creator),
+                                        ("asa_id", "=", asa_id)):
+            if value is not None:
+                name = f"p{len(parameters)}"
+                conditions.append(f"{column} {operator} :{name}")
+                parameters[name] = value
+
+        sql = "SELECT app_id, asa_id, price, state, owner, buyer, creator, escrow_address, round FROM listings"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY price, app_id"
+        if limit is not None:
+            sql += " LIMIT :limit OFFSET :offset"
+            parameters.update(limit=limit, offset=offset)
+
+        with self._lock:
+            return [ListingRecord(*row) for row in self._connection.execute(sql, parameters)]
+
+    def for_sale(self, min_price: Optional[int] = None, max_price: Optional[int] = None,
+                 limit: Optional[int] = None, offset: int = 0) -> List[ListingRecord]:
+        return self.query(state=ListingState.selling_open, min_price=min_price, max_price=max_price,
+                          limit=limit, offset=offset)
+
+    def listing(self, app_id: int) -> Optional[ListingRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT app_id, asa_id, price, state, owner, buyer, creator, escrow_address, round "
+                "FROM listings WHERE app_id = ?", (app_id,)).fetchone()
+        return ListingRecord(*row) if row else None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
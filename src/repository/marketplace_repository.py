@@ -1,24 +1,61 @@
-from src.blockchain_utils.credentials import get_indexer
-import base64
+from typing import Dict, NamedTuple, Optional
 from algosdk.encoding import encode_address
-import time
+from src.repository.app_state_cache import AppGlobalState, app_state_cache
 
 
-def decode_state_parameter(param_value):
-    return base64.b64decode(param_value).decode('utf-8')
+class NFTMarketplaceRepository:
+    @staticmethod
+    def load_app_state(app_id: int, min_round: Optional[int] = None, fresh: bool = False) -> AppGlobalState:
+        """
+        Reads the global state of the application through the app state cache.
+        :param app_id:
+        :param min_round: round the state must be at least as recent as, e.g. the last app call round.
+        :param fresh: reads the latest state from algod instead of the cache and the indexer.
+        :return:
+        """
+        return app_state_cache.get(app_id, min_round=min_round, fresh=fresh)
 
 
-class NFTMarketplaceRepository:
+class Listing(NamedTuple):
+    """
+    Listing of a NFTMultiMarketplaceASC1 application, decoded from its packed global state record.
+    """
+    nft_id: int
+    owner: str
+    creator: str
+    buyer: str
+    price: int
+    state: int
+
+    @classmethod
+    def from_record(cls, nft_id: int, record: bytes) -> "Listing":
+        return cls(nft_id=nft_id,
+                   owner=encode_address(record[0:32]),
+                   creator=encode_address(record[32:64]),
+                   buyer=encode_address(record[64:96]),
+                   price=int.from_bytes(record[96:104], 'big'),
+                   state=int.from_bytes(record[104:112], 'big'))
+
+
+class NFTMultiMarketplaceRepository:
+    @staticmethod
+    def load_listings(app_id: int, min_round: Optional[int] = None, fresh: bool = False,
+                      algod_client=None) -> Dict[int, Listing]:
+        """
+        :return:
+            Listings of the application, by NFT id.
+        """
+        app_state = app_state_cache.get(app_id, min_round=min_round, fresh=fresh, algod_client=algod_client)
+        return {
+            int.from_bytes(key, 'big'): Listing.from_record(int.from_bytes(key, 'big'), record)
+            for key, record in app_state.items() if isinstance(key, bytes) and len(key) == 8
+        }
+
     @staticmethod
-    def load_app_state(app_id: int):
-        time.sleep(5)
-        indexer = get_indexer()
-        response = indexer.search_applications(application_id=app_id)
-        state = dict()
-        for state_k in response['applications'][0]['params']['global-state']:
-            key = decode_state_parameter(state_k['key'])
-            if state_k['value']['type'] == 1:
-                state[key] = encode_address(base64.b64decode(state_k['value']['bytes']))
-            else:
-                state[key] = state_k['value']['uint']
-        return state
+    def load_listing(app_id: int, nft_id: int, min_round: Optional[int] = None,
+                     fresh: bool = False, algod_client=None) -> Optional[Listing]:
+        app_state = app_state_cache.get(app_id, min_round=min_round, fresh=fresh, algod_client=algod_client)
+        record = app_state.get(nft_id.to_bytes(8, 'big'))
+        if record is None:
+            return None
+        return Listing.from_record(nft_id, record)
@@ -1,17 +1,46 @@
+from typing import Iterator, Optional
+
 from src.blockchain_utils.credentials import get_indexer
-import time
+from src.blockchain_utils.instrumentation import instrumentation
+from src.repository.indexer_pagination import DEFAULT_PAGE_SIZE, iterate_assets, iterate_balances
+from src.repository.indexer_readiness import wait_for_indexer_round
 
 
 class NFTRepository:
     def __init__(self):
         self.indexer = get_indexer()
 
-    def nft_image(self, nft_id: int):
-        time.sleep(5)
-        response = self.indexer.search_assets(asset_id=nft_id)
+    def nft_image(self, nft_id: int, min_round: Optional[int] = None):
+        """
+        :param nft_id:
+        :param min_round: round the indexer must have reached before reading, e.g. the NFT creation round.
+        :return:
+        """
+        wait_for_indexer_round(self.indexer, min_round)
+        with instrumentation.span("indexer_read", label="nft_image"):
+            response = self.indexer.search_assets(asset_id=nft_id)
         return response["assets"][0]["params"]["url"]
 
-    def nft_owner(self, nft_id: int):
-        time.sleep(5)
-        response = self.indexer.asset_balances(asset_id=nft_id)
-        return response["balances"][0]["address"]
+    def nft_owner(self, nft_id: int, min_round: Optional[int] = None):
+        """
+        :param nft_id:
+        :param min_round: round the indexer must have reached before reading, e.g. the last transfer round.
+        :return:
+        """
+        wait_for_indexer_round(self.indexer, min_round)
+        # The accounts which only opted in the NFT are listed too, the owner is the one holding it.
+        for balance in iterate_balances(self.indexer, asset_id=nft_id, prefetch=False):
+            if balance["amount"] > 0:
+                return balance["address"]
+
+    def created_nfts(self, creator_address: str, min_round: Optional[int] = None,
+                     page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[dict]:
+        """
+        Lazily iterates over all the assets created by the address, page by page.
+        :param creator_address:
+        :param min_round: round the indexer must have reached before reading, e.g. the last creation round.
+        :param page_size:
+        :return:
+        """
+        wait_for_indexer_round(self.indexer, min_round)
+        return iterate_assets(self.indexer, page_size=page_size, creator=creator_address)
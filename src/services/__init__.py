@@ -1 +1,6 @@
-from src.services.network_interaction import NetworkInteraction
+def __getattr__(name):
+    # Imported on first use, so that importing a single service module does not load the others.
+    if name == "NetworkInteraction":
+        from src.services.network_interaction import NetworkInteraction
+        return NetworkInteraction
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
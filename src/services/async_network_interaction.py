@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import weakref
+from typing import Dict, List, Optional, Union
+
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.blockchain_utils.program_cache import CompiledProgramCache, default_program_cache, program_cache_key
+from src.blockchain_utils.signer import Signer
+from src.blockchain_utils.suggested_params import AsyncSuggestedParamsProvider
+from src.repository.app_state_cache import app_state_cache
+from src.services.confirmation_tracker import TransactionExpiredError, TransactionRejectedError
+from src.services.network_interaction import NetworkInteraction
+
+
+class _RoundWaiter:
+    """
+    Shares one status_after_block call per round between every coroutine waiting on the same client.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._waits: Dict[int, asyncio.Task] = dict()
+
+    async def wait_after(self, round_number: int) -> dict:
+        task = self._waits.get(round_number)
+        if task is None or task.done() and task.exception() is not None:
+            task = asyncio.ensure_future(self.client.status_after_block(round_number))
+            self._waits[round_number] = task
+            task.add_done_callback(lambda _: self._forget(round_number, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, round_number: int, task: asyncio.Task):
+        if self._waits.get(round_number) is task:
+            del self._waits[round_number]
+
+
+_round_waiters = weakref.WeakKeyDictionary()
+
+
+def _round_waiter(client) -> _RoundWaiter:
+    round_waiter = _round_waiters.get(client)
+    if round_waiter is None:
+        round_waiter = _RoundWaiter(client)
+        _round_waiters[client] = round_waiter
+    return round_waiter
+
+
+class AsyncNetworkInteraction:
+    """
+    Coroutine counterpart of NetworkInteraction, for the AsyncAlgodClient.
+    """
+
+    @staticmethod
+    async def wait_for_confirmation(client, txid, last_valid_round: Optional[int] = None):
+        """
+        Waits until the transaction is confirmed. Coroutines waiting on the same client share
+        their status_after_block calls.
+        Raises TransactionExpiredError once the network passed the last valid round of the transaction.
+        """
+        status = await client.status()
+        last_round = status.get('last-round')
+        if last_valid_round is None:
+            last_valid_round = last_round + 1000
+
+        while True:
+            txinfo = await client.pending_transaction_info(txid)
+            if txinfo.get('confirmed-round'):
+                app_state_cache.observe_round(txinfo['confirmed-round'])
+                return txinfo
+            if txinfo.get('pool-error'):
+                raise TransactionRejectedError(txid, txinfo['pool-error'])
+            if last_round > last_valid_round:
+                raise TransactionExpiredError(txid, last_valid_round)
+
+            status = await _round_waiter(client).wait_after(last_round)
+            last_round = max(status.get('last-round', last_round + 1), last_round + 1)
+
+    @staticmethod
+    async def get_default_suggested_params(client):
+        """
+        Gets default suggested params with flat transaction fee and fee amount of 1000.
+        :param client:
+        :return:
+        """
+        return await AsyncSuggestedParamsProvider.shared(client).get_async()
+
+    @staticmethod
+    async def submit_asa_creation(client, transaction: SignedTransaction) -> (Optional[int], str):
+        with instrumentation.span("submit"):
+            txid = await client.send_transaction(transaction)
+
+        with instrumentation.span("confirm"):
+            ptx = await AsyncNetworkInteraction.wait_for_confirmation(
+                client, txid, last_valid_round=transaction.transaction.last_valid_round
+            )
+        return ptx.get("asset-index"), txid
+
+    @staticmethod
+    async def submit_transaction(client, transaction: SignedTransaction) -> Optional[str]:
+        with instrumentation.span("submit"):
+            txid = await client.send_transaction(transaction)
+
+        with instrumentation.span("confirm"):
+            await AsyncNetworkInteraction.wait_for_confirmation(
+                client, txid, last_valid_round=transaction.transaction.last_valid_round
+            )
+
+        return txid
+
+    @staticmethod
+    async def submit_group(client, transactions: List[Transaction],
+                           private_keys: List[Union[str, Signer, algo_txn.LogicSig]]) -> List[str]:
+        """
+        Submits the transactions as one atomic group and waits for a single confirmation.
+        """
+        algo_txn.assign_group_id(transactions)
+        with instrumentation.span("sign"):
+            signed_group = [NetworkInteraction.sign_transaction(txn, private_key)
+                            for txn, private_key in zip(transactions, private_keys)]
+
+        with instrumentation.span("submit"):
+            await client.send_transactions(signed_group)
+        txids = [signed_txn.get_txid() for signed_txn in signed_group]
+
+        with instrumentation.span("confirm"):
+            await AsyncNetworkInteraction.wait_for_confirmation(
+                client, txids[0], last_valid_round=transactions[0].last_valid_round
+            )
+
+        return txids
+
+    @staticmethod
+    async def compile_program(client, source_code):
+        with instrumentation.span("compile"):
+            compile_response = await client.compile(source_code)
+        return base64.b64decode(compile_response['result'])
+
+    @staticmethod
+    async def compile_program_cached(client, source_code: str, teal_version: int,
+                                     cache: Optional[CompiledProgramCache] = None) -> bytes:
+        if cache is None:
+            cache = default_program_cache
+
+        key = program_cache_key(teal_source=source_code, teal_version=teal_version)
+
+        program = cache.get(key)
+        if program is None:
+            program = await AsyncNetworkInteraction.compile_program(client, source_code)
+            cache.put(key, program)
+        return program
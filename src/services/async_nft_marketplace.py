@@ -0,0 +1,147 @@
+from src.blockchain_utils.instrumentation import instrumentation
+from src.services.async_network_interaction import AsyncNetworkInteraction
+from src.services.nft_marketplace import NFTMarketplace, marketplace_teal_sources
+from src.smart_contracts import NFTMarketplaceASC1
+
+
+class AsyncNFTMarketplace:
+    """
+    Async counterpart of NFTMarketplace, driving an AsyncAlgodClient: same operations, awaited instead of blocking,
+    so one event loop can drive many sale flows concurrently. The transactions are built by a wrapped
+    NFTMarketplace. It is not an NFTMarketplace, so that the code expecting the blocking methods (e.g.
+    OnboardingPipeline or PresignedBuy) never gets un-awaited coroutines instead.
+    """
+
+    def __init__(self, admin_pk, admin_address, nft_id, client):
+        self._marketplace = NFTMarketplace(admin_pk=admin_pk, admin_address=admin_address, nft_id=nft_id,
+                                           client=client)
+
+    @property
+    def client(self):
+        return self._marketplace.client
+
+    @property
+    def admin_address(self) -> str:
+        return self._marketplace.admin_address
+
+    @property
+    def nft_id(self):
+        return self._marketplace.nft_id
+
+    @property
+    def teal_version(self) -> int:
+        return self._marketplace.teal_version
+
+    @property
+    def app_id(self):
+        return self._marketplace.app_id
+
+    @app_id.setter
+    def app_id(self, app_id):
+        self._marketplace.app_id = app_id
+
+    @property
+    def escrow_address(self) -> str:
+        return self._marketplace.escrow_address
+
+    def _state_changed(self):
+        self._marketplace._state_changed()
+
+    async def _suggested_params(self):
+        return await AsyncNetworkInteraction.get_default_suggested_params(self.client)
+
+    async def _submit(self, transaction):
+        tx_id = await AsyncNetworkInteraction.submit_transaction(self.client, transaction=transaction)
+        self._state_changed()
+        return tx_id
+
+    async def compiled_programs_async(self) -> (bytes, bytes):
+        approval_program_compiled, clear_program_compiled = marketplace_teal_sources(self.teal_version)
+
+        approval_program_bytes = await AsyncNetworkInteraction.compile_program_cached(
+            client=self.client, source_code=approval_program_compiled, teal_version=self.teal_version
+        )
+
+        clear_program_bytes = await AsyncNetworkInteraction.compile_program_cached(
+            client=self.client, source_code=clear_program_compiled, teal_version=self.teal_version
+        )
+
+        return approval_program_bytes, clear_program_bytes
+
+    @instrumentation.label("createApplication")
+    async def app_initialization(self, nft_owner_address):
+        app_transaction = self._marketplace.app_creation_txn(nft_owner_address=nft_owner_address,
+                                                             suggested_params=await self._suggested_params(),
+                                                             compiled_programs=await self.compiled_programs_async())
+
+        tx_id = await self.client.send_transaction(app_transaction)
+        transaction_response = await AsyncNetworkInteraction.wait_for_confirmation(
+            self.client, tx_id, last_valid_round=app_transaction.transaction.last_valid_round
+        )
+
+        self.app_id = transaction_response["application-index"]
+
+        return tx_id
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.initialize_escrow)
+    async def initialize_escrow(self):
+        return await self._submit(self._marketplace.initialize_escrow_txn(
+            suggested_params=await self._suggested_params()
+        ))
+
+    async def fund_escrow(self):
+        return await self._submit(self._marketplace.fund_escrow_txn(suggested_params=await self._suggested_params()))
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.initialize_escrow)
+    async def setup_escrow(self, nft_service):
+        """
+        :param nft_service: AsyncNFTService, or NFTService, of the NFT.
+        """
+        transactions, private_keys = self._marketplace.escrow_setup_group(
+            nft_service, suggested_params=await self._suggested_params()
+        )
+        tx_ids = await AsyncNetworkInteraction.submit_group(self.client,
+                                                            transactions=transactions,
+                                                            private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.open_sell)
+    async def open_sell(self, sell_price: int, caller_pk):
+        return await self._submit(self._marketplace.open_sell_txn(sell_price=sell_price,
+                                                                  caller_pk=caller_pk,
+                                                                  suggested_params=await self._suggested_params()))
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.buy)
+    async def buy_nft(self, nft_owner_address, buyer_address, buyer_pk, buy_price):
+        transactions = self._marketplace.buy_nft_txns(buyer_address=buyer_address,
+                                                      buyer_pk=buyer_pk,
+                                                      buy_price=buy_price,
+                                                      sign_transaction=False,
+                                                      suggested_params=await self._suggested_params())
+        tx_ids = await AsyncNetworkInteraction.submit_group(self.client,
+                                                            transactions=list(transactions),
+                                                            private_keys=[buyer_pk, buyer_pk])
+        self._state_changed()
+        return tx_ids[1]
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.validate_buy)
+    async def validate_buy(self, buyer_pk):
+        return await self._submit(self._marketplace.validate_buy_txn(buyer_pk=buyer_pk,
+                                                                      suggested_params=await self._suggested_params()))
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.cancel_buy)
+    async def cancel_buy(self, caller_pk):
+        """
+        Only accessible by the owner
+        """
+        return await self._submit(self._marketplace.cancel_buy_txn(caller_pk=caller_pk,
+                                                                    suggested_params=await self._suggested_params()))
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.close_sell)
+    async def close_sell(self, caller_pk):
+        """
+        Only accessible by the owner
+        """
+        return await self._submit(self._marketplace.close_sell_txn(caller_pk=caller_pk,
+                                                                   suggested_params=await self._suggested_params()))
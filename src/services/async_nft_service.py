@@ -0,0 +1,78 @@
+from src.services.async_network_interaction import AsyncNetworkInteraction
+from src.services.nft_service import NFTService
+
+
+class AsyncNFTService:
+    """
+    Async counterpart of NFTService, driving an AsyncAlgodClient: same operations, awaited instead of blocking.
+    The transactions are built by a wrapped NFTService. It is not an NFTService, so that the code expecting the
+    blocking methods never gets un-awaited coroutines instead.
+    """
+
+    def __init__(
+            self,
+            nft_creator_address: str,
+            nft_creator_pk: str,
+            client,
+            unit_name: str,
+            asset_name: str,
+            nft_url=None,
+    ):
+        self._nft_service = NFTService(nft_creator_address=nft_creator_address,
+                                       nft_creator_pk=nft_creator_pk,
+                                       client=client,
+                                       unit_name=unit_name,
+                                       asset_name=asset_name,
+                                       nft_url=nft_url)
+
+    @property
+    def client(self):
+        return self._nft_service.client
+
+    @property
+    def nft_creator_address(self) -> str:
+        return self._nft_service.nft_creator_address
+
+    @property
+    def nft_creator_pk(self):
+        return self._nft_service.nft_creator_pk
+
+    @property
+    def nft_id(self):
+        return self._nft_service.nft_id
+
+    @nft_id.setter
+    def nft_id(self, nft_id):
+        self._nft_service.nft_id = nft_id
+
+    def clawback_change_txn(self, escrow_address, sign_transaction: bool = True, suggested_params=None):
+        return self._nft_service.clawback_change_txn(escrow_address=escrow_address,
+                                                            sign_transaction=sign_transaction,
+                                                            suggested_params=suggested_params)
+
+    async def _suggested_params(self):
+        return await AsyncNetworkInteraction.get_default_suggested_params(self.client)
+
+    async def create_nft(self):
+        signed_txn = self._nft_service.nft_creation_txn(suggested_params=await self._suggested_params())
+
+        nft_id, tx_id = await AsyncNetworkInteraction.submit_asa_creation(
+            client=self.client, transaction=signed_txn
+        )
+        self.nft_id = nft_id
+        return tx_id
+
+    async def change_nft_credentials_txn(self, escrow_address):
+        txn = self.clawback_change_txn(escrow_address=escrow_address,
+                                              suggested_params=await self._suggested_params())
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(self.client, transaction=txn)
+
+        return tx_id
+
+    async def opt_in(self, account_pk):
+        opt_in_txn = self._nft_service.opt_in_txn(account_pk=account_pk,
+                                                  suggested_params=await self._suggested_params())
+
+        tx_id = await AsyncNetworkInteraction.submit_transaction(self.client, transaction=opt_in_txn)
+        return tx_id
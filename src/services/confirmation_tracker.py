@@ -0,0 +1,254 @@
+import concurrent.futures
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional
+
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionExpiredError(Exception):
+    def __init__(self, txid: str, last_valid_round: int):
+        super().__init__(f"Transaction {txid} was not confirmed before its last valid round {last_valid_round}.")
+        self.txid = txid
+        self.last_valid_round = last_valid_round
+
+
+class TransactionRejectedError(Exception):
+    def __init__(self, txid: str, pool_error: str):
+        super().__init__(f"Transaction {txid} was rejected: {pool_error}")
+        self.txid = txid
+        self.pool_error = pool_error
+
+
+class _PendingTransaction:
+    def __init__(self, txid: str, last_valid_round: Optional[int], future: Future):
+        self.txid = txid
+        self.last_valid_round = last_valid_round
+        self.future = future
+
+
+class ConfirmationTracker:
+    """
+    Waits for the confirmation of many transactions at once.
+    The tracker blocks once per round on status_after_block and then resolves every pending transaction
+    from a single pass over pending_transaction_info. Each tracked transaction gets a Future which resolves
+    to its pending transaction info, or fails once the network passed its last valid round.
+    """
+
+    _shared_trackers = weakref.WeakKeyDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient, max_wait_rounds: int = 1000, retry_delay: float = 1.0):
+        """
+        :param client: algorand client.
+        :param max_wait_rounds: timeout of the transactions tracked without a last valid round.
+        :param retry_delay: seconds the background thread waits after a failed network call.
+        """
+        self.client = client
+        self.max_wait_rounds = max_wait_rounds
+        self.retry_delay = retry_delay
+
+        self._pending: Dict[str, _PendingTransaction] = dict()
+        self._lock = threading.Lock()
+        self._last_round: Optional[int] = None
+
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_condition = threading.Condition(self._lock)
+        self._stopped = False
+        self.last_error: Optional[Exception] = None
+
+    @classmethod
+    def shared(cls, client: algod.AlgodClient) -> "ConfirmationTracker":
+        """
+        Returns the tracker shared by every caller using the given client. It polls in a background thread, so
+        the callers waiting at the same time cost one status_after_block per round between them. The failed
+        polls are retried, the last error is kept in last_error.
+        :param client:
+        :return:
+        """
+        with cls._shared_lock:
+            tracker = cls._shared_trackers.get(client)
+            if tracker is None:
+                tracker = cls(client=client)
+                tracker.start()
+                cls._shared_trackers[client] = tracker
+            return tracker
+
+    def _current_round(self) -> int:
+        # Must not be called with the lock held, the status call would block every other caller.
+        with self._lock:
+            last_round = self._last_round
+        if last_round is not None:
+            return last_round
+
+        last_round = self.client.status().get('last-round')
+        with self._lock:
+            if self._last_round is None or self._last_round < last_round:
+                self._last_round = last_round
+            return self._last_round
+
+    def track(self, txid: str, last_valid_round: Optional[int] = None,
+              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """
+        Starts tracking an already submitted transaction.
+        :param txid: id of the transaction.
+        :param last_valid_round: last round in which the transaction can be confirmed.
+        :param callback: called with the future once the transaction is confirmed or failed.
+        :return:
+            Future resolving to the pending transaction info.
+        """
+        if last_valid_round is None and self.future(txid) is None:
+            last_valid_round = self._current_round() + self.max_wait_rounds
+
+        with self._lock:
+            pending_transaction = self._pending.get(txid)
+            if pending_transaction is None:
+                pending_transaction = _PendingTransaction(txid, last_valid_round, Future())
+                self._pending[txid] = pending_transaction
+                self._poll_condition.notify_all()
+
+        if callback is not None:
+            pending_transaction.future.add_done_callback(callback)
+
+        return pending_transaction.future
+
+    def track_transaction(self, signed_transaction,
+                          callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """
+        Starts tracking an already submitted signed transaction, using its last valid round as timeout.
+        """
+        return self.track(txid=signed_transaction.get_txid(),
+                          last_valid_round=signed_transaction.transaction.last_valid_round,
+                          callback=callback)
+
+    def future(self, txid: str) -> Optional[Future]:
+        with self._lock:
+            pending_transaction = self._pending.get(txid)
+        return pending_transaction.future if pending_transaction is not None else None
+
+    def poll(self) -> int:
+        """
+        Resolves every pending transaction which is confirmed, rejected or expired as of the last seen round.
+        :return:
+            Number of transactions still pending.
+        """
+        with self._lock:
+            pending_transactions = list(self._pending.values())
+        current_round = self._current_round()
+
+        for pending_transaction in pending_transactions:
+            try:
+                txinfo = self.client.pending_transaction_info(pending_transaction.txid)
+            except AlgodHTTPError:
+                # The node may not know the transaction yet or anymore, the last valid round decides.
+                txinfo = dict()
+
+            if txinfo.get('confirmed-round'):
+                self._resolve(pending_transaction, result=txinfo)
+            elif txinfo.get('pool-error'):
+                self._resolve(pending_transaction,
+                              exception=TransactionRejectedError(pending_transaction.txid, txinfo['pool-error']))
+            elif current_round > pending_transaction.last_valid_round:
+                self._resolve(pending_transaction,
+                              exception=TransactionExpiredError(pending_transaction.txid,
+                                                                pending_transaction.last_valid_round))
+
+        with self._lock:
+            return len(self._pending)
+
+    def _resolve(self, pending_transaction: _PendingTransaction, result=None, exception=None):
+        with self._lock:
+            if self._pending.pop(pending_transaction.txid, None) is None:
+                # Already resolved by a concurrent poll.
+                return
+
+        if exception is not None:
+            pending_transaction.future.set_exception(exception)
+        else:
+            pending_transaction.future.set_result(result)
+
+    def wait_for_next_round(self):
+        current_round = self._current_round()
+        # status_after_block returns once a block after the given round exists.
+        status = self.client.status_after_block(current_round)
+
+        with self._lock:
+            self._last_round = max(status.get('last-round', current_round + 1), self._last_round or 0)
+
+    def settle(self, txids: Optional[Iterable[str]] = None) -> List[Future]:
+        """
+        Blocks until the given transactions, or every tracked transaction, are resolved.
+        :param txids: ids of transactions to wait for, they are tracked if they were not already.
+        :return:
+            Resolved future of every transaction, in the order of txids.
+        """
+        if txids is None:
+            with self._lock:
+                futures = [pending_transaction.future for pending_transaction in self._pending.values()]
+        else:
+            futures = [self.track(txid) for txid in txids]
+
+        if self._poll_thread is None:
+            self.poll()
+            while not all(future.done() for future in futures):
+                self.wait_for_next_round()
+                self.poll()
+        else:
+            concurrent.futures.wait(futures)
+
+        return futures
+
+    def wait(self, txids: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Blocks until the given transactions, or every tracked transaction, are confirmed.
+        :param txids: ids of transactions to wait for, they are tracked if they were not already.
+        :return:
+            Pending transaction info of every transaction, in the order of txids.
+        """
+        return [future.result() for future in self.settle(txids)]
+
+    def start(self):
+        """
+        Polls in a background thread so that callers only deal with futures and callbacks.
+        """
+        with self._lock:
+            if self._poll_thread is not None:
+                return
+            self._stopped = False
+            self._poll_thread = threading.Thread(target=self._poll_loop, name="confirmation-tracker", daemon=True)
+            self._poll_thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._poll_condition.notify_all()
+            poll_thread, self._poll_thread = self._poll_thread, None
+
+        if poll_thread is not None:
+            poll_thread.join()
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopped:
+                    # The round is read again once there is something to wait for.
+                    self._last_round = None
+                    self._poll_condition.wait()
+                if self._stopped:
+                    return
+
+            try:
+                if self.poll():
+                    self.wait_for_next_round()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logger.warning("Unsuccessful confirmation poll, retrying in %ss: %s", self.retry_delay, e)
+                time.sleep(self.retry_delay)
@@ -0,0 +1,259 @@
+"""
+Escrow logic signatures produced from one compiled template.
+
+The escrow programs of the listings only differ by a few integer constants. A template is compiled once with
+sentinel values in place of these constants; the program of a listing is then the template bytecode with the
+sentinels replaced by the varuint encoding of the actual values, and its address is derived locally:
+
+    template = EscrowTemplate(nft_multi_escrow, parameters=("app_id",))
+    escrow = template.logic_sig(client, app_id=app_id)
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from algosdk import logic as algo_logic
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.program_cache import CompiledProgramCache
+from src.services.network_interaction import NetworkInteraction
+
+
+# Sentinel of the i-th template parameter: large values which no contract uses as a constant.
+SENTINEL_BASE = 0x7E57_A1E5_0000_0000
+
+MAX_TEMPLATE_TEAL_VERSION = 4
+
+# Immediate arguments of the opcodes up to TEAL v4, the opcodes missing here have none.
+_U8, _U8_U8, _U8_U8_U8, _BRANCH, _VARUINT, _INTCBLOCK, _BYTECBLOCK, _PUSHBYTES = range(8)
+OPCODE_IMMEDIATES = {
+    0x20: _INTCBLOCK,   # intcblock
+    0x21: _U8,          # intc
+    0x26: _BYTECBLOCK,  # bytecblock
+    0x27: _U8,          # bytec
+    0x2c: _U8,          # arg
+    0x31: _U8,          # txn
+    0x32: _U8,          # global
+    0x33: _U8_U8,       # gtxn
+    0x34: _U8,          # load
+    0x35: _U8,          # store
+    0x36: _U8_U8,       # txna
+    0x37: _U8_U8_U8,    # gtxna
+    0x38: _U8,          # gtxns
+    0x39: _U8_U8,       # gtxnsa
+    0x3a: _U8_U8,       # gload
+    0x3b: _U8,          # gloads
+    0x3c: _U8,          # gaid
+    0x40: _BRANCH,      # bnz
+    0x41: _BRANCH,      # bz
+    0x42: _BRANCH,      # b
+    0x4b: _U8,          # dig
+    0x51: _U8_U8,       # substring
+    0x70: _U8,          # asset_holding_get
+    0x71: _U8,          # asset_params_get
+    0x80: _PUSHBYTES,   # pushbytes
+    0x81: _VARUINT,     # pushint
+    0x88: _BRANCH,      # callsub
+}
+
+
+class EscrowTemplateError(Exception):
+    pass
+
+
+def encode_varuint(value: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+def decode_varuint(program: bytes, position: int) -> Tuple[int, int]:
+    """
+    :return:
+        (int, int) the value and the position following it.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(program):
+            raise EscrowTemplateError("Truncated varuint.")
+        byte = program[position]
+        value |= (byte & 0x7f) << shift
+        position += 1
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def scan_program(program: bytes) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """
+    Walks the bytecode instruction by instruction.
+    :return:
+        The (start, end, value) of every integer constant (intcblock entries and pushint immediates), and the
+        (start, target) of every branch, the start being the position of the branch opcode.
+    """
+    _, position = decode_varuint(program, 0)
+    constants = []
+    branches = []
+
+    while position < len(program):
+        opcode = program[position]
+        start = position
+        position += 1
+        immediates = OPCODE_IMMEDIATES.get(opcode)
+
+        if immediates == _U8:
+            position += 1
+        elif immediates == _U8_U8:
+            position += 2
+        elif immediates == _U8_U8_U8:
+            position += 3
+        elif immediates == _BRANCH:
+            offset = int.from_bytes(program[position:position + 2], "big", signed=True)
+            position += 2
+            branches.append((start, position + offset))
+        elif immediates == _VARUINT:
+            value, end = decode_varuint(program, position)
+            constants.append((position, end, value))
+            position = end
+        elif immediates == _INTCBLOCK:
+            count, position = decode_varuint(program, position)
+            for _ in range(count):
+                value, end = decode_varuint(program, position)
+                constants.append((position, end, value))
+                position = end
+        elif immediates == _BYTECBLOCK:
+            count, position = decode_varuint(program, position)
+            for _ in range(count):
+                length, position = decode_varuint(program, position)
+                position += length
+        elif immediates == _PUSHBYTES:
+            length, position = decode_varuint(program, position)
+            position += length
+
+    if position != len(program):
+        raise EscrowTemplateError("The last instruction overruns the program.")
+    return constants, branches
+
+
+class EscrowTemplate:
+    """
+    Logic signature program parameterized by integer constants, compiled once per process.
+    When the sentinels cannot be located safely in the compiled template (e.g. a branch jumps over one of them,
+    so that patching a value of another length would move its target), every instance is compiled instead.
+    """
+
+    def __init__(self, program_builder: Callable, parameters: Sequence[str], teal_version: int = 4,
+                 cache: Optional[CompiledProgramCache] = None):
+        """
+        :param program_builder: function building the pyteal expression from the parameters, e.g. nft_multi_escrow.
+        :param parameters: names of the integer parameters of the program builder.
+        :param teal_version:
+        :param cache: compiled program cache, defaults to the process wide cache.
+        """
+        self.program_builder = program_builder
+        self.parameters = tuple(parameters)
+        self.teal_version = teal_version
+        self.cache = cache
+
+        self._lock = threading.Lock()
+        # Template bytecode split around the sentinels: fixed bytes and parameter names, in order.
+        self._segments: Optional[List[Union[bytes, str]]] = None
+        self._patchable: Optional[bool] = None
+
+    def sentinels(self) -> Dict[str, int]:
+        return {name: SENTINEL_BASE + index for index, name in enumerate(self.parameters)}
+
+    def teal_source(self, values: Dict[str, int]) -> str:
+        from pyteal import Mode, compileTeal
+        return compileTeal(self.program_builder(**values), mode=Mode.Signature, version=self.teal_version)
+
+    def _compile(self, client, values: Dict[str, int]) -> bytes:
+        return NetworkInteraction.compile_program_cached(client=client,
+                                                         source_code=self.teal_source(values),
+                                                         teal_version=self.teal_version,
+                                                         cache=self.cache)
+
+    def _split(self, program: bytes) -> Optional[List[Union[bytes, str]]]:
+        """
+        :return:
+            The segments of the template, None if it can not be patched safely.
+        """
+        if self.teal_version > MAX_TEMPLATE_TEAL_VERSION:
+            return None
+
+        parameter_by_sentinel = {sentinel: name for name, sentinel in self.sentinels().items()}
+        try:
+            constants, branches = scan_program(program)
+        except EscrowTemplateError:
+            return None
+
+        patches = [(start, end, parameter_by_sentinel[value])
+                   for start, end, value in constants if value in parameter_by_sentinel]
+        if {name for _, _, name in patches} != set(self.parameters):
+            return None
+
+        for branch_start, target in branches:
+            low, high = min(branch_start, target), max(branch_start, target)
+            if any(low <= start < high for start, _, _ in patches):
+                return None
+
+        segments: List[Union[bytes, str]] = []
+        position = 0
+        for start, end, name in patches:
+            segments.append(program[position:start])
+            segments.append(name)
+            position = end
+        segments.append(program[position:])
+        return segments
+
+    def _template_segments(self, client) -> Optional[List[Union[bytes, str]]]:
+        if self._patchable is None:
+            with self._lock:
+                if self._patchable is None:
+                    self._segments = self._split(self._compile(client, self.sentinels()))
+                    self._patchable = self._segments is not None
+        return self._segments
+
+    @property
+    def patchable(self) -> Optional[bool]:
+        """
+        Whether the instances are patched from the template, None until the template is compiled.
+        """
+        return self._patchable
+
+    def program(self, client, **values: int) -> bytes:
+        """
+        :param client: algorand client, only used the first time to compile the template.
+        :param values: value of every parameter.
+        :return:
+            Bytecode of the program instance.
+        """
+        if set(values) != set(self.parameters):
+            raise ValueError(f"Expected the parameters {self.parameters}, got {tuple(values)}.")
+
+        segments = self._template_segments(client)
+        if segments is None:
+            return self._compile(client, values)
+
+        return b"".join(segment if isinstance(segment, bytes) else encode_varuint(values[segment])
+                        for segment in segments)
+
+    def logic_sig(self, client, **values: int) -> algo_txn.LogicSig:
+        return algo_txn.LogicSig(self.program(client, **values))
+
+    def address(self, client, **values: int) -> str:
+        return algo_logic.address(self.program(client, **values))
+
+
+def _nft_multi_escrow(app_id: int):
+    from src.smart_contracts import nft_multi_escrow
+    return nft_multi_escrow(app_id=app_id)
+
+
+nft_multi_escrow_template = EscrowTemplate(_nft_multi_escrow, parameters=("app_id",))
@@ -1,56 +1,91 @@
 import base64
-from typing import Optional
+import threading
+import weakref
+from typing import List, Optional, Union
 
-from algosdk.future.transaction import SignedTransaction
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
 from algosdk.v2client import algod
 
+from src.blockchain_utils.instrumentation import instrumentation
+from src.blockchain_utils.program_cache import CompiledProgramCache, default_program_cache
+from src.blockchain_utils.signer import Signer, as_signer
+from src.blockchain_utils.suggested_params import SuggestedParamsProvider
+from src.blockchain_utils.transaction_repository import get_default_suggested_params
+from src.repository.app_state_cache import app_state_cache
+from src.services.confirmation_tracker import ConfirmationTracker
+
+
+_latest_confirmed_rounds = weakref.WeakKeyDictionary()
+_latest_confirmed_rounds_lock = threading.Lock()
+
 
 class NetworkInteraction:
 
     @staticmethod
-    def wait_for_confirmation(client: algod.AlgodClient, txid):
+    def latest_confirmed_round(client: algod.AlgodClient) -> Optional[int]:
+        """
+        Highest round in which a transaction awaited through this client was confirmed.
+        It can be given as min_round to the repositories to read our own writes from the indexer.
+        """
+        with _latest_confirmed_rounds_lock:
+            return _latest_confirmed_rounds.get(client)
+
+    @staticmethod
+    def _observe_confirmed_round(client: algod.AlgodClient, confirmed_round: int):
+        with _latest_confirmed_rounds_lock:
+            _latest_confirmed_rounds[client] = max(_latest_confirmed_rounds.get(client, 0), confirmed_round)
+        SuggestedParamsProvider.shared(client).observe_round(confirmed_round)
+        app_state_cache.observe_round(confirmed_round)
+
+    @staticmethod
+    def wait_for_confirmation(client: algod.AlgodClient, txid, last_valid_round: Optional[int] = None):
         """
         Utility function to wait until the transaction is
         confirmed before proceeding.
+        Raises TransactionExpiredError once the network passed the last valid round of the transaction.
         """
-        last_round = client.status().get('last-round')
-        txinfo = client.pending_transaction_info(txid)
-        while not (txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0):
-            print("Waiting for confirmation")
-            last_round += 1
-            client.status_after_block(last_round)
-            txinfo = client.pending_transaction_info(txid)
+        print("Waiting for confirmation")
+        tracker = ConfirmationTracker.shared(client)
+        tracker.track(txid, last_valid_round=last_valid_round)
+        with instrumentation.span("confirm"):
+            txinfo = tracker.wait([txid])[0]
         print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
+        NetworkInteraction._observe_confirmed_round(client, txinfo.get('confirmed-round'))
         return txinfo
 
     @staticmethod
     def get_default_suggested_params(client: algod.AlgodClient):
         """
         Gets default suggested params with flat transaction fee and fee amount of 1000.
+        The params come from the client's shared SuggestedParamsProvider.
         :param client:
         :return:
         """
-        suggested_params = client.suggested_params()
-
-        suggested_params.flat_fee = True
-        suggested_params.fee = 1000
-
-        return suggested_params
+        return get_default_suggested_params(client=client)
 
     @staticmethod
-    def submit_asa_creation(client: algod.AlgodClient, transaction: SignedTransaction) -> (Optional[int], str):
+    def submit_asa_creation(client: algod.AlgodClient,
+                            transaction: SignedTransaction,
+                            tracker: Optional[ConfirmationTracker] = None) -> (Optional[int], str):
         """
         Submits a ASA creation transaction to the network. If the transaction is successful the ASA's id is returned.
         :param client:
         :param transaction:
+        :param tracker: when given, the transaction is only registered in the tracker and the call does not block.
+        The ASA's id is then available as tracker.future(txid).result()["asset-index"].
         :return:
         """
-        txid = client.send_transaction(transaction)
+        with instrumentation.span("submit"):
+            txid = client.send_transaction(transaction)
 
-        NetworkInteraction.wait_for_confirmation(client, txid)
+        if tracker is not None:
+            tracker.track_transaction(transaction)
+            return None, txid
 
         try:
-            ptx = client.pending_transaction_info(txid)
+            ptx = NetworkInteraction.wait_for_confirmation(client, txid,
+                                                           last_valid_round=transaction.transaction.last_valid_round)
             return ptx["asset-index"], txid
         except Exception as e:
             # TODO: Proper logging needed.
@@ -58,13 +93,102 @@ class NetworkInteraction:
             print('Unsuccessful creation of Algorand Standard Asset.')
 
     @staticmethod
-    def submit_transaction(client: algod.AlgodClient, transaction: SignedTransaction) -> Optional[str]:
-        txid = client.send_transaction(transaction)
+    def submit_transaction(client: algod.AlgodClient,
+                           transaction: SignedTransaction,
+                           tracker: Optional[ConfirmationTracker] = None) -> Optional[str]:
+        """
+        Submits a transaction and waits for its confirmation.
+        :param client:
+        :param transaction:
+        :param tracker: when given, the transaction is only registered in the tracker and the call does not block.
+        :return:
+        """
+        with instrumentation.span("submit"):
+            txid = client.send_transaction(transaction)
 
-        NetworkInteraction.wait_for_confirmation(client, txid)
+        if tracker is not None:
+            tracker.track_transaction(transaction)
+            return txid
+
+        NetworkInteraction.wait_for_confirmation(client, txid,
+                                                 last_valid_round=transaction.transaction.last_valid_round)
 
         return txid
 
+    @staticmethod
+    def wait_for_confirmations(client: algod.AlgodClient, txids: List[str]) -> List[dict]:
+        """
+        Waits until all the given transactions are confirmed.
+        The shared tracker of the client polls all of them, blocking once per round.
+        :param client:
+        :param txids:
+        :return:
+            Pending transaction info of every transaction, in the order of txids.
+        """
+        with instrumentation.span("confirm"):
+            txinfos = ConfirmationTracker.shared(client).wait(txids)
+        if txinfos:
+            NetworkInteraction._observe_confirmed_round(client, max(txinfo['confirmed-round'] for txinfo in txinfos))
+        return txinfos
+
+    @staticmethod
+    def sign_transaction(transaction: Transaction, private_key: Union[str, Signer, algo_txn.LogicSig]):
+        """
+        Signs the transaction with a private key or a signer, or with a logic signature for the transactions
+        of an escrow.
+        """
+        if isinstance(private_key, algo_txn.LogicSig):
+            return algo_txn.LogicSigTransaction(transaction, private_key)
+        return as_signer(private_key).sign(transaction)
+
+    @staticmethod
+    def sign_group(transactions: List[Transaction],
+                   private_keys: List[Union[str, Signer, algo_txn.LogicSig]]) -> List[SignedTransaction]:
+        """
+        Assigns a group id to the transactions and signs them, ready for send_transactions.
+        """
+        algo_txn.assign_group_id(transactions)
+        with instrumentation.span("sign"):
+            return [NetworkInteraction.sign_transaction(txn, private_key)
+                    for txn, private_key in zip(transactions, private_keys)]
+
+    @staticmethod
+    def send_group(client: algod.AlgodClient, transactions: List[Transaction],
+                   private_keys: List[Union[str, Signer, algo_txn.LogicSig]]) -> List[str]:
+        """
+        Assigns a group id to the transactions, signs them and sends them as one atomic group.
+        :param client:
+        :param transactions: unsigned transactions of the group, in order.
+        :param private_keys: private key, signer or logic signature signing each transaction, in the same order.
+        :return:
+            Transaction ids of the group members.
+        """
+        signed_group = NetworkInteraction.sign_group(transactions, private_keys)
+
+        with instrumentation.span("submit"):
+            client.send_transactions(signed_group)
+
+        return [signed_txn.get_txid() for signed_txn in signed_group]
+
+    @staticmethod
+    def submit_group(client: algod.AlgodClient, transactions: List[Transaction],
+                     private_keys: List[Union[str, Signer, algo_txn.LogicSig]]) -> List[str]:
+        """
+        Submits the transactions as one atomic group and waits for a single confirmation.
+        :param client:
+        :param transactions: unsigned transactions of the group, in order.
+        :param private_keys: private key, signer or logic signature signing each transaction, in the same order.
+        :return:
+            Transaction ids of the group members.
+        """
+        txids = NetworkInteraction.send_group(client, transactions=transactions, private_keys=private_keys)
+
+        # All the members of a group are confirmed in the same round.
+        NetworkInteraction.wait_for_confirmation(client, txids[0],
+                                                 last_valid_round=transactions[0].last_valid_round)
+
+        return txids
+
     @staticmethod
     def compile_program(client: algod.AlgodClient, source_code):
         """
@@ -73,5 +197,29 @@ class NetworkInteraction:
         :return:
             Decoded byte program
         """
-        compile_response = client.compile(source_code)
+        with instrumentation.span("compile"):
+            compile_response = client.compile(source_code)
         return base64.b64decode(compile_response['result'])
+
+    @staticmethod
+    def compile_program_cached(client: algod.AlgodClient,
+                               source_code: str,
+                               teal_version: int,
+                               cache: Optional[CompiledProgramCache] = None) -> bytes:
+        """
+        Compiles the TEAL source code only if it is not already present in the compiled program cache.
+        :param client: algorand client
+        :param source_code: teal source code
+        :param teal_version: teal version of the source code
+        :param cache: compiled program cache, defaults to the process wide cache
+        :return:
+            Decoded byte program
+        """
+        if cache is None:
+            cache = default_program_cache
+
+        return cache.get_or_compile(
+            teal_source=source_code,
+            teal_version=teal_version,
+            compile_function=lambda teal_source: NetworkInteraction.compile_program(client, teal_source),
+        )
@@ -0,0 +1,174 @@
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
+from algosdk.v2client import algod
+
+from src.blockchain_utils.batch_signer import BatchSigner
+from src.blockchain_utils.signer import Signer, as_signer
+from src.blockchain_utils.suggested_params import SuggestedParamsProvider
+from src.blockchain_utils.transaction_repository import ASATransactionRepository
+from src.services.confirmation_tracker import ConfirmationTracker
+
+
+MAX_GROUP_SIZE = 16
+
+
+class NFTSpec(NamedTuple):
+    unit_name: str
+    asset_name: str
+    nft_url: Optional[str] = None
+
+
+class MintResult(NamedTuple):
+    spec: NFTSpec
+    nft_id: Optional[int] = None
+    tx_id: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+# Called with the (spec, txid, last valid round) of the transactions of a send, right before it.
+BeforeSend = Callable[[List[Tuple[NFTSpec, str, int]]], None]
+
+
+class NFTBatchMinter:
+    """
+    Mints many NFTs with the same properties as NFTService.create_nft.
+    The creation transactions share one suggested params fetch, are sent in atomic groups of up to 16
+    transactions and are confirmed together. A group rejected by the node is retried transaction by
+    transaction, so a single invalid item only fails itself.
+    Large batches can be signed across processes by passing a BatchSigner.
+    """
+
+    def __init__(self,
+                 nft_creator_address: str,
+                 nft_creator_pk: Union[str, Signer],
+                 client: algod.AlgodClient,
+                 group_size: int = MAX_GROUP_SIZE,
+                 params_provider: Optional[SuggestedParamsProvider] = None,
+                 signer: Optional[BatchSigner] = None):
+        if not 1 <= group_size <= MAX_GROUP_SIZE:
+            raise ValueError(f"group_size must be between 1 and {MAX_GROUP_SIZE}.")
+
+        self.nft_creator_address = nft_creator_address
+        self.nft_creator_pk = nft_creator_pk
+        self.client = client
+        self.group_size = group_size
+        self.params_provider = params_provider or SuggestedParamsProvider.shared(client)
+        self.signer = signer
+
+    def nft_creation_txn(self, spec: NFTSpec, suggested_params) -> Transaction:
+        return ASATransactionRepository.create_non_fungible_asa(
+            client=self.client,
+            creator_private_key=self.nft_creator_pk,
+            unit_name=spec.unit_name,
+            asset_name=spec.asset_name,
+            note=None,
+            manager_address=self.nft_creator_address,
+            reserve_address=self.nft_creator_address,
+            freeze_address=self.nft_creator_address,
+            clawback_address=self.nft_creator_address,
+            url=spec.nft_url,
+            default_frozen=True,
+            sign_transaction=False,
+            suggested_params=suggested_params,
+        )
+
+    def _sign(self, transactions: List[Transaction]) -> List[SignedTransaction]:
+        if self.signer is None:
+            return as_signer(self.nft_creator_pk).sign_transactions(transactions)
+        return self.signer.sign(transactions, [self.nft_creator_pk] * len(transactions))
+
+    def _send_group(self, specs: List[NFTSpec], transactions: List[Transaction],
+                    signed_transactions: List[SignedTransaction],
+                    before_send: Optional[BeforeSend]) -> List[Optional[Exception]]:
+        """
+        Sends the signed transactions as one atomic group, or one by one if the node rejects the group.
+        :return:
+            Submission error of every transaction, None for the transactions that were sent.
+        """
+        def announce(sent_specs: List[NFTSpec], sent_transactions: List[SignedTransaction]):
+            if before_send is not None:
+                before_send([(spec, signed_txn.get_txid(), signed_txn.transaction.last_valid_round)
+                             for spec, signed_txn in zip(sent_specs, sent_transactions)])
+
+        announce(specs, signed_transactions)
+        try:
+            self.client.send_transactions(signed_transactions)
+            return [None] * len(transactions)
+        except AlgodHTTPError:
+            # The node rejected the group, find out which members are invalid.
+            pass
+        except Exception as e:
+            # The group may or may not have reached the node, resending it could mint twice.
+            return [e] * len(transactions)
+
+        errors = []
+        for spec, txn in zip(specs, transactions):
+            txn.group = None
+            signed_txn = as_signer(self.nft_creator_pk).sign(txn)
+            announce([spec], [signed_txn])
+            try:
+                self.client.send_transaction(signed_txn)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def mint(self, specs: Iterable[NFTSpec],
+             before_send: Optional[BeforeSend] = None) -> List[MintResult]:
+        """
+        Mints one NFT per spec.
+        :param specs: unit name, asset name and url of each NFT.
+        :param before_send: called with the (spec, txid, last valid round) of the transactions of every send,
+        right before it, so that a crash never loses a sent transaction.
+        :return:
+            MintResult of every spec, in the order of specs. The transactions which could not be sent have no
+            tx_id.
+        """
+        specs = [NFTSpec(*spec) for spec in specs]
+        suggested_params = self.params_provider.get()
+        transactions = [self.nft_creation_txn(spec, suggested_params) for spec in specs]
+
+        groups = [transactions[start:start + self.group_size] for start in range(0, len(transactions), self.group_size)]
+        for group in groups:
+            algo_txn.assign_group_id(group)
+        signed_transactions = self._sign(transactions)
+
+        submission_errors = []
+        start = 0
+        for group in groups:
+            submission_errors.extend(self._send_group(specs[start:start + len(group)],
+                                                      group,
+                                                      signed_transactions[start:start + len(group)],
+                                                      before_send))
+            start += len(group)
+
+        # The group id is part of the transaction id, so ids are read after the submission.
+        txids = [txn.get_txid() for txn in transactions]
+
+        tracker = ConfirmationTracker(self.client)
+        futures = {
+            txid: tracker.track(txid, last_valid_round=txn.last_valid_round)
+            for txid, txn, error in zip(txids, transactions, submission_errors) if error is None
+        }
+        tracker.settle(futures.keys())
+
+        results = []
+        for spec, txid, error in zip(specs, txids, submission_errors):
+            if error is not None:
+                results.append(MintResult(spec=spec, error=error))
+                continue
+
+            try:
+                txinfo = futures[txid].result()
+                results.append(MintResult(spec=spec, nft_id=txinfo["asset-index"], tx_id=txid))
+            except Exception as e:
+                results.append(MintResult(spec=spec, tx_id=txid, error=e))
+
+        return results
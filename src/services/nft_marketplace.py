@@ -1,16 +1,45 @@
+from src.blockchain_utils.instrumentation import instrumentation
 from src.blockchain_utils.transaction_repository import (
     ApplicationTransactionRepository,
     ASATransactionRepository,
     PaymentTransactionRepository,
 )
 from src.services import NetworkInteraction
+from src.repository.app_state_cache import app_state_cache
 from algosdk import logic as algo_logic
 from algosdk.future import transaction as algo_txn
+from functools import lru_cache
 from pyteal import compileTeal, Mode
 from algosdk.encoding import decode_address
 from src.smart_contracts import NFTMarketplaceASC1, nft_escrow
 
 
+@lru_cache(maxsize=None)
+def marketplace_teal_sources(teal_version: int) -> (str, str):
+    """
+    Generates the TEAL source of the marketplace approval and clear programs.
+    The contract does not depend on the NFT, so the sources are generated once per process.
+    :param teal_version:
+    :return:
+        (str, str) approval and clear program sources
+    """
+    nft_marketplace_asc1 = NFTMarketplaceASC1()
+
+    approval_program_compiled = compileTeal(
+        nft_marketplace_asc1.approval_program(),
+        mode=Mode.Application,
+        version=teal_version,
+    )
+
+    clear_program_compiled = compileTeal(
+        nft_marketplace_asc1.clear_program(),
+        mode=Mode.Application,
+        version=teal_version
+    )
+
+    return approval_program_compiled, clear_program_compiled
+
+
 class NFTMarketplace:
     def __init__(
             self, admin_pk, admin_address, nft_id, client
@@ -31,33 +60,35 @@ class NFTMarketplace:
     def escrow_address(self):
        return algo_logic.get_application_address(self.app_id)
 
-    def app_initialization(self, nft_owner_address):
-        approval_program_compiled = compileTeal(
-            self.nft_marketplace_asc1.approval_program(),
-            mode=Mode.Application,
-            version=4,
-        )
+    def compiled_programs(self) -> (bytes, bytes):
+        """
+        :return:
+            (bytes, bytes) compiled approval and clear programs
+        """
+        approval_program_compiled, clear_program_compiled = marketplace_teal_sources(self.teal_version)
 
-        clear_program_compiled = compileTeal(
-            self.nft_marketplace_asc1.clear_program(),
-            mode=Mode.Application,
-            version=4
+        approval_program_bytes = NetworkInteraction.compile_program_cached(
+            client=self.client, source_code=approval_program_compiled, teal_version=self.teal_version
         )
 
-        approval_program_bytes = NetworkInteraction.compile_program(
-            client=self.client, source_code=approval_program_compiled
+        clear_program_bytes = NetworkInteraction.compile_program_cached(
+            client=self.client, source_code=clear_program_compiled, teal_version=self.teal_version
         )
 
-        clear_program_bytes = NetworkInteraction.compile_program(
-            client=self.client, source_code=clear_program_compiled
-        )
+        return approval_program_bytes, clear_program_bytes
+
+    def app_creation_txn(self, nft_owner_address, sign_transaction: bool = True, suggested_params=None,
+                         compiled_programs=None):
+        if compiled_programs is None:
+            compiled_programs = self.compiled_programs()
+        approval_program_bytes, clear_program_bytes = compiled_programs
 
         app_args = [
             decode_address(nft_owner_address),
             decode_address(self.admin_address),
         ]
 
-        app_transaction = ApplicationTransactionRepository.create_application(
+        return ApplicationTransactionRepository.create_application(
             client=self.client,
             creator_private_key=self.admin_pk,
             approval_program=approval_program_bytes,
@@ -66,8 +97,14 @@ class NFTMarketplace:
             local_schema=self.nft_marketplace_asc1.local_schema,
             app_args=app_args,
             foreign_assets=[self.nft_id],
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    @instrumentation.label("createApplication")
+    def app_initialization(self, nft_owner_address):
+        app_transaction = self.app_creation_txn(nft_owner_address=nft_owner_address)
+
         tx_id = NetworkInteraction.submit_transaction(
             self.client, transaction=app_transaction
         )
@@ -78,68 +115,131 @@ class NFTMarketplace:
 
         return tx_id
 
-    def initialize_escrow(self):
-        app_args = [
-            self.nft_marketplace_asc1.AppMethods.initialize_escrow,
-            decode_address(self.escrow_address),
-        ]
+    def _state_changed(self):
+        """
+        Invalidates the cached global state of the application after one of our calls was confirmed.
+        """
+        app_state_cache.invalidate(self.app_id, confirmed_round=NetworkInteraction.latest_confirmed_round(self.client))
 
-        initialize_escrow_txn = ApplicationTransactionRepository.call_application(
+    def app_call_txn(self, caller_pk, app_args, foreign_assets=None, sign_transaction: bool = True,
+                     suggested_params=None):
+        return ApplicationTransactionRepository.call_application(
             client=self.client,
-            caller_private_key=self.admin_pk,
+            caller_private_key=caller_pk,
             app_id=self.app_id,
             on_complete=algo_txn.OnComplete.NoOpOC,
             app_args=app_args,
-            foreign_assets=[self.nft_id],
+            foreign_assets=foreign_assets,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    def initialize_escrow_txn(self, sign_transaction: bool = True, suggested_params=None):
+        app_args = [
+            self.nft_marketplace_asc1.AppMethods.initialize_escrow,
+            decode_address(self.escrow_address),
+        ]
+
+        return self.app_call_txn(caller_pk=self.admin_pk,
+                                 app_args=app_args,
+                                 foreign_assets=[self.nft_id],
+                                 sign_transaction=sign_transaction,
+                                 suggested_params=suggested_params)
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.initialize_escrow)
+    def initialize_escrow(self):
+        initialize_escrow_txn = self.initialize_escrow_txn()
+
         tx_id = NetworkInteraction.submit_transaction(
             self.client, transaction=initialize_escrow_txn
         )
 
+        self._state_changed()
         return tx_id
 
-    def fund_escrow(self):
-        fund_escrow_txn = PaymentTransactionRepository.payment(
+    def fund_escrow_txn(self, sign_transaction: bool = True, suggested_params=None):
+        return PaymentTransactionRepository.payment(
             client=self.client,
             sender_address=self.admin_address,
             receiver_address=self.escrow_address,
             amount=1000000,
             sender_private_key=self.admin_pk,
-            sign_transaction=True,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    def fund_escrow(self):
+        fund_escrow_txn = self.fund_escrow_txn()
+
         tx_id = NetworkInteraction.submit_transaction(
             self.client, transaction=fund_escrow_txn
         )
 
         return tx_id
 
-    def open_sell(self, sell_price: int, caller_pk):
+    def escrow_setup_group(self, nft_service, suggested_params=None):
+        """
+        Unsigned atomic group which hands the NFT clawback to the escrow, initializes the escrow
+        and funds it. The three steps only depend on the app id, so they are confirmed together.
+        :param nft_service: service of the NFT managed by this marketplace application.
+        :param suggested_params:
+        :return:
+            (list, list) transactions of the group and the private keys signing them.
+        """
+        transactions = [
+            nft_service.clawback_change_txn(escrow_address=self.escrow_address,
+                                                   sign_transaction=False,
+                                                   suggested_params=suggested_params),
+            self.initialize_escrow_txn(sign_transaction=False, suggested_params=suggested_params),
+            self.fund_escrow_txn(sign_transaction=False, suggested_params=suggested_params),
+        ]
+        private_keys = [nft_service.nft_creator_pk, self.admin_pk, self.admin_pk]
+        return transactions, private_keys
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.initialize_escrow)
+    def setup_escrow(self, nft_service):
+        """
+        Replaces the change_nft_credentials_txn, initialize_escrow and fund_escrow sequence
+        with a single atomic group.
+        :param nft_service:
+        :return:
+            Transaction ids of the group members.
+        """
+        transactions, private_keys = self.escrow_setup_group(nft_service)
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def open_sell_txn(self, sell_price: int, caller_pk, sign_transaction: bool = True, suggested_params=None):
         app_args = [self.nft_marketplace_asc1.AppMethods.open_sell, sell_price]
 
-        app_call_txn = ApplicationTransactionRepository.call_application(
-            client=self.client,
-            caller_private_key=caller_pk,
-            app_id=self.app_id,
-            on_complete=algo_txn.OnComplete.NoOpOC,
-            app_args=app_args,
-            sign_transaction=True,
-        )
+        return self.app_call_txn(caller_pk=caller_pk,
+                                 app_args=app_args,
+                                 sign_transaction=sign_transaction,
+                                 suggested_params=suggested_params)
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.open_sell)
+    def open_sell(self, sell_price: int, caller_pk):
+        app_call_txn = self.open_sell_txn(sell_price=sell_price, caller_pk=caller_pk)
 
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
         return tx_id
 
-    def buy_nft(self, nft_owner_address, buyer_address, buyer_pk, buy_price):
+    def buy_nft_txns(self, buyer_address, buyer_pk, buy_price, sign_transaction: bool = True,
+                     suggested_params=None):
+        """
+        The two transactions must be sent as one atomic group, the contract checks the payment.
+        :return:
+            (Transaction, Transaction) the buy application call and the buyer -> escrow payment
+        """
         app_args = [
-            self.nft_marketplace_asc1.AppMethods.buy, buyer_address
+            self.nft_marketplace_asc1.AppMethods.buy, decode_address(buyer_address)
         ]
-        app_call_txn = ApplicationTransactionRepository.call_application(client=self.client,
-                                                                         caller_private_key=buyer_pk,
-                                                                         app_id=self.app_id,
-                                                                         on_complete=algo_txn.OnComplete.NoOpOC,
-                                                                         app_args=app_args,
-                                                                         sign_transaction=True)
+        app_call_txn = self.app_call_txn(caller_pk=buyer_pk,
+                                         app_args=app_args,
+                                         sign_transaction=sign_transaction,
+                                         suggested_params=suggested_params)
 
         # Payment transaction: buyer -> escrow
         asa_buy_payment_txn = PaymentTransactionRepository.payment(client=self.client,
@@ -147,58 +247,80 @@ class NFTMarketplace:
                                                                    receiver_address=self.escrow_address,
                                                                    amount=buy_price,
                                                                    sender_private_key=buyer_pk,
-                                                                   sign_transaction=True)
-        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
-        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=asa_buy_payment_txn)
-        return tx_id
+                                                                   sign_transaction=sign_transaction,
+                                                                   suggested_params=suggested_params)
+        return app_call_txn, asa_buy_payment_txn
 
-    def validate_buy(self, buyer_pk):
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.buy)
+    def buy_nft(self, nft_owner_address, buyer_address, buyer_pk, buy_price):
+        """
+        Sends the buy call and the payment as one atomic group: both succeed or fail together,
+        in a single round.
+        :return:
+            Transaction id of the payment.
+        """
+        transactions = self.buy_nft_txns(buyer_address=buyer_address,
+                                         buyer_pk=buyer_pk,
+                                         buy_price=buy_price,
+                                         sign_transaction=False)
+        tx_ids = NetworkInteraction.submit_group(self.client,
+                                                 transactions=list(transactions),
+                                                 private_keys=[buyer_pk, buyer_pk])
+        self._state_changed()
+        return tx_ids[1]
+
+    def validate_buy_txn(self, buyer_pk, sign_transaction: bool = True, suggested_params=None):
         app_args = [
             self.nft_marketplace_asc1.AppMethods.validate_buy
         ]
 
-        app_call_txn = ApplicationTransactionRepository.call_application(client=self.client,
-                                                                         caller_private_key=buyer_pk,
-                                                                         app_id=self.app_id,
-                                                                         on_complete=algo_txn.OnComplete.NoOpOC,
-                                                                         app_args=app_args,
-                                                                         sign_transaction=True)
+        return self.app_call_txn(caller_pk=buyer_pk,
+                                 app_args=app_args,
+                                 sign_transaction=sign_transaction,
+                                 suggested_params=suggested_params)
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.validate_buy)
+    def validate_buy(self, buyer_pk):
+        app_call_txn = self.validate_buy_txn(buyer_pk=buyer_pk)
 
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
         return tx_id
 
+    def cancel_buy_txn(self, caller_pk, sign_transaction: bool = True, suggested_params=None):
+        app_args = [self.nft_marketplace_asc1.AppMethods.cancel_buy]
+
+        return self.app_call_txn(caller_pk=caller_pk,
+                                 app_args=app_args,
+                                 sign_transaction=sign_transaction,
+                                 suggested_params=suggested_params)
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.cancel_buy)
     def cancel_buy(self, caller_pk):
         """
         Only accessible by the owner
         """
-        app_args = [self.nft_marketplace_asc1.AppMethods.cancel_buy]
-
-        app_call_txn = ApplicationTransactionRepository.call_application(
-            client=self.client,
-            caller_private_key=caller_pk,
-            app_id=self.app_id,
-            on_complete=algo_txn.OnComplete.NoOpOC,
-            app_args=app_args,
-            sign_transaction=True,
-        )
+        app_call_txn = self.cancel_buy_txn(caller_pk=caller_pk)
 
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
         return tx_id
 
+    def close_sell_txn(self, caller_pk, sign_transaction: bool = True, suggested_params=None):
+        app_args = [self.nft_marketplace_asc1.AppMethods.close_sell]
+
+        return self.app_call_txn(caller_pk=caller_pk,
+                                 app_args=app_args,
+                                 sign_transaction=sign_transaction,
+                                 suggested_params=suggested_params)
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.close_sell)
     def close_sell(self, caller_pk):
         """
         Only accessible by the owner
         """
-        app_args = [self.nft_marketplace_asc1.AppMethods.close]
-
-        app_call_txn = ApplicationTransactionRepository.call_application(
-            client=self.client,
-            caller_private_key=caller_pk,
-            app_id=self.app_id,
-            on_complete=algo_txn.OnComplete.NoOpOC,
-            app_args=app_args,
-            sign_transaction=True,
-        )
+        app_call_txn = self.close_sell_txn(caller_pk=caller_pk)
 
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
         return tx_id
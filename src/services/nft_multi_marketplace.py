@@ -0,0 +1,373 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from algosdk.encoding import decode_address
+from algosdk.future import transaction as algo_txn
+from pyteal import compileTeal, Mode
+
+from src.blockchain_utils.transaction_repository import (
+    ApplicationTransactionRepository,
+    ASATransactionRepository,
+    PaymentTransactionRepository,
+)
+from src.repository.app_state_cache import app_state_cache
+from src.repository.marketplace_repository import Listing, NFTMultiMarketplaceRepository
+from src.services import NetworkInteraction
+from src.services.escrow_template import nft_multi_escrow_template
+from src.smart_contracts import NFTMultiMarketplaceASC1
+
+
+@lru_cache(maxsize=None)
+def multi_marketplace_teal_sources(teal_version: int) -> (str, str):
+    """
+    Generates the TEAL source of the multi listing marketplace approval and clear programs.
+    :param teal_version:
+    :return:
+        (str, str) approval and clear program sources
+    """
+    nft_multi_marketplace_asc1 = NFTMultiMarketplaceASC1()
+
+    approval_program_compiled = compileTeal(
+        nft_multi_marketplace_asc1.approval_program(),
+        mode=Mode.Application,
+        version=teal_version,
+    )
+
+    clear_program_compiled = compileTeal(
+        nft_multi_marketplace_asc1.clear_program(),
+        mode=Mode.Application,
+        version=teal_version
+    )
+
+    return approval_program_compiled, clear_program_compiled
+
+
+class NFTMultiMarketplace:
+    """
+    NFTMarketplace variant in which one application manages the listings of many NFTs.
+    The application and its escrow are deployed and funded once, listing a NFT is then a single app call,
+    grouped with the change of the NFT clawback.
+    """
+
+    def __init__(self, admin_pk, admin_address, client, app_id: Optional[int] = None):
+        self.admin_pk = admin_pk
+        self.admin_address = admin_address
+
+        self.client = client
+
+        self.teal_version = 4
+        self.nft_multi_marketplace_asc1 = NFTMultiMarketplaceASC1()
+
+        self.app_id = app_id
+        self._escrow = None
+
+    @property
+    def escrow(self) -> algo_txn.LogicSig:
+        if self._escrow is None:
+            # Patched from the template compiled once per process, no compilation per application.
+            self._escrow = nft_multi_escrow_template.logic_sig(self.client, app_id=self.app_id)
+        return self._escrow
+
+    @property
+    def escrow_address(self) -> str:
+        return self.escrow.address()
+
+    def compiled_programs(self) -> (bytes, bytes):
+        approval_program_compiled, clear_program_compiled = multi_marketplace_teal_sources(self.teal_version)
+
+        approval_program_bytes = NetworkInteraction.compile_program_cached(
+            client=self.client, source_code=approval_program_compiled, teal_version=self.teal_version
+        )
+
+        clear_program_bytes = NetworkInteraction.compile_program_cached(
+            client=self.client, source_code=clear_program_compiled, teal_version=self.teal_version
+        )
+
+        return approval_program_bytes, clear_program_bytes
+
+    def _state_changed(self):
+        app_state_cache.invalidate(self.app_id, confirmed_round=NetworkInteraction.latest_confirmed_round(self.client))
+
+    @staticmethod
+    def _pool_escrow_fees(transactions: List[algo_txn.Transaction]):
+        """
+        Moves the fees of the escrow transactions of a settlement group to the application call: the escrow
+        signs only transactions without fee, it never pays out of the buyers' deposits.
+        """
+        for txn in transactions[1:]:
+            transactions[0].fee += txn.fee
+            txn.fee = 0
+
+    def listing(self, nft_id: int) -> Listing:
+        """
+        Latest state of the listing of the NFT, read from algod.
+        """
+        listing = NFTMultiMarketplaceRepository.load_listing(self.app_id, nft_id, fresh=True,
+                                                            algod_client=self.client)
+        if listing is None:
+            raise ValueError(f"The NFT {nft_id} is not listed in the application {self.app_id}.")
+        return listing
+
+    def app_creation_txn(self, sign_transaction: bool = True, suggested_params=None):
+        approval_program_bytes, clear_program_bytes = self.compiled_programs()
+
+        return ApplicationTransactionRepository.create_application(
+            client=self.client,
+            creator_private_key=self.admin_pk,
+            approval_program=approval_program_bytes,
+            clear_program=clear_program_bytes,
+            global_schema=self.nft_multi_marketplace_asc1.global_schema,
+            local_schema=self.nft_multi_marketplace_asc1.local_schema,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
+        )
+
+    def app_call_txn(self, caller_pk, app_args, nft_id: int, sign_transaction: bool = True, suggested_params=None):
+        return ApplicationTransactionRepository.call_application(
+            client=self.client,
+            caller_private_key=caller_pk,
+            app_id=self.app_id,
+            on_complete=algo_txn.OnComplete.NoOpOC,
+            app_args=app_args,
+            foreign_assets=[nft_id] if nft_id is not None else None,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
+        )
+
+    def app_initialization(self):
+        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=self.app_creation_txn())
+
+        transaction_response = self.client.pending_transaction_info(tx_id)
+
+        self.app_id = transaction_response["application-index"]
+        self._escrow = None
+
+        return tx_id
+
+    def escrow_setup_group(self, suggested_params=None):
+        """
+        Unsigned atomic group which records the escrow in the application and funds it, once per application.
+        """
+        app_args = [
+            self.nft_multi_marketplace_asc1.AppMethods.initialize_escrow,
+            decode_address(self.escrow_address),
+        ]
+        transactions = [
+            self.app_call_txn(caller_pk=self.admin_pk,
+                              app_args=app_args,
+                              nft_id=None,
+                              sign_transaction=False,
+                              suggested_params=suggested_params),
+            PaymentTransactionRepository.payment(client=self.client,
+                                                 sender_address=self.admin_address,
+                                                 receiver_address=self.escrow_address,
+                                                 amount=1000000,
+                                                 sender_private_key=self.admin_pk,
+                                                 sign_transaction=False,
+                                                 suggested_params=suggested_params),
+        ]
+        return transactions, [self.admin_pk, self.admin_pk]
+
+    def setup_escrow(self):
+        transactions, private_keys = self.escrow_setup_group()
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def add_listing_group(self, nft_service, suggested_params=None):
+        """
+        Unsigned atomic group which hands the NFT clawback to the escrow and lists the NFT.
+        :param nft_service: service of the NFT to list, its creator is the first owner.
+        :param suggested_params:
+        :return:
+            (list, list) transactions of the group and the private keys signing them.
+        """
+        app_args = [
+            self.nft_multi_marketplace_asc1.AppMethods.add_listing,
+            decode_address(nft_service.nft_creator_address),
+        ]
+        transactions = [
+            nft_service.clawback_change_txn(escrow_address=self.escrow_address,
+                                                   sign_transaction=False,
+                                                   suggested_params=suggested_params),
+            self.app_call_txn(caller_pk=self.admin_pk,
+                              app_args=app_args,
+                              nft_id=nft_service.nft_id,
+                              sign_transaction=False,
+                              suggested_params=suggested_params),
+        ]
+        return transactions, [nft_service.nft_creator_pk, self.admin_pk]
+
+    def _check_capacity(self, new_listings: int):
+        """
+        Raises before building the listings which would not fit in the global state of the application.
+        """
+        max_listings = self.nft_multi_marketplace_asc1.max_listings
+        listings = NFTMultiMarketplaceRepository.load_listings(self.app_id, fresh=True, algod_client=self.client)
+        if len(listings) + new_listings > max_listings:
+            raise ValueError(f"The application {self.app_id} holds {len(listings)} of its {max_listings} listings, "
+                             f"{new_listings} more do not fit. Remove listings or deploy another application.")
+
+    def add_listing(self, nft_service):
+        self._check_capacity(new_listings=1)
+        transactions, private_keys = self.add_listing_group(nft_service)
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def add_listings(self, nft_services: List) -> List[str]:
+        """
+        Lists many NFTs, all the groups are sent before waiting for their confirmations.
+        Nothing is sent if the application cannot hold all of them.
+        :return:
+            Transaction id of the first member of every group.
+        """
+        self._check_capacity(new_listings=len(nft_services))
+        suggested_params = NetworkInteraction.get_default_suggested_params(self.client)
+
+        group_txids = []
+        for nft_service in nft_services:
+            transactions, private_keys = self.add_listing_group(nft_service, suggested_params=suggested_params)
+            group_txids.append(
+                NetworkInteraction.send_group(self.client, transactions=transactions, private_keys=private_keys)[0]
+            )
+
+        NetworkInteraction.wait_for_confirmations(self.client, group_txids)
+        self._state_changed()
+        return group_txids
+
+    def remove_listing(self, nft_id: int):
+        app_call_txn = self.app_call_txn(caller_pk=self.admin_pk,
+                                         app_args=[self.nft_multi_marketplace_asc1.AppMethods.remove_listing],
+                                         nft_id=nft_id)
+
+        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
+        return tx_id
+
+    def open_sell(self, nft_id: int, sell_price: int, caller_pk):
+        app_call_txn = self.app_call_txn(caller_pk=caller_pk,
+                                         app_args=[self.nft_multi_marketplace_asc1.AppMethods.open_sell, sell_price],
+                                         nft_id=nft_id)
+
+        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
+        return tx_id
+
+    def buy_nft_group(self, nft_id: int, buyer_address, buyer_pk, buy_price, suggested_params=None):
+        """
+        Unsigned atomic group of the buy call and the payment of the price to the escrow.
+        """
+        transactions = [
+            self.app_call_txn(caller_pk=buyer_pk,
+                              app_args=[self.nft_multi_marketplace_asc1.AppMethods.buy],
+                              nft_id=nft_id,
+                              sign_transaction=False,
+                              suggested_params=suggested_params),
+            PaymentTransactionRepository.payment(client=self.client,
+                                                 sender_address=buyer_address,
+                                                 receiver_address=self.escrow_address,
+                                                 amount=buy_price,
+                                                 sender_private_key=buyer_pk,
+                                                 sign_transaction=False,
+                                                 suggested_params=suggested_params),
+        ]
+        return transactions, [buyer_pk, buyer_pk]
+
+    def buy_nft(self, nft_id: int, buyer_address, buyer_pk, buy_price):
+        transactions, private_keys = self.buy_nft_group(nft_id=nft_id,
+                                                        buyer_address=buyer_address,
+                                                        buyer_pk=buyer_pk,
+                                                        buy_price=buy_price)
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def validate_buy_group(self, listing: Listing, buyer_pk, suggested_params=None):
+        """
+        Unsigned atomic group of the validate call and of the escrow settlement: the payments to the owner
+        and to the creator, then the transfer of the NFT to the buyer. The buyer pays the fees of the group.
+        """
+        royalties = listing.price * self.nft_multi_marketplace_asc1.creator_royalties // 100
+
+        transactions = [
+            self.app_call_txn(caller_pk=buyer_pk,
+                              app_args=[self.nft_multi_marketplace_asc1.AppMethods.validate_buy],
+                              nft_id=listing.nft_id,
+                              sign_transaction=False,
+                              suggested_params=suggested_params),
+            PaymentTransactionRepository.payment(client=self.client,
+                                                 sender_address=self.escrow_address,
+                                                 receiver_address=listing.owner,
+                                                 amount=listing.price - royalties,
+                                                 sender_private_key=None,
+                                                 sign_transaction=False,
+                                                 suggested_params=suggested_params),
+            PaymentTransactionRepository.payment(client=self.client,
+                                                 sender_address=self.escrow_address,
+                                                 receiver_address=listing.creator,
+                                                 amount=royalties,
+                                                 sender_private_key=None,
+                                                 sign_transaction=False,
+                                                 suggested_params=suggested_params),
+            ASATransactionRepository.asa_transfer(client=self.client,
+                                                  sender_address=self.escrow_address,
+                                                  receiver_address=listing.buyer,
+                                                  asa_id=listing.nft_id,
+                                                  amount=1,
+                                                  revocation_target=listing.owner,
+                                                  sender_private_key=None,
+                                                  sign_transaction=False,
+                                                  suggested_params=suggested_params),
+        ]
+        self._pool_escrow_fees(transactions)
+        return transactions, [buyer_pk, self.escrow, self.escrow, self.escrow]
+
+    def validate_buy(self, nft_id: int, buyer_pk):
+        transactions, private_keys = self.validate_buy_group(self.listing(nft_id), buyer_pk=buyer_pk)
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def cancel_buy_group(self, listing: Listing, caller_pk, suggested_params=None):
+        """
+        Unsigned atomic group of the cancel call and of the refund of the buyer by the escrow. The caller pays
+        the fees of the group.
+        """
+        transactions = [
+            self.app_call_txn(caller_pk=caller_pk,
+                              app_args=[self.nft_multi_marketplace_asc1.AppMethods.cancel_buy],
+                              nft_id=listing.nft_id,
+                              sign_transaction=False,
+                              suggested_params=suggested_params),
+            PaymentTransactionRepository.payment(client=self.client,
+                                                 sender_address=self.escrow_address,
+                                                 receiver_address=listing.buyer,
+                                                 amount=listing.price,
+                                                 sender_private_key=None,
+                                                 sign_transaction=False,
+                                                 suggested_params=suggested_params),
+        ]
+        self._pool_escrow_fees(transactions)
+        return transactions, [caller_pk, self.escrow]
+
+    def cancel_buy(self, nft_id: int, caller_pk):
+        """
+        Only accessible by the owner
+        """
+        transactions, private_keys = self.cancel_buy_group(self.listing(nft_id), caller_pk=caller_pk)
+        tx_ids = NetworkInteraction.submit_group(self.client, transactions=transactions, private_keys=private_keys)
+        self._state_changed()
+        return tx_ids
+
+    def close_sell(self, nft_id: int, caller_pk):
+        """
+        Only accessible by the owner
+        """
+        app_call_txn = self.app_call_txn(caller_pk=caller_pk,
+                                         app_args=[self.nft_multi_marketplace_asc1.AppMethods.close_sell],
+                                         nft_id=nft_id)
+
+        tx_id = NetworkInteraction.submit_transaction(self.client, transaction=app_call_txn)
+        self._state_changed()
+        return tx_id
@@ -22,8 +22,8 @@ class NFTService:
 
         self.nft_id = None
 
-    def create_nft(self):
-        signed_txn = ASATransactionRepository.create_non_fungible_asa(
+    def nft_creation_txn(self, sign_transaction: bool = True, suggested_params=None):
+        return ASATransactionRepository.create_non_fungible_asa(
             client=self.client,
             creator_private_key=self.nft_creator_pk,
             unit_name=self.unit_name,
@@ -35,17 +35,25 @@ class NFTService:
             clawback_address=self.nft_creator_address,
             url=self.nft_url,
             default_frozen=True,
-            sign_transaction=True,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    def create_nft(self):
+        signed_txn = self.nft_creation_txn()
+
         nft_id, tx_id = NetworkInteraction.submit_asa_creation(
             client=self.client, transaction=signed_txn
         )
         self.nft_id = nft_id
         return tx_id
 
-    def change_nft_credentials_txn(self, escrow_address):
-        txn = ASATransactionRepository.change_asa_management(
+    def clawback_change_txn(self, escrow_address, sign_transaction: bool = True, suggested_params=None):
+        """
+        Builds the transaction which removes the management addresses of the NFT and
+        makes the escrow its clawback address.
+        """
+        return ASATransactionRepository.change_asa_management(
             client=self.client,
             current_manager_pk=self.nft_creator_pk,
             asa_id=self.nft_id,
@@ -54,17 +62,28 @@ class NFTService:
             freeze_address="",
             strict_empty_address_check=False,
             clawback_address=escrow_address,
-            sign_transaction=True,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    def change_nft_credentials_txn(self, escrow_address):
+        txn = self.clawback_change_txn(escrow_address=escrow_address)
+
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=txn)
 
         return tx_id
 
-    def opt_in(self, account_pk):
-        opt_in_txn = ASATransactionRepository.asa_opt_in(
-            client=self.client, sender_private_key=account_pk, asa_id=self.nft_id
+    def opt_in_txn(self, account_pk, sign_transaction: bool = True, suggested_params=None):
+        return ASATransactionRepository.asa_opt_in(
+            client=self.client,
+            sender_private_key=account_pk,
+            asa_id=self.nft_id,
+            sign_transaction=sign_transaction,
+            suggested_params=suggested_params,
         )
 
+    def opt_in(self, account_pk):
+        opt_in_txn = self.opt_in_txn(account_pk=account_pk)
+
         tx_id = NetworkInteraction.submit_transaction(self.client, transaction=opt_in_txn)
         return tx_id
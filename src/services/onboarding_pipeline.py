@@ -0,0 +1,346 @@
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from algosdk import logic as algo_logic
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.repository.deployment_journal import DeploymentJournal, DeploymentRecord, DeploymentStep
+from src.services import NetworkInteraction
+from src.services.nft_batch_minter import BeforeSend, MintResult, NFTBatchMinter, NFTSpec
+from src.services.nft_marketplace import NFTMarketplace
+from src.services.nft_service import NFTService
+
+
+class OnboardingPipeline:
+    """
+    Onboards NFTs into the marketplace in three stages, each confirmed once for the whole batch:
+        1. mint the NFTs in atomic groups of up to 16,
+        2. create one marketplace application per NFT (needs the NFT id),
+        3. clawback change, escrow initialization and escrow funding as one atomic group (needs the app id).
+    Within a stage all the transactions are sent before waiting, so a batch takes three rounds
+    instead of five rounds per item.
+
+    Every step is recorded in a DeploymentJournal. With a persistent journal, running the same batch again
+    resumes it: completed steps are skipped and the transactions sent before an interruption are looked up
+    instead of being sent twice. A step is only sent again once its transaction is proven dead: its last valid
+    round passed and the indexer, caught up with that round, does not have it. Without an indexer, the steps
+    whose outcome algod no longer knows are left for a run with an indexer.
+    """
+
+    def __init__(self, admin_pk: str, admin_address: str, client: algod.AlgodClient,
+                 journal: Optional[DeploymentJournal] = None, indexer=None):
+        """
+        :param admin_pk:
+        :param admin_address:
+        :param client:
+        :param journal: journal of the onboarding, by default every onboard call uses a new in-memory journal.
+        :param indexer: indexer client, used to look up the interrupted transactions that algod already forgot.
+        """
+        self.admin_pk = admin_pk
+        self.admin_address = admin_address
+        self.client = client
+        self.journal = journal
+        self.indexer = indexer
+
+    def _nft_service(self, spec: NFTSpec) -> NFTService:
+        return NFTService(nft_creator_address=self.admin_address,
+                          nft_creator_pk=self.admin_pk,
+                          client=self.client,
+                          unit_name=spec.unit_name,
+                          asset_name=spec.asset_name,
+                          nft_url=spec.nft_url)
+
+    def rehydrate(self, record: DeploymentRecord) -> Tuple[NFTMarketplace, NFTService]:
+        """
+        Rebuilds the services of a journaled NFT from the ids of the record, without any network call.
+        """
+        nft_service = self._nft_service(NFTSpec(record.unit_name, record.asset_name, record.nft_url))
+        nft_service.nft_id = record.nft_id
+
+        marketplace_service = NFTMarketplace(admin_pk=self.admin_pk,
+                                             admin_address=self.admin_address,
+                                             client=self.client,
+                                             nft_id=record.nft_id)
+        marketplace_service.app_id = record.app_id
+        return marketplace_service, nft_service
+
+    def _minter(self) -> NFTBatchMinter:
+        return NFTBatchMinter(nft_creator_address=self.admin_address,
+                              nft_creator_pk=self.admin_pk,
+                              client=self.client)
+
+    def mint(self, specs: List[NFTSpec],
+             before_send: Optional[BeforeSend] = None) -> Tuple[List[NFTService], List[MintResult]]:
+        """
+        Mints the NFTs in atomic groups, the NFTs which could not be minted are returned apart.
+        :param specs:
+        :param before_send: called with the (spec, txid, last valid round) of the transactions of every send,
+        right before it.
+        :return:
+            (list, list) NFTService of every minted NFT, and MintResult, with its error, of every failed mint.
+        """
+        nft_services = []
+        failed_mints = []
+        for mint_result in self._minter().mint(specs, before_send=before_send):
+            if not mint_result.succeeded:
+                failed_mints.append(mint_result)
+                continue
+
+            nft_service = self._nft_service(mint_result.spec)
+            nft_service.nft_id = mint_result.nft_id
+            nft_services.append(nft_service)
+
+        return nft_services, failed_mints
+
+    def create_applications(self, marketplace_services: List[NFTMarketplace],
+                            before_send: Optional[Callable[[int, str, int], None]] = None) -> List[Optional[Exception]]:
+        """
+        Creates the applications one transaction at a time, then waits for all of them.
+        :param marketplace_services:
+        :param before_send: called with the index of the service, the txid and the last valid round of its
+        transaction right before sending it, so that a crash during the stage never loses a sent transaction.
+        :return:
+            Rejection of every transaction by the node, None for the transactions that were sent.
+        """
+        rejections = []
+        sent = dict()
+        for index, marketplace_service in enumerate(marketplace_services):
+            app_creation_txn = marketplace_service.app_creation_txn(nft_owner_address=self.admin_address)
+            txid = app_creation_txn.get_txid()
+            if before_send is not None:
+                before_send(index, txid, app_creation_txn.transaction.last_valid_round)
+            try:
+                with instrumentation.span("submit"):
+                    self.client.send_transaction(app_creation_txn)
+            except AlgodHTTPError as e:
+                rejections.append(e)
+                continue
+            rejections.append(None)
+            sent[index] = txid
+
+        txinfos = NetworkInteraction.wait_for_confirmations(self.client, list(sent.values()))
+        for index, txinfo in zip(sent, txinfos):
+            marketplace_services[index].app_id = txinfo["application-index"]
+        return rejections
+
+    def setup_escrows(self, services: List[Tuple[NFTMarketplace, NFTService]],
+                      before_send: Optional[Callable[[int, str, int], None]] = None) -> List[Optional[Exception]]:
+        """
+        Sends the escrow setup groups one at a time, then waits for all of them.
+        :param services:
+        :param before_send: called with the index of the services, the txid and the last valid round of the
+        first transaction of their group right before sending it.
+        :return:
+            Rejection of every group by the node, None for the groups that were sent.
+        """
+        rejections = []
+        sent = []
+        for index, (marketplace_service, nft_service) in enumerate(services):
+            transactions, private_keys = marketplace_service.escrow_setup_group(nft_service)
+            signed_group = NetworkInteraction.sign_group(transactions, private_keys)
+            txid = signed_group[0].get_txid()
+            if before_send is not None:
+                before_send(index, txid, transactions[0].last_valid_round)
+            try:
+                with instrumentation.span("submit"):
+                    self.client.send_transactions(signed_group)
+            except AlgodHTTPError as e:
+                rejections.append(e)
+                continue
+            rejections.append(None)
+            sent.append(txid)
+
+        NetworkInteraction.wait_for_confirmations(self.client, sent)
+        return rejections
+
+    def _lookup_transaction(self, txid: str) -> Optional[dict]:
+        """
+        :return:
+            Pending transaction info of the transaction once confirmed, None if its confirmation was not seen.
+        """
+        try:
+            txinfo = self.client.pending_transaction_info(txid)
+        except AlgodHTTPError:
+            # Unknown to algod: never received, or confirmed and already dropped from its pool.
+            txinfo = None
+
+        if txinfo is not None and not txinfo.get("confirmed-round") and not txinfo.get("pool-error"):
+            # Still in the pool, its last valid round bounds the wait.
+            try:
+                txinfo = NetworkInteraction.wait_for_confirmation(
+                    self.client, txid, last_valid_round=txinfo.get("txn", {}).get("txn", {}).get("lv")
+                )
+            except Exception:
+                txinfo = None
+
+        if txinfo is not None and txinfo.get("confirmed-round"):
+            return txinfo
+
+        if self.indexer is not None:
+            transactions = self.indexer.search_transactions(txid=txid).get("transactions", [])
+            if transactions:
+                return {"confirmed-round": transactions[0]["confirmed-round"],
+                        "asset-index": transactions[0].get("created-asset-index"),
+                        "application-index": transactions[0].get("created-application-index")}
+        return None
+
+    def _is_dead(self, txid: str, last_valid_round: Optional[int]) -> bool:
+        """
+        :return:
+            True only if the transaction can no longer be confirmed and was not: the network is past its last
+            valid round and the indexer, which processed that round, does not have it.
+        """
+        if last_valid_round is None or self.indexer is None:
+            return False
+        if self.client.status().get("last-round", 0) <= last_valid_round:
+            return False
+        if self.indexer.health().get("round", 0) < last_valid_round:
+            return False
+        return not self.indexer.search_transactions(txid=txid).get("transactions", [])
+
+    def _recover(self, journal: DeploymentJournal, record: DeploymentRecord) -> DeploymentRecord:
+        """
+        Settles a step interrupted between sending its transaction and seeing it confirmed. The step is sent
+        again only if its transaction is dead, a step whose outcome is unknown stays at *_sent.
+        """
+        if record.step == DeploymentStep.mint_sent:
+            txid, previous_step, txid_column = record.mint_txid, DeploymentStep.planned, "mint_txid"
+        elif record.step == DeploymentStep.app_sent:
+            txid, previous_step, txid_column = record.app_txid, DeploymentStep.minted, "app_txid"
+        elif record.step == DeploymentStep.escrow_sent:
+            txid, previous_step, txid_column = record.escrow_txid, DeploymentStep.app_created, "escrow_txid"
+        else:
+            return record
+
+        txinfo = self._lookup_transaction(txid)
+        if txinfo is None:
+            if self._is_dead(txid, record.last_valid_round):
+                return journal.update(record, previous_step, last_valid_round=None, **{txid_column: None})
+
+            error = (f"transaction {txid} not seen confirmed, an indexer is required to settle it"
+                     if self.indexer is None else
+                     f"transaction {txid} not seen confirmed, it is valid until round {record.last_valid_round}")
+            return journal.update(record, record.step, error=error)
+
+        if record.step == DeploymentStep.mint_sent:
+            return journal.update(record, DeploymentStep.minted, nft_id=txinfo["asset-index"], last_valid_round=None)
+        if record.step == DeploymentStep.app_sent:
+            app_id = txinfo["application-index"]
+            return journal.update(record, DeploymentStep.app_created, app_id=app_id,
+                                  escrow_address=algo_logic.get_application_address(app_id), last_valid_round=None)
+        return journal.update(record, DeploymentStep.completed, last_valid_round=None)
+
+    def _mint_stage(self, journal: DeploymentJournal, records: List[DeploymentRecord]):
+        records = {NFTSpec(record.unit_name, record.asset_name, record.nft_url): record
+                   for record in records if record.step == DeploymentStep.planned}
+        if not records:
+            return
+
+        def before_send(sending: List[Tuple[NFTSpec, str, int]]):
+            for spec, txid, last_valid_round in sending:
+                records[spec] = journal.update(records[spec], DeploymentStep.mint_sent, mint_txid=txid,
+                                               last_valid_round=last_valid_round)
+
+        for mint_result in self._minter().mint(list(records), before_send=before_send):
+            record = records[mint_result.spec]
+            if mint_result.succeeded:
+                journal.update(record, DeploymentStep.minted, nft_id=mint_result.nft_id, last_valid_round=None)
+            elif isinstance(mint_result.error, AlgodHTTPError):
+                # Rejected by the node, it can be sent again.
+                journal.update(record, DeploymentStep.planned, mint_txid=None, last_valid_round=None,
+                               error=str(mint_result.error))
+            else:
+                # Sent, or maybe sent, but not seen confirmed: it stays at mint_sent, the next run looks it up.
+                journal.update(record, record.step, error=str(mint_result.error))
+
+    def _application_stage(self, journal: DeploymentJournal, records: List[DeploymentRecord]):
+        records = [record for record in records if record.step == DeploymentStep.minted]
+        if not records:
+            return
+
+        marketplace_services = [self.rehydrate(record)[0] for record in records]
+
+        def before_send(index: int, txid: str, last_valid_round: int):
+            records[index] = journal.update(records[index], DeploymentStep.app_sent, app_txid=txid,
+                                            last_valid_round=last_valid_round)
+
+        rejections = self.create_applications(marketplace_services, before_send=before_send)
+
+        for record, marketplace_service, rejection in zip(records, marketplace_services, rejections):
+            if rejection is not None:
+                journal.update(record, DeploymentStep.minted, app_txid=None, last_valid_round=None,
+                               error=str(rejection))
+                continue
+            journal.update(record, DeploymentStep.app_created, app_id=marketplace_service.app_id,
+                           escrow_address=marketplace_service.escrow_address, last_valid_round=None)
+
+    def _escrow_stage(self, journal: DeploymentJournal, records: List[DeploymentRecord]):
+        records = [record for record in records if record.step == DeploymentStep.app_created]
+        if not records:
+            return
+
+        services = [self.rehydrate(record) for record in records]
+
+        def before_send(index: int, txid: str, last_valid_round: int):
+            records[index] = journal.update(records[index], DeploymentStep.escrow_sent, escrow_txid=txid,
+                                            last_valid_round=last_valid_round)
+
+        rejections = self.setup_escrows(services, before_send=before_send)
+
+        for record, rejection in zip(records, rejections):
+            if rejection is not None:
+                journal.update(record, DeploymentStep.app_created, escrow_txid=None, last_valid_round=None,
+                               error=str(rejection))
+                continue
+            journal.update(record, DeploymentStep.completed, last_valid_round=None)
+
+    def onboard(self, specs: Iterable[NFTSpec]) -> List[Tuple[NFTMarketplace, NFTService]]:
+        """
+        Mints and lists every NFT of the batch, skipping the steps already completed according to the journal.
+        :param specs: unit name, asset name and url of each NFT.
+        :return:
+            (NFTMarketplace, NFTService) pair of every onboarded NFT, in the order of specs.
+        """
+        specs = [NFTSpec(*spec) for spec in specs]
+        journal = self.journal if self.journal is not None else DeploymentJournal()
+
+        def current_records() -> List[DeploymentRecord]:
+            return [journal.get(spec.unit_name, spec.asset_name) for spec in specs]
+
+        for record in journal.plan(specs):
+            if record.step in DeploymentStep.sent_steps:
+                self._recover(journal, record)
+
+        self._mint_stage(journal, current_records())
+        self._application_stage(journal, current_records())
+        self._escrow_stage(journal, current_records())
+
+        return [self.rehydrate(record) for record in current_records() if record.step == DeploymentStep.completed]
+
+    def resume(self) -> List[Tuple[NFTMarketplace, NFTService]]:
+        """
+        Completes the onboarding of every unfinished NFT of the journal.
+        """
+        if self.journal is None:
+            return []
+        return self.onboard(NFTSpec(record.unit_name, record.asset_name, record.nft_url)
+                            for record in self.journal.unfinished())
+
+    def onboard_one(self, unit_name: str, asset_name: str, nft_url=None) -> Tuple[NFTMarketplace, NFTService]:
+        services = self.onboard([NFTSpec(unit_name, asset_name, nft_url)])
+        if not services:
+            raise RuntimeError(f"Unsuccessful creation of NFT {asset_name}.")
+        return services[0]
+
+
+@lru_cache(maxsize=None)
+def get_onboarding_pipeline(admin_account_id: int = 1) -> OnboardingPipeline:
+    """
+    Pipeline of the scripts, onboarding with the given account of the config as admin.
+    Created on first use, so that importing the scripts does not read the config.
+    """
+    from src.blockchain_utils.credentials import get_account_credentials, get_algo_client
+    admin_pk, admin_addr, _ = get_account_credentials(admin_account_id)
+    return OnboardingPipeline(admin_pk=admin_pk, admin_address=admin_addr, client=get_algo_client())
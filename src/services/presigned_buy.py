@@ -0,0 +1,287 @@
+"""
+Buy groups prepared and signed ahead of the purchase.
+
+NFTMarketplace.buy_nft builds, fetches params for and signs its two transactions when the buyer confirms,
+which delays the buy call by as much during a drop. A PresignedBuy holds the signed group instead, so that
+confirming only costs a single send_transactions call:
+
+    book = PresignedBuyBook(client)
+    book.prepare(nft_marketplace, buyer_address=buyer_address, buyer_pk=buyer_pk, buy_price=price)
+    ...
+    tx_id = book.submit(nft_marketplace.app_id, buyer_address)
+
+The book re-signs the groups in the background when their last valid round approaches.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import SignedTransaction
+from algosdk.v2client import algod
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.blockchain_utils.signer import Signer, as_signer
+from src.blockchain_utils.suggested_params import SuggestedParamsProvider
+from src.services.network_interaction import NetworkInteraction
+from src.services.nft_marketplace import NFTMarketplace
+from src.smart_contracts import NFTMarketplaceASC1
+
+
+DEFAULT_VALIDITY_WINDOW = 1000
+DEFAULT_REFRESH_MARGIN = 20
+
+# Message of algod for the transactions submitted outside of their validity window.
+EXPIRED_GROUP_ERROR = "txn dead"
+
+logger = logging.getLogger(__name__)
+
+
+class PresignedBuy:
+    """
+    Buy application call and buyer -> escrow payment of one buyer, signed as one atomic group.
+    The contract checks the payment against the current price, so the group is only valid for the price
+    it was prepared for.
+    """
+
+    def __init__(self,
+                 marketplace: NFTMarketplace,
+                 buyer_address: str,
+                 buyer_pk: Union[str, Signer],
+                 buy_price: int,
+                 validity_window: int = DEFAULT_VALIDITY_WINDOW,
+                 refresh_margin: int = DEFAULT_REFRESH_MARGIN,
+                 params_provider: Optional[SuggestedParamsProvider] = None):
+        """
+        :param marketplace: marketplace of the NFT, with its app_id.
+        :param buyer_address:
+        :param buyer_pk: private key or signer of the buyer.
+        :param buy_price: price of the NFT, in micro ALGOs.
+        :param validity_window: number of rounds the signed group stays valid.
+        :param refresh_margin: the group is signed again once it is valid for fewer rounds.
+        :param params_provider: defaults to the client's shared provider.
+        """
+        if refresh_margin >= validity_window:
+            raise ValueError("The refresh margin must be smaller than the validity window.")
+
+        self.marketplace = marketplace
+        self.buyer_address = buyer_address
+        self.signer = as_signer(buyer_pk)
+        self.buy_price = buy_price
+        self.validity_window = validity_window
+        self.refresh_margin = refresh_margin
+        self.params_provider = params_provider or SuggestedParamsProvider.shared(marketplace.client)
+
+        self._lock = threading.Lock()
+        self.signed_group: Optional[List[SignedTransaction]] = None
+        self.submitted = False
+        # Error of the last unsuccessful refresh, None once the group was signed again.
+        self.refresh_error: Optional[Exception] = None
+
+    @property
+    def client(self) -> algod.AlgodClient:
+        return self.marketplace.client
+
+    @property
+    def app_id(self) -> int:
+        return self.marketplace.app_id
+
+    @property
+    def last_valid_round(self) -> Optional[int]:
+        if self.signed_group is None:
+            return None
+        return self.signed_group[0].transaction.last_valid_round
+
+    def sign(self, refresh_params: bool = False) -> List[SignedTransaction]:
+        """
+        Builds and signs a new group, valid from the current round for validity_window rounds.
+        :param refresh_params: fetches new suggested params first, instead of the ones cached by the provider,
+        which may be the params of the group being replaced.
+        """
+        if refresh_params:
+            self.params_provider.refresh()
+        suggested_params = self.params_provider.get(validity_window=self.validity_window)
+        transactions = list(self.marketplace.buy_nft_txns(buyer_address=self.buyer_address,
+                                                          buyer_pk=self.signer,
+                                                          buy_price=self.buy_price,
+                                                          sign_transaction=False,
+                                                          suggested_params=suggested_params))
+        with instrumentation.span("sign", label=NFTMarketplaceASC1.AppMethods.buy):
+            signed_group = self.signer.sign_group(transactions)
+
+        with self._lock:
+            self.signed_group = signed_group
+            self.refresh_error = None
+        return signed_group
+
+    def needs_refresh(self, current_round: Optional[int] = None) -> bool:
+        """
+        :param current_round: defaults to the round estimated by the params provider, without a network call.
+        """
+        if self.signed_group is None:
+            return True
+        if current_round is None:
+            current_round = self.params_provider.current_round()
+        return current_round >= self.last_valid_round - self.refresh_margin
+
+    def refresh(self, current_round: Optional[int] = None) -> bool:
+        """
+        Signs the group again if it is about to expire.
+        :return:
+            True if the group was signed again.
+        """
+        if self.submitted or not self.needs_refresh(current_round):
+            return False
+        self.sign(refresh_params=True)
+        return True
+
+    def _send(self, signed_group: List[SignedTransaction]) -> List[SignedTransaction]:
+        with instrumentation.span("submit"):
+            try:
+                self.client.send_transactions(signed_group)
+                return signed_group
+            except AlgodHTTPError as e:
+                # Expired before the refresh thread could sign it again, e.g. the node was behind.
+                if EXPIRED_GROUP_ERROR not in str(e):
+                    raise
+            signed_group = self.sign(refresh_params=True)
+            self.client.send_transactions(signed_group)
+            return signed_group
+
+    @instrumentation.label(NFTMarketplaceASC1.AppMethods.buy)
+    def submit(self, wait: bool = True) -> str:
+        """
+        Sends the signed group with a single send_transactions call. The group is only signed again when the
+        node reports it expired, the submission never waits for a params fetch otherwise.
+        :param wait: waits for the confirmation of the group.
+        :return:
+            Transaction id of the payment, as NFTMarketplace.buy_nft.
+        """
+        with self._lock:
+            signed_group = self.signed_group
+        if signed_group is None:
+            signed_group = self.sign()
+
+        signed_group = self._send(signed_group)
+        self.submitted = True
+
+        tx_ids = [signed_txn.get_txid() for signed_txn in signed_group]
+        if wait:
+            NetworkInteraction.wait_for_confirmation(self.client, tx_ids[0],
+                                                     last_valid_round=signed_group[0].transaction.last_valid_round)
+            self.marketplace._state_changed()
+        return tx_ids[1]
+
+
+class PresignedBuyBook:
+    """
+    Presigned buys by (app id, buyer address), kept valid by a background thread which re-signs the groups
+    whose last valid round approaches.
+    """
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 validity_window: int = DEFAULT_VALIDITY_WINDOW,
+                 refresh_margin: int = DEFAULT_REFRESH_MARGIN,
+                 check_interval: Optional[float] = None):
+        """
+        :param client:
+        :param validity_window: number of rounds every signed group stays valid.
+        :param refresh_margin: a group is signed again once it is valid for fewer rounds.
+        :param check_interval: seconds between two checks of the groups, defaults to the round time.
+        """
+        self.client = client
+        self.validity_window = validity_window
+        self.refresh_margin = refresh_margin
+        self.params_provider = SuggestedParamsProvider.shared(client)
+        self.check_interval = check_interval or self.params_provider.round_time
+
+        self._buys: Dict[Tuple[int, str], PresignedBuy] = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def prepare(self, marketplace: NFTMarketplace, buyer_address: str, buyer_pk: Union[str, Signer],
+                buy_price: int) -> PresignedBuy:
+        """
+        Signs the buy group of the buyer and keeps it until it is submitted or discarded.
+        A group already prepared for the same application and buyer is replaced.
+        """
+        presigned_buy = PresignedBuy(marketplace=marketplace,
+                                     buyer_address=buyer_address,
+                                     buyer_pk=buyer_pk,
+                                     buy_price=buy_price,
+                                     validity_window=self.validity_window,
+                                     refresh_margin=self.refresh_margin,
+                                     params_provider=self.params_provider)
+        presigned_buy.sign()
+
+        with self._lock:
+            self._buys[(marketplace.app_id, buyer_address)] = presigned_buy
+        self._start()
+        return presigned_buy
+
+    def get(self, app_id: int, buyer_address: str) -> Optional[PresignedBuy]:
+        with self._lock:
+            return self._buys.get((app_id, buyer_address))
+
+    def discard(self, app_id: int, buyer_address: str) -> Optional[PresignedBuy]:
+        with self._lock:
+            return self._buys.pop((app_id, buyer_address), None)
+
+    def submit(self, app_id: int, buyer_address: str, wait: bool = True) -> str:
+        """
+        Submits the prepared group of the buyer, which is then removed from the book.
+        :return:
+            Transaction id of the payment.
+        """
+        presigned_buy = self.get(app_id, buyer_address)
+        if presigned_buy is None:
+            raise KeyError(f"No buy prepared for the application {app_id} and the buyer {buyer_address}.")
+
+        tx_id = presigned_buy.submit(wait=wait)
+        self.discard(app_id, buyer_address)
+        return tx_id
+
+    def refresh(self) -> int:
+        """
+        Signs again every group about to expire.
+        :return:
+            Number of groups signed again.
+        """
+        with self._lock:
+            presigned_buys = list(self._buys.values())
+        if not presigned_buys:
+            return 0
+
+        current_round = self.params_provider.current_round()
+        refreshed = 0
+        for presigned_buy in presigned_buys:
+            try:
+                refreshed += presigned_buy.refresh(current_round)
+            except Exception as e:
+                # Kept on the buy, its group expires unless a later refresh succeeds.
+                presigned_buy.refresh_error = e
+                logger.warning("Unsuccessful refresh of the buy of application %s by %s: %s",
+                               presigned_buy.app_id, presigned_buy.buyer_address, e)
+        return refreshed
+
+    def _refresh_loop(self):
+        while not self._stopped.wait(self.check_interval):
+            self.refresh()
+
+    def _start(self):
+        with self._lock:
+            if self._refresh_thread is None:
+                self._stopped.clear()
+                self._refresh_thread = threading.Thread(target=self._refresh_loop,
+                                                        name="presigned-buy-refresh",
+                                                        daemon=True)
+                self._refresh_thread.start()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            refresh_thread, self._refresh_thread = self._refresh_thread, None
+        if refresh_thread is not None:
+            refresh_thread.join()
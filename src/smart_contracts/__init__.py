@@ -1,2 +1,24 @@
-from .nft_marketplace_asc1 import NFTMarketplaceASC1
-from .nft_escrow import nft_escrow
+import importlib
+
+# The contracts are built with PyTeal, which is only imported once a contract is used.
+_EXPORTS = {
+    "NFTMarketplaceASC1": ".nft_marketplace_asc1",
+    "nft_escrow": ".nft_escrow",
+    "NFTMultiMarketplaceASC1": ".nft_multi_marketplace_asc1",
+    "nft_multi_escrow": ".nft_multi_marketplace_asc1",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -114,6 +114,7 @@ class NFTMarketplaceASC1(NFTMarketplaceInterface):
     def initialize_escrow(self, escrow_address):
         """
         Application call from the app_admin.
+        It can be sent alone or in the middle of a group of 3 transactions, after the NFT clawback change.
         :return:
         """
         curr_escrow_address = App.globalGetEx(Int(0), self.Variables.escrow_address)
@@ -129,7 +130,9 @@ class NFTMarketplaceASC1(NFTMarketplaceInterface):
             Assert(curr_escrow_address.hasValue() == Int(0)),
 
             Assert(App.globalGet(self.Variables.app_admin) == Txn.sender()),
-            Assert(Global.group_size() == Int(1)),
+            # Either called alone or as the escrow setup group: clawback change, initialize escrow, funding.
+            Assert(Or(Global.group_size() == Int(1),
+                      And(Global.group_size() == Int(3), Txn.group_index() == Int(1)))),
 
             asset_escrow,
             manager_address,
@@ -174,12 +177,20 @@ class NFTMarketplaceASC1(NFTMarketplaceInterface):
 
     def buy(self, buyer_address):
         """
-        Function to buy the NFT
+        Function to buy the NFT.
+        Group of 2: this call, then the payment of the price from the buyer to the escrow.
         """
+        valid_number_of_transactions = And(Global.group_size() == Int(2), Txn.group_index() == Int(0))
         app_sell_is_open = App.globalGet(self.Variables.app_state) == self.AppState.selling_open
         no_current_buy = App.globalGet(self.Variables.asa_buyer) == Global.zero_address()
-        can_buy = And( app_sell_is_open,
-                       no_current_buy)
+        valid_payment = And(Gtxn[1].type_enum() == TxnType.Payment,
+                            Gtxn[1].sender() == buyer_address,
+                            Gtxn[1].receiver() == App.globalGet(self.Variables.escrow_address),
+                            Gtxn[1].amount() == App.globalGet(self.Variables.asa_price))
+        can_buy = And(valid_number_of_transactions,
+                      app_sell_is_open,
+                      no_current_buy,
+                      valid_payment)
 
         update_state = Seq([
             App.globalPut(self.Variables.asa_buyer, buyer_address),
@@ -0,0 +1,349 @@
+from pyteal import *
+import algosdk
+
+
+class NFTMultiMarketplaceASC1:
+    """
+    Smart Contract managing the listings of many NFTs in one application.
+    Every listing is stored in a single global state entry keyed by the 8 bytes of the ASA id:
+        owner (32) | creator (32) | buyer (32) | price (8) | state (8)
+    The NFTs stay in the wallets of their owners. A stateless escrow (see nft_multi_escrow) is the clawback of
+    every listed NFT and holds the buyers' payments until the sale is validated or canceled. The escrow only signs
+    transactions grouped after a call to this application, which checks the whole group.
+    """
+    max_listings = 62
+
+    class Variables:
+        escrow_address = Bytes("ESCROW_ADDRESS")
+        app_admin = Bytes("APP_ADMIN")
+
+    class AppMethods:
+        initialize_escrow = "initializeEscrow"
+        add_listing = "addListing"
+        remove_listing = "removeListing"
+        open_sell = "openSell"
+        buy = "buy"
+        close_sell = "closeSell"
+        validate_buy = "validateBuy"
+        cancel_buy = "cancelBuy"
+
+    class AppState:
+        active = 1
+        selling_open = 2
+        buying_in_progress = 3
+
+    class ListingLayout:
+        owner = (0, 32)
+        creator = (32, 64)
+        buyer = (64, 96)
+        price = (96, 104)
+        state = (104, 112)
+        size = 112
+
+    creator_royalties = 10
+
+    def __init__(self):
+        self.listing = ScratchVar(TealType.bytes)
+
+    @staticmethod
+    def listing_key():
+        return Itob(Txn.assets[0])
+
+    def listing_field(self, field):
+        start, end = field
+        return Substring(self.listing.load(), Int(start), Int(end))
+
+    def listing_owner(self):
+        return self.listing_field(self.ListingLayout.owner)
+
+    def listing_creator(self):
+        return self.listing_field(self.ListingLayout.creator)
+
+    def listing_buyer(self):
+        return self.listing_field(self.ListingLayout.buyer)
+
+    def listing_price(self):
+        return Btoi(self.listing_field(self.ListingLayout.price))
+
+    def listing_state(self):
+        return Btoi(self.listing_field(self.ListingLayout.state))
+
+    def store_listing(self, owner, creator, buyer, price, state):
+        return App.globalPut(self.listing_key(), Concat(owner, creator, buyer, Itob(price), Itob(state)))
+
+    def load_listing(self):
+        listing = App.globalGetEx(Int(0), self.listing_key())
+        return Seq([
+            listing,
+            Assert(listing.hasValue()),
+            self.listing.store(listing.value()),
+        ])
+
+    def application_start(self):
+        method = Txn.application_args[0]
+
+        actions = Cond(
+            [method == Bytes(self.AppMethods.initialize_escrow), self.initialize_escrow()],
+            [method == Bytes(self.AppMethods.add_listing), self.add_listing()],
+            [method == Bytes(self.AppMethods.remove_listing), Seq([self.load_listing(), self.remove_listing()])],
+            [method == Bytes(self.AppMethods.open_sell), Seq([self.load_listing(), self.open_sell()])],
+            [method == Bytes(self.AppMethods.buy), Seq([self.load_listing(), self.buy()])],
+            [method == Bytes(self.AppMethods.validate_buy), Seq([self.load_listing(), self.validate_buy()])],
+            [method == Bytes(self.AppMethods.cancel_buy), Seq([self.load_listing(), self.cancel_buy()])],
+            [method == Bytes(self.AppMethods.close_sell), Seq([self.load_listing(), self.close_sell()])],
+        )
+
+        return If(Txn.application_id() == Int(0)).Then(self.app_initialization()).Else(
+            Seq([
+                # The escrow trusts the NoOp calls to this application only.
+                Assert(Txn.on_completion() == OnComplete.NoOp),
+                actions,
+            ])
+        )
+
+    def app_initialization(self):
+        """
+        CreateAppTxn from the app_admin, without arguments.
+        """
+        return Seq([
+            App.globalPut(self.Variables.app_admin, Txn.sender()),
+            Return(Int(1))
+        ])
+
+    def initialize_escrow(self):
+        """
+        Application call from the app_admin with the escrow address, once.
+        The escrow program depends on the app id, so it is only known after the creation.
+        """
+        curr_escrow_address = App.globalGetEx(Int(0), self.Variables.escrow_address)
+
+        return Seq([
+            curr_escrow_address,
+            Assert(curr_escrow_address.hasValue() == Int(0)),
+            Assert(App.globalGet(self.Variables.app_admin) == Txn.sender()),
+            Assert(Txn.application_args.length() == Int(2)),
+
+            App.globalPut(self.Variables.escrow_address, Txn.application_args[1]),
+            Return(Int(1))
+        ])
+
+    def add_listing(self):
+        """
+        Application call from the app_admin with the owner address, the NFT in the foreign assets.
+        It can be sent alone or after the NFT clawback change, in a group of 2.
+        """
+        listing = App.globalGetEx(Int(0), self.listing_key())
+
+        asset_escrow = AssetParam.clawback(Txn.assets[0])
+        manager_address = AssetParam.manager(Txn.assets[0])
+        freeze_address = AssetParam.freeze(Txn.assets[0])
+        reserve_address = AssetParam.reserve(Txn.assets[0])
+        default_frozen = AssetParam.defaultFrozen(Txn.assets[0])
+
+        return Seq([
+            listing,
+            Assert(listing.hasValue() == Int(0)),
+
+            Assert(App.globalGet(self.Variables.app_admin) == Txn.sender()),
+            Assert(Txn.application_args.length() == Int(2)),
+            Assert(Or(Global.group_size() == Int(1),
+                      And(Global.group_size() == Int(2), Txn.group_index() == Int(1)))),
+
+            asset_escrow,
+            manager_address,
+            freeze_address,
+            reserve_address,
+            default_frozen,
+            Assert(asset_escrow.value() == App.globalGet(self.Variables.escrow_address)),
+            Assert(default_frozen.value()),
+            Assert(manager_address.value() == Global.zero_address()),
+            Assert(freeze_address.value() == Global.zero_address()),
+            Assert(reserve_address.value() == Global.zero_address()),
+
+            # The first owner of the NFT will stay the creator for ever
+            self.store_listing(owner=Txn.application_args[1],
+                               creator=Txn.application_args[1],
+                               buyer=Global.zero_address(),
+                               price=Int(0),
+                               state=Int(self.AppState.active)),
+            Return(Int(1))
+        ])
+
+    def remove_listing(self):
+        """
+        The app_admin frees the slot of a listing which is not for sale.
+        """
+        return Seq([
+            Assert(Global.group_size() == Int(1)),
+            Assert(App.globalGet(self.Variables.app_admin) == Txn.sender()),
+            Assert(self.listing_state() == Int(self.AppState.active)),
+
+            App.globalDel(self.listing_key()),
+            Return(Int(1))
+        ])
+
+    def open_sell(self):
+        """
+        Function for the owner to list its product/NFT in the marketplace, or to change its price.
+        """
+        return Seq([
+            Assert(Global.group_size() == Int(1)),
+            Assert(Txn.application_args.length() == Int(2)),
+            Assert(Txn.sender() == self.listing_owner()),
+            Assert(Or(self.listing_state() == Int(self.AppState.active),
+                      self.listing_state() == Int(self.AppState.selling_open))),
+
+            self.store_listing(owner=self.listing_owner(),
+                               creator=self.listing_creator(),
+                               buyer=Global.zero_address(),
+                               price=Btoi(Txn.application_args[1]),
+                               state=Int(self.AppState.selling_open)),
+            Return(Int(1))
+        ])
+
+    def buy(self):
+        """
+        Group of 2: this call from the buyer, then the payment of the price from the buyer to the escrow.
+        """
+        return Seq([
+            Assert(Global.group_size() == Int(2)),
+            Assert(Txn.group_index() == Int(0)),
+            Assert(self.listing_state() == Int(self.AppState.selling_open)),
+
+            Assert(Gtxn[1].type_enum() == TxnType.Payment),
+            Assert(Gtxn[1].sender() == Txn.sender()),
+            Assert(Gtxn[1].receiver() == App.globalGet(self.Variables.escrow_address)),
+            Assert(Gtxn[1].amount() == self.listing_price()),
+
+            self.store_listing(owner=self.listing_owner(),
+                               creator=self.listing_creator(),
+                               buyer=Txn.sender(),
+                               price=self.listing_price(),
+                               state=Int(self.AppState.buying_in_progress)),
+            Return(Int(1))
+        ])
+
+    def validate_buy(self):
+        """
+        The buyer has received the product at home and agrees to release the money. Group of 4:
+            0. this call from the buyer,
+            1. payment of the price minus the royalties from the escrow to the owner,
+            2. payment of the royalties from the escrow to the creator,
+            3. transfer of the NFT from the owner to the buyer, by the escrow clawback.
+        """
+        escrow_address = App.globalGet(self.Variables.escrow_address)
+        royalties = Div(self.listing_price() * Int(self.creator_royalties), Int(100))
+
+        return Seq([
+            Assert(Global.group_size() == Int(4)),
+            Assert(Txn.group_index() == Int(0)),
+            Assert(Txn.sender() == self.listing_buyer()),
+            Assert(self.listing_state() == Int(self.AppState.buying_in_progress)),
+
+            Assert(Gtxn[1].type_enum() == TxnType.Payment),
+            Assert(Gtxn[1].sender() == escrow_address),
+            Assert(Gtxn[1].receiver() == self.listing_owner()),
+            Assert(Gtxn[1].amount() == self.listing_price() - royalties),
+
+            Assert(Gtxn[2].type_enum() == TxnType.Payment),
+            Assert(Gtxn[2].sender() == escrow_address),
+            Assert(Gtxn[2].receiver() == self.listing_creator()),
+            Assert(Gtxn[2].amount() == royalties),
+
+            Assert(Gtxn[3].type_enum() == TxnType.AssetTransfer),
+            Assert(Gtxn[3].sender() == escrow_address),
+            Assert(Gtxn[3].xfer_asset() == Txn.assets[0]),
+            Assert(Gtxn[3].asset_amount() == Int(1)),
+            Assert(Gtxn[3].asset_sender() == self.listing_owner()),
+            Assert(Gtxn[3].asset_receiver() == self.listing_buyer()),
+
+            # The NFT is sold, the listing goes back to the "active" state with the new owner
+            self.store_listing(owner=self.listing_buyer(),
+                               creator=self.listing_creator(),
+                               buyer=Global.zero_address(),
+                               price=Int(0),
+                               state=Int(self.AppState.active)),
+            Return(Int(1))
+        ])
+
+    def cancel_buy(self):
+        """
+        Group of 2: this call from the owner, then the refund of the price from the escrow to the buyer.
+        """
+        return Seq([
+            Assert(Global.group_size() == Int(2)),
+            Assert(Txn.group_index() == Int(0)),
+            Assert(Txn.sender() == self.listing_owner()),
+            Assert(self.listing_state() == Int(self.AppState.buying_in_progress)),
+
+            Assert(Gtxn[1].type_enum() == TxnType.Payment),
+            Assert(Gtxn[1].sender() == App.globalGet(self.Variables.escrow_address)),
+            Assert(Gtxn[1].receiver() == self.listing_buyer()),
+            Assert(Gtxn[1].amount() == self.listing_price()),
+
+            # State goes back to selling open
+            self.store_listing(owner=self.listing_owner(),
+                               creator=self.listing_creator(),
+                               buyer=Global.zero_address(),
+                               price=self.listing_price(),
+                               state=Int(self.AppState.selling_open)),
+            Return(Int(1))
+        ])
+
+    def close_sell(self):
+        """
+        The owner doesn't want to have its product listed on the marketplace anymore
+        """
+        return Seq([
+            Assert(Global.group_size() == Int(1)),
+            Assert(Txn.sender() == self.listing_owner()),
+            Assert(self.listing_state() == Int(self.AppState.selling_open)),
+
+            self.store_listing(owner=self.listing_owner(),
+                               creator=self.listing_creator(),
+                               buyer=Global.zero_address(),
+                               price=Int(0),
+                               state=Int(self.AppState.active)),
+            Return(Int(1))
+        ])
+
+    def approval_program(self):
+        return self.application_start()
+
+    def clear_program(self):
+        return Return(Int(1))
+
+    @property
+    def global_schema(self):
+        return algosdk.future.transaction.StateSchema(num_uints=0,
+                                                      num_byte_slices=self.max_listings + 2)
+
+    @property
+    def local_schema(self):
+        return algosdk.future.transaction.StateSchema(num_uints=0,
+                                                      num_byte_slices=0)
+
+
+def nft_multi_escrow(app_id: int):
+    """
+    Clawback of the listed NFTs and holder of the pending payments of a NFTMultiMarketplaceASC1 application.
+    It signs any transaction grouped after a settlement call to the application, which validates the group.
+    The escrow pays no fee, the deposits it holds belong to the buyers: the caller of the application pays the
+    fees of the whole group through fee pooling.
+    """
+    return Seq([
+        Assert(Global.group_size() > Int(1)),
+        Assert(Txn.group_index() > Int(0)),
+        Assert(Gtxn[0].type_enum() == TxnType.ApplicationCall),
+        Assert(Gtxn[0].application_id() == Int(app_id)),
+        Assert(Gtxn[0].on_completion() == OnComplete.NoOp),
+        Assert(Or(Gtxn[0].application_args[0] == Bytes(NFTMultiMarketplaceASC1.AppMethods.validate_buy),
+                  Gtxn[0].application_args[0] == Bytes(NFTMultiMarketplaceASC1.AppMethods.cancel_buy))),
+
+        Assert(Txn.fee() == Int(0)),
+        Assert(Txn.rekey_to() == Global.zero_address()),
+        Assert(Txn.close_remainder_to() == Global.zero_address()),
+        Assert(Txn.asset_close_to() == Global.zero_address()),
+
+        Return(Int(1))
+    ])
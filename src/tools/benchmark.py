@@ -0,0 +1,196 @@
+"""
+End-to-end throughput benchmark of the sale lifecycle, against the in-process LocalAlgod ledger.
+
+Every phase runs for all the items before the next one starts:
+    create_nft_services -> open_sell -> opt_in -> buy_nft -> validate_buy
+and is reported with its throughput and latency percentiles:
+
+    python -m src.tools.benchmark --items 200 --workers 16 --round-time 0.05
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from algosdk import account as algo_acc
+
+from src.blockchain_utils.instrumentation import instrumentation
+from src.services.onboarding_pipeline import NFTSpec, OnboardingPipeline
+from src.tools.local_algod import LocalAlgod
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class PhaseResult:
+    def __init__(self, name: str, latencies: List[float], errors: List[Exception], duration: float):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.duration = duration
+
+    def as_dict(self) -> dict:
+        return {
+            "operations": len(self.latencies),
+            "errors": len(self.errors),
+            "error_samples": sorted({f"{type(e).__name__}: {e}" for e in self.errors})[:5],
+            "duration_s": round(self.duration, 4),
+            "throughput_per_s": round(len(self.latencies) / self.duration, 2) if self.duration else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(self.latencies, 0.50) * 1000, 3),
+                "p95": round(percentile(self.latencies, 0.95) * 1000, 3),
+                "p99": round(percentile(self.latencies, 0.99) * 1000, 3),
+                "max": round(self.latencies[-1] * 1000, 3) if self.latencies else 0.0,
+            },
+        }
+
+
+class SaleLifecycleBenchmark:
+    """
+    Drives the services of demo.py (create_nft_services, open_sell, buy_nft, validate_buy) for many NFTs
+    concurrently. The client defaults to a LocalAlgod ledger.
+    """
+
+    def __init__(self, items: int = 100, workers: int = 8, client=None, batch_onboarding: bool = False,
+                 sell_price: int = 100000):
+        self.items = items
+        self.workers = workers
+        self.client = client or LocalAlgod()
+        self.batch_onboarding = batch_onboarding
+        self.sell_price = sell_price
+
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.buyer_pk, self.buyer_address = algo_acc.generate_account()
+        self.onboarding_pipeline = OnboardingPipeline(admin_pk=self.admin_pk,
+                                                      admin_address=self.admin_address,
+                                                      client=self.client)
+
+    def _run_phase(self, name: str, operation: Callable, arguments: List) -> (PhaseResult, List):
+        latencies = []
+        errors = []
+        results = []
+
+        def timed(argument):
+            started_at = time.perf_counter()
+            result = operation(argument)
+            return time.perf_counter() - started_at, result
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(timed, argument) for argument in arguments]
+            for future in futures:
+                try:
+                    latency, result = future.result()
+                    latencies.append(latency)
+                    results.append(result)
+                except Exception as e:
+                    errors.append(e)
+
+        return PhaseResult(name, latencies, errors, time.perf_counter() - started_at), results
+
+    def create_nft_services(self, item_id: int):
+        return self.onboarding_pipeline.onboard_one(unit_name="BENCH",
+                                                    asset_name=f"Benchmark-{item_id}",
+                                                    nft_url="QmYf24YppoPFyWe1aDNXjNMTqewAoJ4S4esucYNbR9dmoz")
+
+    def _create_phase(self) -> (PhaseResult, List):
+        if not self.batch_onboarding:
+            return self._run_phase("create_nft_services", self.create_nft_services, list(range(self.items)))
+
+        specs = [NFTSpec("BENCH", f"Benchmark-{item_id}") for item_id in range(self.items)]
+        started_at = time.perf_counter()
+        services = self.onboarding_pipeline.onboard(specs)
+        duration = time.perf_counter() - started_at
+        # The batch is confirmed as a whole, every item waits for all of it.
+        return PhaseResult("create_nft_services", [duration] * len(services), [], duration), services
+
+    def run(self) -> Dict[str, PhaseResult]:
+        phases = dict()
+
+        phases["create_nft_services"], services = self._create_phase()
+
+        phases["open_sell"], _ = self._run_phase(
+            "open_sell",
+            lambda service: service[0].open_sell(sell_price=self.sell_price, caller_pk=self.admin_pk),
+            services)
+
+        phases["opt_in"], _ = self._run_phase(
+            "opt_in", lambda service: service[1].opt_in(self.buyer_pk), services)
+
+        phases["buy_nft"], _ = self._run_phase(
+            "buy_nft",
+            lambda service: service[0].buy_nft(nft_owner_address=self.admin_address,
+                                               buyer_address=self.buyer_address,
+                                               buyer_pk=self.buyer_pk,
+                                               buy_price=self.sell_price),
+            services)
+
+        phases["validate_buy"], _ = self._run_phase(
+            "validate_buy", lambda service: service[0].validate_buy(buyer_pk=self.buyer_pk), services)
+
+        return phases
+
+    def report(self, phases: Dict[str, PhaseResult]) -> dict:
+        total_duration = sum(phase.duration for phase in phases.values())
+        completed_cycles = len(phases["validate_buy"].latencies)
+        report = {
+            "items": self.items,
+            "workers": self.workers,
+            "round_time_s": getattr(self.client, "round_time", None),
+            "total_duration_s": round(total_duration, 4),
+            "cycles_per_s": round(completed_cycles / total_duration, 2) if total_duration else 0.0,
+            "phases": {name: phase.as_dict() for name, phase in phases.items()},
+        }
+        if hasattr(self.client, "calls"):
+            report["algod_calls"] = dict(self.client.calls)
+        return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the NFT sale lifecycle.")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--round-time", type=float, default=0.0,
+                        help="seconds between two blocks of the local ledger, 0 to confirm right away")
+    parser.add_argument("--batch-onboarding", action="store_true",
+                        help="onboard all the NFTs as one batch instead of one create_nft_services call per NFT")
+    parser.add_argument("--timings", action="store_true",
+                        help="add the per-phase timings of the network interactions to the report")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    benchmark = SaleLifecycleBenchmark(items=args.items,
+                                       workers=args.workers,
+                                       client=LocalAlgod(round_time=args.round_time),
+                                       batch_onboarding=args.batch_onboarding)
+
+    if args.timings:
+        instrumentation.enable()
+
+    # The services print every confirmation, which would dominate the measures.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        phases = benchmark.run()
+
+    report = benchmark.report(phases)
+    if instrumentation.enabled:
+        report["timings"] = instrumentation.snapshot()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0 if all(not phase.errors for phase in phases.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
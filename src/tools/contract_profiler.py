@@ -0,0 +1,427 @@
+"""
+Static profiler of the pyteal contracts.
+
+Compiles the approval, clear and escrow programs and reports, as JSON, their size and, for every AppMethods
+entry of the applications, the opcode cost of the most expensive path and the global state accesses.
+A report can be compared against a stored baseline:
+
+    python -m src.tools.contract_profiler --output profile.json
+    python -m src.tools.contract_profiler --baseline profile.json
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pyteal import Mode, compileTeal
+
+from src.blockchain_utils.program_cache import get_pyteal_version
+
+
+APP_COST_LIMIT = 700
+APP_SIZE_LIMIT = 2048
+LOGICSIG_COST_LIMIT = 20000
+LOGICSIG_SIZE_LIMIT = 1000
+
+# Sample ids compiled in the escrow programs, large enough to take their real encoded size.
+SAMPLE_ID = 10 ** 9
+
+OPCODE_COSTS = {
+    "sha256": 35,
+    "keccak256": 130,
+    "sha512_256": 45,
+    "ed25519verify": 1900,
+    "ecdsa_verify": 1700,
+    "ecdsa_pk_decompress": 650,
+    "ecdsa_pk_recover": 2000,
+    "divmodw": 20,
+    "sqrt": 4,
+    "expw": 10,
+}
+
+# Encoded size of the opcodes with immediates, opcode byte included.
+OPCODE_SIZES = {
+    "txn": 2, "txna": 3, "gtxn": 3, "gtxna": 4, "gtxns": 2, "gtxnsa": 3, "global": 2,
+    "load": 2, "store": 2, "gload": 3, "gloads": 2, "arg": 2, "dig": 2, "cover": 2, "uncover": 2,
+    "asset_holding_get": 2, "asset_params_get": 2, "app_params_get": 2,
+    "substring": 3, "extract": 3, "b": 3, "bz": 3, "bnz": 3, "callsub": 3,
+    "itxn_field": 2, "itxn": 2, "itxna": 3, "txnas": 2, "gtxnas": 2,
+}
+
+NAMED_INTS = {
+    "NoOp": 0, "OptIn": 1, "CloseOut": 2, "ClearState": 3, "UpdateApplication": 4, "DeleteApplication": 5,
+    "unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6,
+}
+
+TERMINAL_OPCODES = ("return", "err", "retsub")
+
+GLOBAL_READS = ("app_global_get", "app_global_get_ex")
+GLOBAL_WRITES = ("app_global_put",)
+GLOBAL_DELETES = ("app_global_del",)
+INNER_TRANSACTIONS = ("itxn_submit",)
+
+
+class ProgramProfileError(Exception):
+    pass
+
+
+class TealInstruction:
+    def __init__(self, opcode: str, args: List[str]):
+        self.opcode = opcode
+        self.args = args
+
+    def __repr__(self):
+        return " ".join([self.opcode] + self.args)
+
+
+class TealProgram:
+    """
+    Parsed TEAL source: instructions and the index of every label.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.version = 1
+        self.instructions: List[TealInstruction] = []
+        self.labels: Dict[str, int] = dict()
+
+        for line in source.splitlines():
+            line = line.split("//", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("#pragma version"):
+                self.version = int(line.split()[-1])
+                continue
+            if line.endswith(":"):
+                self.labels[line[:-1]] = len(self.instructions)
+                continue
+
+            opcode, _, rest = line.partition(" ")
+            if opcode == "byte" and rest.startswith('"'):
+                args = [rest]
+            else:
+                args = rest.split()
+            self.instructions.append(TealInstruction(opcode, args))
+
+    @staticmethod
+    def _varuint_size(value: int) -> int:
+        size = 1
+        while value >= 0x80:
+            value >>= 7
+            size += 1
+        return size
+
+    @staticmethod
+    def _byte_constant(instruction: TealInstruction) -> bytes:
+        if instruction.opcode == "addr":
+            return b"\x00" * 32
+
+        value = instruction.args[-1]
+        if value.startswith('"'):
+            return json.loads(value).encode("utf-8")
+        if value.startswith("0x"):
+            return bytes.fromhex(value[2:])
+        # base64 / base32 encoded constants, only their length matters.
+        return b"\x00" * (len(value) * 3 // 4)
+
+    def _int_constant(self, instruction: TealInstruction) -> int:
+        value = instruction.args[0]
+        if value in NAMED_INTS:
+            return NAMED_INTS[value]
+        return int(value, 0)
+
+    def _constant_block_size(self, constants: Counter, constant_size: Callable) -> Tuple[int, Dict]:
+        """
+        Size of an intcblock/bytecblock and of the references to its constants, most used constants first.
+        """
+        if not constants:
+            return 0, dict()
+
+        block_size = 1 + self._varuint_size(len(constants))
+        reference_sizes = dict()
+        for index, (constant, _) in enumerate(constants.most_common()):
+            block_size += constant_size(constant)
+            reference_sizes[constant] = 1 if index < 4 else 2
+        return block_size, reference_sizes
+
+    def estimated_size(self) -> int:
+        """
+        Size of the assembled program, estimated the way the assembler lays out constants.
+        """
+        ints = Counter(self._int_constant(i) for i in self.instructions if i.opcode == "int")
+        byte_constants = Counter(self._byte_constant(i) for i in self.instructions if i.opcode in ("byte", "addr"))
+
+        int_block_size, int_references = self._constant_block_size(ints, self._varuint_size)
+        byte_block_size, byte_references = self._constant_block_size(
+            byte_constants, lambda value: self._varuint_size(len(value)) + len(value)
+        )
+
+        size = self._varuint_size(self.version) + int_block_size + byte_block_size
+        for instruction in self.instructions:
+            if instruction.opcode == "int":
+                size += int_references[self._int_constant(instruction)]
+            elif instruction.opcode in ("byte", "addr"):
+                size += byte_references[self._byte_constant(instruction)]
+            elif instruction.opcode == "pushint":
+                size += 1 + self._varuint_size(int(instruction.args[0], 0))
+            elif instruction.opcode == "pushbytes":
+                value = self._byte_constant(instruction)
+                size += 1 + self._varuint_size(len(value)) + len(value)
+            else:
+                size += OPCODE_SIZES.get(instruction.opcode, 1)
+        return size
+
+    def _successors(self, pc: int) -> List[int]:
+        instruction = self.instructions[pc]
+        if instruction.opcode in TERMINAL_OPCODES:
+            return []
+        if instruction.opcode == "b":
+            return [self.labels[instruction.args[0]]]
+        if instruction.opcode in ("bz", "bnz"):
+            return [self.labels[instruction.args[0]], pc + 1]
+        return [pc + 1] if pc + 1 < len(self.instructions) else []
+
+    def max_cost(self, pc: int = 0) -> int:
+        """
+        Opcode cost of the most expensive path from pc to the end of the program (or of the subroutine).
+        Raises ProgramProfileError on loops, whose cost can not be bounded statically.
+        """
+        memo: Dict[int, int] = dict()
+        in_progress = set()
+
+        def cost_from(start: int) -> int:
+            if start in memo:
+                return memo[start]
+            if start in in_progress:
+                raise ProgramProfileError(f"Loop at instruction {start}, the cost is not bounded.")
+            in_progress.add(start)
+
+            instruction = self.instructions[start]
+            cost = OPCODE_COSTS.get(instruction.opcode, 1)
+            if instruction.opcode == "callsub":
+                cost += cost_from(self.labels[instruction.args[0]])
+            successors = self._successors(start)
+            if successors:
+                cost += max(cost_from(successor) for successor in successors)
+
+            in_progress.discard(start)
+            memo[start] = cost
+            return cost
+
+        return cost_from(pc)
+
+    def reachable(self, pc: int = 0) -> List[int]:
+        seen = set()
+        stack = [pc]
+        while stack:
+            current = stack.pop()
+            if current in seen or current >= len(self.instructions):
+                continue
+            seen.add(current)
+            instruction = self.instructions[current]
+            if instruction.opcode == "callsub":
+                stack.append(self.labels[instruction.args[0]])
+            stack.extend(self._successors(current))
+        return sorted(seen)
+
+    def state_accesses(self, pcs: List[int]) -> Dict[str, int]:
+        opcodes = Counter(self.instructions[pc].opcode for pc in pcs)
+        return {
+            "global_reads": sum(opcodes[opcode] for opcode in GLOBAL_READS),
+            "global_writes": sum(opcodes[opcode] for opcode in GLOBAL_WRITES),
+            "global_deletes": sum(opcodes[opcode] for opcode in GLOBAL_DELETES),
+            "inner_transactions": sum(opcodes[opcode] for opcode in INNER_TRANSACTIONS),
+        }
+
+    def method_entries(self, method_names: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        Follows the dispatch of the approval program (the Cond of application_start) without taking
+        any branch, and finds the branch of every method.
+        :return:
+            Method name -> (cost of the dispatch before the branch, first instruction of the method).
+            The creation branch is reported as "create".
+        """
+        entries = dict()
+        dispatch_cost = 0
+        pc = 0
+        while pc < len(self.instructions):
+            instruction = self.instructions[pc]
+            dispatch_cost += OPCODE_COSTS.get(instruction.opcode, 1)
+
+            if instruction.opcode == "bnz" and pc >= 3:
+                compared, equals = self.instructions[pc - 2], self.instructions[pc - 1]
+                subject = self.instructions[pc - 3]
+                target = self.labels[instruction.args[0]]
+                if equals.opcode == "==" and compared.opcode == "byte" and subject.opcode == "txna":
+                    method_name = json.loads(compared.args[0]) if compared.args[0].startswith('"') else None
+                    if method_name in method_names:
+                        entries[method_name] = (dispatch_cost, target)
+                elif equals.opcode == "==" and subject.opcode == "txn" and subject.args == ["ApplicationID"]:
+                    entries["create"] = (dispatch_cost, target)
+
+            if instruction.opcode in TERMINAL_OPCODES or instruction.opcode == "b":
+                break
+            pc += 1
+        return entries
+
+
+def _program_report(program: TealProgram, compiled_size: Optional[int]) -> dict:
+    reachable = program.reachable()
+    report = {
+        "size": compiled_size if compiled_size is not None else program.estimated_size(),
+        "size_source": "algod" if compiled_size is not None else "estimate",
+        "max_cost": program.max_cost(),
+        "instructions": len(program.instructions),
+    }
+    report.update(program.state_accesses(reachable))
+    return report
+
+
+def _method_reports(program: TealProgram, method_names: List[str]) -> dict:
+    reports = dict()
+    for method_name, (dispatch_cost, entry) in sorted(program.method_entries(method_names).items()):
+        report = {"cost": dispatch_cost + program.max_cost(entry)}
+        report.update(program.state_accesses(program.reachable(entry)))
+        reports[method_name] = report
+
+    for method_name in method_names:
+        if method_name not in reports:
+            reports[method_name] = {"error": "Branch not found in the approval program."}
+    return reports
+
+
+class ContractProfiler:
+    """
+    Profiles the contracts of the marketplace. Sizes are estimated offline, or read from algod when a
+    client is given.
+    """
+
+    def __init__(self, teal_version: int = 4, client=None):
+        self.teal_version = teal_version
+        self.client = client
+
+    def _compiled_size(self, source: str) -> Optional[int]:
+        if self.client is None:
+            return None
+
+        from src.services import NetworkInteraction
+        return len(NetworkInteraction.compile_program_cached(self.client, source, teal_version=self.teal_version))
+
+    def profile_application(self, contract) -> dict:
+        approval_source = compileTeal(contract.approval_program(), mode=Mode.Application, version=self.teal_version)
+        clear_source = compileTeal(contract.clear_program(), mode=Mode.Application, version=self.teal_version)
+
+        approval_program = TealProgram(approval_source)
+        clear_program = TealProgram(clear_source)
+
+        method_names = [value for name, value in vars(contract.AppMethods).items() if not name.startswith("_")]
+
+        approval = _program_report(approval_program, self._compiled_size(approval_source))
+        clear = _program_report(clear_program, self._compiled_size(clear_source))
+        return {
+            "approval": approval,
+            "clear": clear,
+            "total_size": approval["size"] + clear["size"],
+            "size_limit": APP_SIZE_LIMIT,
+            "cost_limit": APP_COST_LIMIT,
+            "methods": _method_reports(approval_program, method_names),
+        }
+
+    def profile_logicsig(self, program) -> dict:
+        source = compileTeal(program, mode=Mode.Signature, version=self.teal_version)
+        return {
+            "logicsig": _program_report(TealProgram(source), self._compiled_size(source)),
+            "size_limit": LOGICSIG_SIZE_LIMIT,
+            "cost_limit": LOGICSIG_COST_LIMIT,
+        }
+
+    def profile(self) -> dict:
+        from src.smart_contracts import NFTMarketplaceASC1, NFTMultiMarketplaceASC1, nft_escrow, nft_multi_escrow
+
+        contracts = {
+            "nft_marketplace": lambda: self.profile_application(NFTMarketplaceASC1()),
+            "nft_multi_marketplace": lambda: self.profile_application(NFTMultiMarketplaceASC1()),
+            "nft_escrow": lambda: self.profile_logicsig(nft_escrow(app_id=SAMPLE_ID, asa_id=SAMPLE_ID)),
+            "nft_multi_escrow": lambda: self.profile_logicsig(nft_multi_escrow(app_id=SAMPLE_ID)),
+        }
+
+        reports = dict()
+        for contract_name, profile_contract in contracts.items():
+            try:
+                reports[contract_name] = profile_contract()
+            except Exception as e:
+                # e.g. contracts using opcodes the installed pyteal can not compile.
+                reports[contract_name] = {"error": f"{type(e).__name__}: {e}"}
+
+        return {
+            "pyteal_version": get_pyteal_version(),
+            "teal_version": self.teal_version,
+            "contracts": reports,
+        }
+
+
+def _flatten_metrics(report: dict, prefix: str = "") -> Dict[str, int]:
+    metrics = dict()
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(_flatten_metrics(value, path))
+        elif isinstance(value, int) and not isinstance(value, bool) and not key.endswith("_limit"):
+            metrics[path] = value
+    return metrics
+
+
+def compare_reports(report: dict, baseline: dict) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    :return:
+        (metric, baseline value, current value) of every metric which differs from the baseline.
+    """
+    current_metrics = _flatten_metrics(report.get("contracts", dict()))
+    baseline_metrics = _flatten_metrics(baseline.get("contracts", dict()))
+
+    return [
+        (metric, baseline_metrics.get(metric), current_metrics.get(metric))
+        for metric in sorted(set(current_metrics) | set(baseline_metrics))
+        if current_metrics.get(metric) != baseline_metrics.get(metric)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Static cost and size profile of the marketplace contracts.")
+    parser.add_argument("--teal-version", type=int, default=4)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--algod", action="store_true", help="read the program sizes from algod")
+    args = parser.parse_args(argv)
+
+    client = None
+    if args.algod:
+        from src.blockchain_utils.credentials import get_algo_client
+        client = get_algo_client()
+
+    report = ContractProfiler(teal_version=args.teal_version, client=client).profile()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        differences = compare_reports(report, baseline)
+        regressions = [(metric, old, new) for metric, old, new in differences
+                       if old is not None and new is not None and new > old]
+        for metric, old, new in differences:
+            print(f"{metric}: {old} -> {new}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
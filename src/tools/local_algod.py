@@ -0,0 +1,211 @@
+import base64
+import hashlib
+import threading
+import time
+from typing import Dict, List
+
+from algosdk import encoding, error, logic
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SuggestedParams
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+
+GENESIS_ID = "local-v1"
+GENESIS_HASH = base64.b64encode(hashlib.sha256(GENESIS_ID.encode()).digest()).decode()
+CONSENSUS_VERSION = "local"
+MIN_FEE = 1000
+
+
+class LocalAlgod:
+    """
+    In-process stand-in for algod.AlgodClient, for benchmarks and offline runs of the services.
+    Transactions are accepted without running their programs, and confirmed in the next block. Blocks are
+    produced every round_time seconds, or, with a round_time of 0, as soon as a transaction is sent.
+    """
+
+    def __init__(self, round_time: float = 0.0, first_round: int = 1, verify_signatures: bool = False):
+        """
+        :param round_time: seconds between two blocks, 0 to confirm every submission right away.
+        :param first_round: round of the ledger when it starts.
+        :param verify_signatures: checks the ed25519 signature of the transactions signed with a private key.
+        """
+        self.round_time = round_time
+        self.verify_signatures = verify_signatures
+
+        self._lock = threading.Condition()
+        self._round = first_round
+        self._round_started_at = time.monotonic()
+        self._next_id = 1
+
+        self._pending: List[dict] = []
+        self._transactions: Dict[str, dict] = dict()
+        self._applications: Dict[int, dict] = dict()
+        self.calls: Dict[str, int] = dict()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _advance(self):
+        """
+        Produces the blocks due since the last call, must be called with the lock held.
+        """
+        if self.round_time <= 0:
+            return
+
+        elapsed_rounds = int((time.monotonic() - self._round_started_at) / self.round_time)
+        for _ in range(elapsed_rounds):
+            self._produce_block()
+        self._round_started_at += elapsed_rounds * self.round_time
+
+    def _produce_block(self):
+        self._round += 1
+        for txinfo in self._pending:
+            txinfo["confirmed-round"] = self._round
+        self._pending = []
+        self._lock.notify_all()
+
+    def _verify(self, signed_txn):
+        if not self.verify_signatures or not isinstance(signed_txn, algo_txn.SignedTransaction):
+            return
+
+        signer = signed_txn.authorizing_address or signed_txn.transaction.sender
+        message = b"TX" + base64.b64decode(encoding.msgpack_encode(signed_txn.transaction))
+        try:
+            VerifyKey(encoding.decode_address(signer)).verify(message, base64.b64decode(signed_txn.signature))
+        except BadSignatureError:
+            raise error.AlgodHTTPError(f"transaction {signed_txn.get_txid()}: invalid signature", 400)
+
+    def _check(self, signed_txn):
+        txn = signed_txn.transaction
+        txid = signed_txn.get_txid()
+        if txid in self._transactions:
+            raise error.AlgodHTTPError(f"transaction already in ledger: {txid}", 400)
+        if txn.last_valid_round < self._round + 1 or txn.first_valid_round > self._round + 1:
+            raise error.AlgodHTTPError(
+                f"transaction {txid}: txn dead: round {self._round + 1} outside of "
+                f"{txn.first_valid_round}--{txn.last_valid_round}", 400
+            )
+        if txn.genesis_hash != GENESIS_HASH:
+            raise error.AlgodHTTPError(f"transaction {txid}: genesis hash mismatch", 400)
+        self._verify(signed_txn)
+
+    def _apply(self, signed_txn) -> dict:
+        txn = signed_txn.transaction
+        txinfo = {"confirmed-round": 0, "pool-error": "", "txn": {"sig": getattr(signed_txn, "signature", None)}}
+
+        if isinstance(txn, algo_txn.AssetConfigTxn) and not txn.index:
+            txinfo["asset-index"] = self._next_id
+            self._next_id += 1
+        elif isinstance(txn, algo_txn.ApplicationCallTxn) and not txn.index:
+            app_id = self._next_id
+            self._next_id += 1
+            txinfo["application-index"] = app_id
+            self._applications[app_id] = {
+                "id": app_id,
+                "params": {
+                    "creator": txn.sender,
+                    "approval-program": base64.b64encode(txn.approval_program).decode(),
+                    "clear-state-program": base64.b64encode(txn.clear_program).decode(),
+                    "global-state": [],
+                },
+            }
+
+        self._transactions[signed_txn.get_txid()] = txinfo
+        self._pending.append(txinfo)
+        return txinfo
+
+    def _submit(self, signed_txns: List) -> str:
+        with self._lock:
+            self._advance()
+
+            group_ids = {signed_txn.transaction.group for signed_txn in signed_txns}
+            if len(signed_txns) > 1 and (len(group_ids) != 1 or None in group_ids):
+                raise error.AlgodHTTPError("transactions sent together must share a group id", 400)
+
+            for signed_txn in signed_txns:
+                self._check(signed_txn)
+            for signed_txn in signed_txns:
+                self._apply(signed_txn)
+
+            if self.round_time <= 0:
+                self._produce_block()
+
+            return signed_txns[0].get_txid()
+
+    def send_transaction(self, txn, **kwargs) -> str:
+        self._count("send_transaction")
+        return self._submit([txn])
+
+    def send_transactions(self, txns, **kwargs) -> str:
+        self._count("send_transactions")
+        return self._submit(list(txns))
+
+    def pending_transaction_info(self, transaction_id: str, **kwargs) -> dict:
+        self._count("pending_transaction_info")
+        with self._lock:
+            self._advance()
+            txinfo = self._transactions.get(transaction_id)
+            if txinfo is None:
+                raise error.AlgodHTTPError("txn does not exist", 404)
+            return dict(txinfo)
+
+    def status(self, **kwargs) -> dict:
+        self._count("status")
+        with self._lock:
+            self._advance()
+            return {"last-round": self._round, "time-since-last-round": 0}
+
+    def status_after_block(self, block_num: int, **kwargs) -> dict:
+        """
+        Blocks until a block after block_num is produced.
+        """
+        self._count("status_after_block")
+        with self._lock:
+            self._advance()
+            if self.round_time <= 0:
+                while self._round <= block_num:
+                    self._produce_block()
+            while self._round <= block_num:
+                self._lock.wait(timeout=self.round_time)
+                self._advance()
+            return {"last-round": self._round, "time-since-last-round": 0}
+
+    def suggested_params(self, **kwargs) -> SuggestedParams:
+        self._count("suggested_params")
+        with self._lock:
+            self._advance()
+            return SuggestedParams(0, self._round, self._round + 1000, GENESIS_HASH, GENESIS_ID,
+                                   False, CONSENSUS_VERSION, MIN_FEE)
+
+    def compile(self, source: str, **kwargs) -> dict:
+        """
+        Returns a valid placeholder program (a pushbytes of the source hash) for the TEAL version of the source,
+        so that equal sources get equal programs and logic sig addresses.
+        """
+        self._count("compile")
+        teal_version = 1
+        first_line = source.lstrip().split("\n", 1)[0]
+        if first_line.startswith("#pragma version"):
+            teal_version = int(first_line.split()[-1])
+
+        program = bytes([teal_version, 0x80, 32]) + hashlib.sha256(source.encode()).digest()
+        return {
+            "hash": logic.address(program),
+            "result": base64.b64encode(program).decode(),
+        }
+
+    def application_info(self, application_id: int, **kwargs) -> dict:
+        self._count("application_info")
+        with self._lock:
+            application = self._applications.get(application_id)
+            if application is None:
+                raise error.AlgodHTTPError("application does not exist", 404)
+            return application
+
+    @property
+    def last_round(self) -> int:
+        with self._lock:
+            self._advance()
+            return self._round
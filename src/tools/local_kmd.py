@@ -0,0 +1,81 @@
+import secrets
+import threading
+from typing import Dict, List, Optional
+
+from algosdk import account as algo_acc
+from algosdk import error
+from algosdk.future.transaction import SignedTransaction, Transaction
+
+
+class LocalKMD:
+    """
+    In-process stand-in for kmd.KMDClient, for benchmarks and offline runs of the KMDSigner.
+    Only the wallet and signing methods used by the signer are provided. The keys are kept in memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wallets: Dict[str, dict] = dict()
+        self._handles: Dict[str, str] = dict()
+        self.calls: Dict[str, int] = dict()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _wallet(self, handle: str) -> dict:
+        wallet_id = self._handles.get(handle)
+        if wallet_id is None:
+            raise error.KMDHTTPError("invalid wallet handle")
+        return self._wallets[wallet_id]
+
+    def create_wallet(self, name: str, pswd: str, **kwargs) -> dict:
+        self._count("create_wallet")
+        wallet_id = secrets.token_hex(16)
+        with self._lock:
+            self._wallets[wallet_id] = {"id": wallet_id, "name": name, "password": pswd, "keys": dict()}
+        return {"id": wallet_id, "name": name}
+
+    def init_wallet_handle(self, id: str, password: str) -> str:
+        self._count("init_wallet_handle")
+        with self._lock:
+            wallet = self._wallets.get(id)
+            if wallet is None or wallet["password"] != password:
+                raise error.KMDHTTPError("wrong password or unknown wallet")
+            handle = secrets.token_hex(16)
+            self._handles[handle] = id
+        return handle
+
+    def release_wallet_handle(self, handle: str) -> bool:
+        self._count("release_wallet_handle")
+        with self._lock:
+            self._handles.pop(handle, None)
+        return True
+
+    def import_key(self, handle: str, private_key: str) -> str:
+        self._count("import_key")
+        address = algo_acc.address_from_private_key(private_key)
+        with self._lock:
+            self._wallet(handle)["keys"][address] = private_key
+        return address
+
+    def generate_key(self, handle: str, display_mnemonic: bool = True) -> str:
+        private_key, _ = algo_acc.generate_account()
+        return self.import_key(handle, private_key)
+
+    def list_keys(self, handle: str) -> List[str]:
+        self._count("list_keys")
+        with self._lock:
+            return list(self._wallet(handle)["keys"])
+
+    def sign_transaction(self, handle: str, password: str, txn: Transaction,
+                         signing_address: Optional[str] = None) -> SignedTransaction:
+        self._count("sign_transaction")
+        with self._lock:
+            wallet = self._wallet(handle)
+            if wallet["password"] != password:
+                raise error.KMDHTTPError("wrong password")
+            private_key = wallet["keys"].get(signing_address or txn.sender)
+        if private_key is None:
+            raise error.KMDHTTPError("key does not exist in this wallet")
+        return txn.sign(private_key)
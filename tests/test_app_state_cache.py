@@ -0,0 +1,95 @@
+import base64
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk.encoding import decode_address
+
+from src.repository.app_state_cache import AppGlobalState, AppStateCache
+
+
+class FakeIndexer:
+    """
+    Indexer lagging behind the network: the queued updates are only indexed once its health is polled.
+    """
+
+    def __init__(self, app_id: int, price: int, current_round: int):
+        self.app_id = app_id
+        self.price = price
+        self.current_round = current_round
+        self.pending_update = None
+        self.searches = 0
+
+    def health(self):
+        if self.pending_update is not None:
+            self.price, self.current_round = self.pending_update
+            self.pending_update = None
+        return {"round": self.current_round}
+
+    def search_applications(self, application_id: int):
+        self.searches += 1
+        global_state = [{"key": base64.b64encode(b"ASA_PRICE").decode(),
+                         "value": {"type": 2, "uint": self.price}}]
+        return {"current-round": self.current_round,
+                "applications": [{"id": application_id, "params": {"global-state": global_state}}]}
+
+
+class AppStateCacheTest(unittest.TestCase):
+
+    def test_get_reads_own_writes_after_invalidation(self):
+        indexer = FakeIndexer(app_id=1, price=100, current_round=100)
+        cache = AppStateCache(indexer=indexer)
+        self.assertEqual(cache.get(1).asa_price, 100)
+
+        # Our transaction changed the price in round 105, the indexer catches up a moment later.
+        indexer.pending_update = (200, 105)
+        cache.invalidate(1, confirmed_round=105)
+
+        state = cache.get(1)
+        self.assertEqual(state.asa_price, 200)
+        self.assertEqual(state.round, 105)
+
+        searches = indexer.searches
+        for _ in range(3):
+            self.assertEqual(cache.get(1).asa_price, 200)
+        self.assertEqual(indexer.searches, searches)
+
+    def test_observed_rounds_expire_old_entries(self):
+        indexer = FakeIndexer(app_id=1, price=100, current_round=100)
+        cache = AppStateCache(indexer=indexer, max_age_rounds=10)
+        cache.get(1)
+
+        cache.observe_round(105)
+        cache.get(1)
+        self.assertEqual(indexer.searches, 1)
+
+        indexer.current_round = 120
+        cache.observe_round(120)
+        self.assertEqual(cache.get(1).round, 120)
+        self.assertEqual(indexer.searches, 2)
+
+
+
+class AppGlobalStateTest(unittest.TestCase):
+
+    def test_state_is_a_mapping_of_the_decoded_values(self):
+        _, owner = algo_acc.generate_account()
+        global_state = [
+            {"key": base64.b64encode(b"ASA_PRICE").decode(), "value": {"type": 2, "uint": 100}},
+            {"key": base64.b64encode(b"ASA_OWNER").decode(),
+             "value": {"type": 1, "bytes": base64.b64encode(decode_address(owner)).decode()}},
+            {"key": base64.b64encode((7).to_bytes(8, "big")).decode(),
+             "value": {"type": 1, "bytes": base64.b64encode(b"record").decode()}},
+        ]
+
+        state = AppGlobalState.from_global_state(1, global_state, round=10)
+
+        self.assertEqual(dict(state), {"ASA_PRICE": 100, "ASA_OWNER": owner, (7).to_bytes(8, "big"): b"record"})
+        self.assertEqual(len(state), 3)
+        self.assertEqual(sorted(key for key in state.keys() if isinstance(key, str)), ["ASA_OWNER", "ASA_PRICE"])
+        self.assertIn(100, state.values())
+        self.assertEqual(state.get("ASA_ID"), None)
+        self.assertEqual((state.asa_price, state.asa_owner), (100, owner))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from algosdk import account as algo_acc
+
+from src.blockchain_utils.async_clients import AsyncClientAdapter
+from src.services.async_nft_marketplace import AsyncNFTMarketplace
+from src.services.async_nft_service import AsyncNFTService
+from src.services.nft_marketplace import NFTMarketplace
+from src.services.nft_service import NFTService
+from src.tools.local_algod import LocalAlgod
+
+
+class AsyncServicesTest(unittest.TestCase):
+
+    def test_async_services_are_not_blocking_services(self):
+        self.assertFalse(issubclass(AsyncNFTMarketplace, NFTMarketplace))
+        self.assertFalse(issubclass(AsyncNFTService, NFTService))
+
+    def test_sale_flow_against_local_algod(self):
+        local_algod = LocalAlgod(verify_signatures=True)
+        client = AsyncClientAdapter(local_algod)
+        admin_pk, admin_address = algo_acc.generate_account()
+        buyer_pk, buyer_address = algo_acc.generate_account()
+
+        async def sale_flow():
+            nft_service = AsyncNFTService(nft_creator_address=admin_address,
+                                          nft_creator_pk=admin_pk,
+                                          client=client,
+                                          unit_name="TEST",
+                                          asset_name="Test NFT")
+            await nft_service.create_nft()
+
+            nft_marketplace = AsyncNFTMarketplace(admin_pk=admin_pk,
+                                                  admin_address=admin_address,
+                                                  nft_id=nft_service.nft_id,
+                                                  client=client)
+            await nft_marketplace.app_initialization(nft_owner_address=admin_address)
+            await nft_marketplace.setup_escrow(nft_service)
+            await nft_marketplace.open_sell(sell_price=100000, caller_pk=admin_pk)
+            await nft_service.opt_in(buyer_pk)
+            await nft_marketplace.buy_nft(nft_owner_address=admin_address,
+                                          buyer_address=buyer_address,
+                                          buyer_pk=buyer_pk,
+                                          buy_price=100000)
+            return nft_service, nft_marketplace
+
+        nft_service, nft_marketplace = asyncio.run(sale_flow())
+        self.assertIsNotNone(nft_service.nft_id)
+        self.assertIn(nft_marketplace.app_id, local_algod._applications)
+        self.assertEqual(local_algod.calls["send_transactions"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.batch_signer import BatchSigner
+from src.blockchain_utils.signer import AccountSigner, Signer
+from src.tools.local_algod import LocalAlgod
+
+
+class RecordingSigner(Signer):
+    """
+    Signer which cannot be shipped to a worker process, recording what it signed.
+    """
+
+    def __init__(self, private_key: str):
+        self._account_signer = AccountSigner(private_key)
+        self.address = self._account_signer.address
+        self.signed = []
+
+    def sign(self, transaction):
+        self.signed.append(transaction)
+        return self._account_signer.sign(transaction)
+
+
+class BatchSignerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.params = LocalAlgod(first_round=10).suggested_params()
+        self.accounts = [algo_acc.generate_account() for _ in range(2)]
+        self.signer = BatchSigner(max_workers=2, chunk_size=16)
+
+    def tearDown(self):
+        self.signer.close()
+
+    def _payments(self, count: int):
+        """
+        :return:
+            Payments alternating between the senders, with the private key signing each one.
+        """
+        transactions, private_keys = [], []
+        for index in range(count):
+            private_key, address = self.accounts[index % len(self.accounts)]
+            transactions.append(algo_txn.PaymentTxn(sender=address, sp=self.params, receiver=address, amt=index))
+            private_keys.append(private_key)
+        return transactions, private_keys
+
+    def _assert_signed_like_the_sdk(self, transactions, private_keys, signed_transactions):
+        self.assertEqual(len(signed_transactions), len(transactions))
+        for txn, private_key, signed_txn in zip(transactions, private_keys, signed_transactions):
+            self.assertIs(signed_txn.transaction, txn)
+            self.assertEqual(encoding.msgpack_encode(signed_txn), encoding.msgpack_encode(txn.sign(private_key)))
+
+    def test_large_batch_is_signed_in_the_pool(self):
+        transactions, private_keys = self._payments(100)
+
+        signed_transactions = self.signer.sign(transactions, private_keys)
+
+        self.assertIsNotNone(self.signer._executor)
+        self._assert_signed_like_the_sdk(transactions, private_keys, signed_transactions)
+        self.assertEqual([signed_txn.transaction.amt for signed_txn in signed_transactions], list(range(100)))
+
+    def test_small_batch_is_signed_on_the_calling_thread(self):
+        transactions, private_keys = self._payments(self.signer.min_batch_size - 1)
+
+        signed_transactions = self.signer.sign(transactions, private_keys)
+
+        self.assertIsNone(self.signer._executor)
+        self._assert_signed_like_the_sdk(transactions, private_keys, signed_transactions)
+
+    def test_account_signers_are_shipped_to_the_pool(self):
+        transactions, private_keys = self._payments(80)
+
+        signed_transactions = self.signer.sign(transactions, [AccountSigner(key) for key in private_keys])
+
+        self.assertIsNotNone(self.signer._executor)
+        self._assert_signed_like_the_sdk(transactions, private_keys, signed_transactions)
+
+    def test_other_signers_sign_on_the_calling_thread(self):
+        transactions, private_keys = self._payments(80)
+        signers = {private_key: RecordingSigner(private_key) for private_key, _ in self.accounts}
+
+        signed_transactions = self.signer.sign(transactions, [signers[key] for key in private_keys])
+
+        self.assertIsNone(self.signer._executor)
+        self.assertEqual(sum(len(signer.signed) for signer in signers.values()), 80)
+        self._assert_signed_like_the_sdk(transactions, private_keys, signed_transactions)
+
+    def test_rekeyed_sender_is_authorized_by_the_signing_key(self):
+        transactions, _ = self._payments(70)
+        rekeyed_pk, rekeyed_address = algo_acc.generate_account()
+
+        signed_transactions = self.signer.sign(transactions, [rekeyed_pk] * len(transactions))
+
+        self.assertTrue(all(signed_txn.authorizing_address == rekeyed_address
+                            for signed_txn in signed_transactions))
+        self._assert_signed_like_the_sdk(transactions, [rekeyed_pk] * len(transactions), signed_transactions)
+
+    def test_sign_group_assigns_one_group_id(self):
+        transactions, private_keys = self._payments(16)
+        group_id = algo_txn.calculate_group_id(transactions)
+
+        signed_transactions = self.signer.sign_group(transactions, private_keys)
+
+        self.assertEqual({signed_txn.transaction.group for signed_txn in signed_transactions}, {group_id})
+        self._assert_signed_like_the_sdk(transactions, private_keys, signed_transactions)
+
+    def test_a_key_is_needed_for_every_transaction(self):
+        transactions, private_keys = self._payments(3)
+
+        with self.assertRaises(ValueError):
+            self.signer.sign(transactions, private_keys[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+from src import cli
+
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the read-only commands against stubbed repositories, then reports the modules they loaded.
+READ_ONLY_COMMANDS_SCRIPT = """
+import json
+import sys
+
+from src import cli
+from src.repository.app_state_cache import AppGlobalState
+from src.repository.marketplace_repository import NFTMarketplaceRepository
+from src.repository.nft_repository import NFTRepository
+
+NFTMarketplaceRepository.load_app_state = staticmethod(
+    lambda app_id, fresh=False: AppGlobalState(app_id, {"ASA_PRICE": 100}, round=10))
+NFTRepository.__init__ = lambda self: None
+NFTRepository.nft_owner = lambda self, nft_id: "OWNER"
+
+codes = [cli.main(["state", "7"]), cli.main(["owner", "5"])]
+print(json.dumps({"codes": codes, "pyteal": "pyteal" in sys.modules}))
+"""
+
+
+class ParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = cli.build_parser()
+
+    def test_list_arguments(self):
+        args = self.parser.parse_args(["list", "12", "1000000"])
+        self.assertEqual((args.handler, args.app_id, args.price, args.account),
+                         (cli.list_nft, 12, 1000000, cli.ADMIN_ACCOUNT_ID))
+
+    def test_buy_defaults_to_the_buyer_and_the_sell_price(self):
+        args = self.parser.parse_args(["buy", "12"])
+        self.assertEqual((args.handler, args.price, args.skip_opt_in, args.account),
+                         (cli.buy, None, False, cli.BUYER_ACCOUNT_ID))
+
+        args = self.parser.parse_args(["buy", "12", "--price", "5", "--skip-opt-in", "--account", "3"])
+        self.assertEqual((args.price, args.skip_opt_in, args.account), (5, True, 3))
+
+    def test_mint_arguments(self):
+        args = self.parser.parse_args(["mint", "MAN2@C1", "Manufacturer2@collection1-1", "--url", "cid"])
+        self.assertEqual((args.handler, args.unit_name, args.asset_name, args.url),
+                         (cli.mint, "MAN2@C1", "Manufacturer2@collection1-1", "cid"))
+
+    def test_invalid_commands_exit(self):
+        for argv in ([], ["sell", "1"], ["state", "not-an-id"], ["list", "12"]):
+            with self.subTest(argv=argv), redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                self.parser.parse_args(argv)
+
+
+class MainTest(unittest.TestCase):
+
+    def _main(self, argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = cli.main(argv)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_result_is_printed_as_json(self):
+        with mock.patch.object(cli, "owner", return_value={"nft_id": 5, "owner": "OWNER"}):
+            code, stdout, stderr = self._main(["owner", "5"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stdout), {"nft_id": 5, "owner": "OWNER"})
+        self.assertEqual(stderr, "")
+
+    def test_failure_is_written_to_stderr(self):
+        with mock.patch.object(cli, "state", side_effect=ConnectionError("indexer unreachable")):
+            code, stdout, stderr = self._main(["state", "7"])
+
+        self.assertEqual(code, 1)
+        self.assertEqual(stdout, "")
+        self.assertEqual(stderr, "state failed: ConnectionError: indexer unreachable\n")
+
+
+class ReadOnlyCommandsTest(unittest.TestCase):
+
+    def test_read_only_commands_do_not_load_pyteal(self):
+        output = subprocess.run([sys.executable, "-c", READ_ONLY_COMMANDS_SCRIPT], cwd=ROOT_DIRECTORY,
+                                capture_output=True, text=True, check=True).stdout
+
+        report = json.loads(output.splitlines()[-1])
+        self.assertEqual(report, {"codes": [0, 0], "pyteal": False})
+        self.assertIn('"global_state"', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
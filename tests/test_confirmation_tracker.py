@@ -0,0 +1,138 @@
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk.future import transaction as algo_txn
+
+from src.services.confirmation_tracker import (ConfirmationTracker, TransactionExpiredError,
+                                               TransactionRejectedError)
+from src.services.network_interaction import NetworkInteraction
+from src.tools.local_algod import LocalAlgod
+
+
+class LockCheckingAlgod(LocalAlgod):
+    """
+    LocalAlgod recording whether the lock of the tracker was held during a status call.
+    """
+
+    tracker = None
+    status_under_lock = False
+
+    def status(self, **kwargs) -> dict:
+        if self.tracker is not None:
+            if self.tracker._lock.acquire(blocking=False):
+                self.tracker._lock.release()
+            else:
+                self.status_under_lock = True
+        return super().status(**kwargs)
+
+
+class FlakyAlgod(LocalAlgod):
+    """
+    LocalAlgod failing the first pending_transaction_info calls, and answering a pool error for the rejected txids.
+    """
+
+    def __init__(self, failures: int = 0, rejected=(), **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.rejected = set(rejected)
+
+    def pending_transaction_info(self, transaction_id: str, **kwargs) -> dict:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        if transaction_id in self.rejected:
+            return {"confirmed-round": 0, "pool-error": "overspend"}
+        return super().pending_transaction_info(transaction_id, **kwargs)
+
+
+class ConfirmationTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sender_pk, self.sender_address = algo_acc.generate_account()
+
+    def _send_payment(self, client: LocalAlgod, note: bytes = b"") -> algo_txn.SignedTransaction:
+        txn = algo_txn.PaymentTxn(sender=self.sender_address, sp=client.suggested_params(),
+                                  receiver=self.sender_address, amt=0, note=note)
+        signed_txn = txn.sign(self.sender_pk)
+        client.send_transaction(signed_txn)
+        return signed_txn
+
+    def test_wait_resolves_many_transactions(self):
+        client = LocalAlgod(first_round=10)
+        tracker = ConfirmationTracker(client)
+        signed_txns = [self._send_payment(client, note=bytes([index])) for index in range(3)]
+
+        txinfos = tracker.wait([signed_txn.get_txid() for signed_txn in signed_txns])
+
+        self.assertEqual(len(txinfos), 3)
+        self.assertTrue(all(txinfo["confirmed-round"] > 10 for txinfo in txinfos))
+
+    def test_unknown_transaction_expires_after_its_last_valid_round(self):
+        client = LocalAlgod(first_round=10)
+        tracker = ConfirmationTracker(client)
+
+        future = tracker.track("NEVERSENT", last_valid_round=12)
+        tracker.settle()
+
+        self.assertIsInstance(future.exception(), TransactionExpiredError)
+        self.assertEqual(future.exception().last_valid_round, 12)
+        self.assertEqual(client.last_round, 13)
+
+    def test_pool_error_rejects_the_transaction(self):
+        client = FlakyAlgod(rejected={"REJECTED"}, first_round=10)
+        tracker = ConfirmationTracker(client)
+
+        future = tracker.track("REJECTED", last_valid_round=20)
+        tracker.settle()
+
+        self.assertIsInstance(future.exception(), TransactionRejectedError)
+        self.assertEqual(future.exception().pool_error, "overspend")
+
+    def test_status_is_not_called_under_the_lock(self):
+        client = LockCheckingAlgod(first_round=10)
+        tracker = ConfirmationTracker(client)
+        client.tracker = tracker
+
+        tracker.track("NEVERSENT")
+        tracker.poll()
+
+        self.assertEqual(client.calls["status"], 1)
+        self.assertFalse(client.status_under_lock)
+        self.assertEqual(tracker._pending["NEVERSENT"].last_valid_round, 10 + tracker.max_wait_rounds)
+
+    def test_background_poll_retries_failed_polls(self):
+        client = FlakyAlgod(failures=1, first_round=10)
+        tracker = ConfirmationTracker(client, retry_delay=0.01)
+        signed_txn = self._send_payment(client)
+
+        tracker.start()
+        try:
+            with self.assertLogs("src.services.confirmation_tracker", level="WARNING") as logs:
+                future = tracker.track_transaction(signed_txn)
+                txinfo = future.result(timeout=5)
+        finally:
+            tracker.stop()
+
+        self.assertGreater(txinfo["confirmed-round"], 10)
+        self.assertIn("connection reset", logs.output[0])
+        self.assertIsNone(tracker.last_error)
+
+    def test_wait_for_confirmation_reuses_the_client_tracker(self):
+        client = LocalAlgod(first_round=10)
+        tracker = ConfirmationTracker.shared(client)
+        self.assertIs(ConfirmationTracker.shared(client), tracker)
+        self.assertIsNot(ConfirmationTracker.shared(LocalAlgod()), tracker)
+
+        for index in range(2):
+            signed_txn = self._send_payment(client, note=bytes([index]))
+            txinfo = NetworkInteraction.wait_for_confirmation(
+                client, signed_txn.get_txid(), last_valid_round=signed_txn.transaction.last_valid_round)
+            self.assertGreater(txinfo["confirmed-round"], 10)
+
+        self.assertIs(ConfirmationTracker.shared(client), tracker)
+        self.assertIsNone(tracker.future(signed_txn.get_txid()))
+        self.assertEqual(NetworkInteraction.latest_confirmed_round(client), txinfo["confirmed-round"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from src.tools import contract_profiler
+
+
+class BaselineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = contract_profiler.ContractProfiler().profile()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _write(self, name: str, report: dict) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as file:
+            json.dump(report, file)
+        return path
+
+    def _main(self, argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = contract_profiler.main(argv)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def _baseline(self, metric_change) -> str:
+        baseline = copy.deepcopy(self.report)
+        metric_change(baseline["contracts"])
+        return self._write("baseline.json", baseline)
+
+    def test_report_is_written_to_the_output(self):
+        output = os.path.join(self.directory, "profile.json")
+
+        code, stdout, _ = self._main(["--output", output])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(stdout, "")
+        with open(output) as file:
+            self.assertEqual(json.load(file), self.report)
+
+    def test_unchanged_baseline_passes(self):
+        code, _, stderr = self._main(["--baseline", self._write("baseline.json", self.report)])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(stderr, "")
+
+    def test_cost_regression_fails(self):
+        def cheaper_buy(contracts):
+            contracts["nft_marketplace"]["methods"]["buy"]["cost"] -= 1
+
+        code, _, stderr = self._main(["--baseline", self._baseline(cheaper_buy)])
+
+        cost = self.report["contracts"]["nft_marketplace"]["methods"]["buy"]["cost"]
+        self.assertEqual(code, 1)
+        self.assertEqual(stderr, f"nft_marketplace.methods.buy.cost: {cost - 1} -> {cost}\n")
+
+    def test_size_regression_fails(self):
+        def smaller_escrow(contracts):
+            contracts["nft_escrow"]["logicsig"]["size"] -= 10
+
+        self.assertEqual(self._main(["--baseline", self._baseline(smaller_escrow)])[0], 1)
+
+    def test_improvement_is_reported_and_passes(self):
+        def larger_approval(contracts):
+            contracts["nft_marketplace"]["approval"]["size"] += 10
+
+        code, _, stderr = self._main(["--baseline", self._baseline(larger_approval)])
+
+        self.assertEqual(code, 0)
+        self.assertIn("nft_marketplace.approval.size", stderr)
+
+    def test_new_and_removed_metrics_pass(self):
+        def other_contracts(contracts):
+            contracts["removed_contract"] = {"logicsig": {"size": 10}}
+            del contracts["nft_multi_escrow"]
+
+        code, _, stderr = self._main(["--baseline", self._baseline(other_contracts)])
+
+        self.assertEqual(code, 0)
+        self.assertIn("removed_contract.logicsig.size: 10 -> None", stderr)
+        self.assertIn("nft_multi_escrow.logicsig.size: None -> ", stderr)
+
+    def test_limits_are_not_compared(self):
+        def higher_limit(contracts):
+            contracts["nft_escrow"]["size_limit"] += 1
+
+        code, _, stderr = self._main(["--baseline", self._baseline(higher_limit)])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(stderr, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
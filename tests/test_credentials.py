@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import yaml
+from algosdk import account as algo_acc
+from algosdk import mnemonic
+
+from src.blockchain_utils import credentials
+from src.blockchain_utils.credentials import ConfigStore
+
+
+class ConfigStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.config_location = os.path.join(self.directory, "config.yml")
+
+        private_key, address = algo_acc.generate_account()
+        self.write({"accounts": {"total": 1, "account_1": {"address": address,
+                                                           "mnemonic": mnemonic.from_private_key(private_key)}},
+                    "counter": 0})
+        os.chmod(self.config_location, 0o600)
+        self.store = ConfigStore(self.config_location)
+
+    def write(self, config: dict):
+        # Replaced the way editors and ConfigStore.update do, so that the file signature changes.
+        tmp_location = self.config_location + ".tmp"
+        with open(tmp_location, "w") as file:
+            yaml.safe_dump(config, file)
+        os.replace(tmp_location, self.config_location)
+
+    def test_config_is_parsed_once(self):
+        with mock.patch.object(credentials.yaml, "full_load", wraps=yaml.full_load) as full_load:
+            config = self.store.load()
+            self.assertIs(self.store.load(), config)
+
+        self.assertEqual(full_load.call_count, 1)
+
+    def test_changed_file_is_parsed_again(self):
+        config = self.store.load()
+
+        self.write(dict(config, counter=5))
+
+        self.assertEqual(self.store.load()["counter"], 5)
+
+    def test_derived_values_are_cached_until_the_file_changes(self):
+        factory = mock.Mock(side_effect=lambda config: object())
+
+        first = self.store.cached("client", factory)
+        self.assertIs(self.store.cached("client", factory), first)
+        self.write(dict(self.store.load(), counter=1))
+        second = self.store.cached("client", factory)
+
+        self.assertIsNot(second, first)
+        self.assertEqual(factory.call_count, 2)
+
+    def test_update_replaces_the_file(self):
+        config = self.store.load()
+
+        self.store.update(lambda config: config.update(counter=1))
+
+        self.assertEqual(self.store.load()["counter"], 1)
+        self.assertEqual(self.store.load()["accounts"], config["accounts"])
+        self.assertEqual(os.stat(self.config_location).st_mode & 0o777, 0o600)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["config.yml", "config.yml.lock"])
+
+    def test_failed_update_leaves_the_file(self):
+        with open(self.config_location) as file:
+            content = file.read()
+
+        def failing_mutator(config):
+            config["counter"] = 1
+            raise KeyError("accounts")
+
+        with self.assertRaises(KeyError):
+            self.store.update(failing_mutator)
+
+        with open(self.config_location) as file:
+            self.assertEqual(file.read(), content)
+        self.assertEqual(self.store.load()["counter"], 0)
+
+    def test_update_invalidates_the_derived_values(self):
+        self.store.cached("client", lambda config: config["counter"])
+
+        self.store.update(lambda config: config.update(counter=3))
+
+        self.assertEqual(self.store.cached("client", lambda config: config["counter"]), 3)
+
+    @unittest.skipIf(credentials.fcntl is None, "file locks need fcntl")
+    def test_concurrent_updates_are_serialized(self):
+        # One store per thread, as in separate processes: only the lock file serializes them.
+        def increment():
+            store = ConfigStore(self.config_location)
+            for _ in range(10):
+                store.update(lambda config: config.update(counter=config["counter"] + 1))
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.store.load()["counter"], 40)
+
+    def test_added_accounts_are_read_back(self):
+        with mock.patch.object(credentials, "_config_store", self.store):
+            signer = credentials.get_account_signer(1)
+            self.assertIs(credentials.get_account_signer(1), signer)
+
+            credentials.add_account_to_config()
+            private_key, address, _ = credentials.get_account_credentials(2)
+
+        self.assertEqual(self.store.load()["accounts"]["total"], 2)
+        self.assertEqual(algo_acc.address_from_private_key(private_key), address)
+        self.assertEqual(signer.address, self.store.load()["accounts"]["account_1"]["address"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.blockchain_utils.endpoint_router import Endpoint, EndpointRouter, RoutedAlgodClient
+
+
+def stand_in_node(name: str, status: int = 200, delay: float = 0.0):
+    """
+    Starts an HTTP server answering every request with the given status after the given delay.
+    :return:
+        (server, handler class counting its hits)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        hits = 0
+
+        def do_GET(self):
+            Handler.hits += 1
+            time.sleep(Handler.delay)
+            body = json.dumps({"last-round": 5, "served-by": name, "message": "stand-in"}).encode()
+            self.send_response(Handler.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    Handler.status = status
+    Handler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Handler
+
+
+class EndpointRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def node(self, name: str, status: int = 200, delay: float = 0.0):
+        server, handler = stand_in_node(name, status=status, delay=delay)
+        self.servers.append(server)
+        return Endpoint(f"http://127.0.0.1:{server.server_address[1]}"), handler
+
+    @staticmethod
+    def served_by(router: EndpointRouter, method: str = "GET", path: str = "/v2/status") -> str:
+        status, body = router.request(method, lambda endpoint: (endpoint.address + path, dict()))
+        return json.loads(body)["served-by"]
+
+    def test_routes_to_the_fastest_endpoint(self):
+        slow, slow_handler = self.node("slow", delay=0.05)
+        fast, fast_handler = self.node("fast")
+        router = EndpointRouter([slow, fast], hedge_factor=0)
+
+        served_by = [self.served_by(router) for _ in range(5)]
+        self.assertEqual(served_by, ["slow"] + ["fast"] * 4)
+        self.assertEqual(slow_handler.hits, 1)
+
+    def test_fails_over_on_server_errors(self):
+        failing, failing_handler = self.node("failing", status=503)
+        healthy, _ = self.node("healthy")
+        router = EndpointRouter([failing, healthy], hedge_factor=0)
+
+        self.assertEqual(self.served_by(router, method="POST", path="/v2/transactions"), "healthy")
+        self.assertEqual(failing_handler.hits, 1)
+
+    def test_sets_failing_endpoints_aside(self):
+        failing, failing_handler = self.node("failing", status=503)
+        healthy, _ = self.node("healthy", delay=0.02)
+        # Without error penalty the failing endpoint, which answers faster, stays first until it is set aside.
+        router = EndpointRouter([failing, healthy], hedge_factor=0, error_penalty=0, failure_threshold=2,
+                                cooldown=60)
+
+        for _ in range(4):
+            self.assertEqual(self.served_by(router), "healthy")
+        self.assertEqual(failing_handler.hits, 2)
+        self.assertFalse(router.stats()[0]["available"])
+
+    def test_hedges_slow_reads(self):
+        slow, _ = self.node("slow", delay=0.5)
+        fast, _ = self.node("fast")
+        slow.latency, fast.latency = 0.01, 0.02
+        router = EndpointRouter([slow, fast], hedge_factor=3.0, min_hedge_delay=0.05)
+
+        self.assertEqual(self.served_by(router), "fast")
+        self.assertEqual(router.hedged_requests, 1)
+
+    def test_does_not_hedge_long_polls(self):
+        slow, _ = self.node("slow", delay=0.3)
+        fast, fast_handler = self.node("fast")
+        slow.latency, fast.latency = 0.01, 0.02
+        router = EndpointRouter([slow, fast], hedge_factor=3.0, min_hedge_delay=0.05)
+
+        status = RoutedAlgodClient(router).status_after_block(5)
+        self.assertEqual(status["served-by"], "slow")
+        self.assertEqual(router.hedged_requests, 0)
+        self.assertEqual(fast_handler.hits, 0)
+        # The time the node held the request is not its latency.
+        self.assertEqual(slow.latency, 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import base64
+import unittest
+from collections import Counter
+
+from algosdk import logic
+from pyteal import And, Gtxn, If, Int, Txn
+
+from src.blockchain_utils.program_cache import CompiledProgramCache
+from src.services.escrow_template import EscrowTemplate, encode_varuint
+from src.smart_contracts import nft_multi_escrow
+
+OPCODES = {"==": 0x12, "<": 0x0c, ">": 0x0d, "<=": 0x0e, ">=": 0x0f, "&&": 0x10, "||": 0x11, "!": 0x14,
+           "return": 0x43, "assert": 0x44}
+BRANCHES = {"bnz": 0x40, "bz": 0x41, "b": 0x42}
+NAMED_INTS = {"NoOp": 0, "pay": 1, "axfer": 4, "appl": 6}
+TXN_FIELDS = {"Fee": 1, "FirstValid": 2, "CloseRemainderTo": 9, "TypeEnum": 16, "XferAsset": 17,
+              "AssetAmount": 18, "AssetCloseTo": 21, "GroupIndex": 22, "ApplicationID": 24, "OnCompletion": 25,
+              "ApplicationArgs": 26, "RekeyTo": 32}
+GLOBAL_FIELDS = {"ZeroAddress": 3, "GroupSize": 4}
+
+
+def assemble(source: str, optimize: bool) -> bytes:
+    """
+    Assembler of the TEAL subset generated for the escrows, laid out as goal does: every integer constant in
+    the intcblock in order of appearance or, when optimizing, only the repeated ones by decreasing use and the
+    others pushed with pushint.
+    """
+    lines = [line.split() for line in source.splitlines() if line.strip()]
+    version = int(lines[0][-1])
+    lines = lines[1:]
+
+    def int_value(token: str) -> int:
+        return NAMED_INTS[token] if token in NAMED_INTS else int(token)
+
+    uses = Counter(int_value(line[1]) for line in lines if line[0] == "int")
+    if optimize:
+        intcblock = [value for value, count in sorted(uses.items(), key=lambda item: -item[1]) if count > 1]
+    else:
+        intcblock = list(uses)
+
+    program = bytearray([version])
+    if intcblock:
+        program += bytes([0x20]) + encode_varuint(len(intcblock)) + b"".join(map(encode_varuint, intcblock))
+
+    labels, branches = dict(), []
+    for line in lines:
+        opcode = line[0]
+        if opcode == "int":
+            value = int_value(line[1])
+            if value in intcblock:
+                index = intcblock.index(value)
+                program += bytes([0x22 + index]) if index < 4 else bytes([0x21, index])
+            else:
+                program += bytes([0x81]) + encode_varuint(value)
+        elif opcode == "byte":
+            value = line[1].strip('"').encode()
+            program += bytes([0x80]) + encode_varuint(len(value)) + value
+        elif opcode == "txn":
+            program += bytes([0x31, TXN_FIELDS[line[1]]])
+        elif opcode == "global":
+            program += bytes([0x32, GLOBAL_FIELDS[line[1]]])
+        elif opcode == "gtxn":
+            program += bytes([0x33, int(line[1]), TXN_FIELDS[line[2]]])
+        elif opcode == "gtxna":
+            program += bytes([0x37, int(line[1]), TXN_FIELDS[line[2]], int(line[3])])
+        elif opcode in BRANCHES:
+            program += bytes([BRANCHES[opcode]])
+            branches.append((len(program), line[1]))
+            program += b"\0\0"
+        elif opcode.endswith(":"):
+            labels[opcode[:-1]] = len(program)
+        else:
+            program += bytes([OPCODES[opcode]])
+
+    for position, label in branches:
+        program[position:position + 2] = (labels[label] - position - 2).to_bytes(2, "big", signed=True)
+    return bytes(program)
+
+
+class AssemblingAlgod:
+    """
+    Algod stand-in whose compile assembles the source, counting the compile calls.
+    """
+
+    def __init__(self, optimize: bool):
+        self.optimize = optimize
+        self.compiles = 0
+
+    def compile(self, source: str, **kwargs) -> dict:
+        self.compiles += 1
+        program = assemble(source, self.optimize)
+        return {"hash": logic.address(program), "result": base64.b64encode(program).decode()}
+
+
+def twice_checked_app(app_id: int):
+    return And(Txn.application_id() == Int(app_id), Gtxn[0].application_id() == Int(app_id), Txn.fee() == Int(0))
+
+
+def branching_app(app_id: int):
+    return If(Txn.fee() > Int(0), Txn.application_id() == Int(app_id), Int(0))
+
+
+class EscrowTemplateTest(unittest.TestCase):
+
+    APP_IDS = (1234, 987654321, 2 ** 40 + 5)
+
+    def _template(self, program_builder, parameters=("app_id",)) -> EscrowTemplate:
+        return EscrowTemplate(program_builder, parameters=parameters, cache=CompiledProgramCache())
+
+    def _assert_patched_like_compiled(self, program_builder, optimize: bool):
+        client = AssemblingAlgod(optimize)
+        template = self._template(program_builder)
+
+        for app_id in self.APP_IDS:
+            direct = assemble(template.teal_source({"app_id": app_id}), optimize)
+            self.assertEqual(template.program(client, app_id=app_id), direct)
+            self.assertEqual(template.address(client, app_id=app_id), logic.address(direct))
+
+        self.assertTrue(template.patchable)
+        self.assertEqual(client.compiles, 1)
+
+    def test_patches_pushint_constants(self):
+        self._assert_patched_like_compiled(nft_multi_escrow, optimize=True)
+
+    def test_patches_intcblock_constants(self):
+        self._assert_patched_like_compiled(nft_multi_escrow, optimize=False)
+        self._assert_patched_like_compiled(twice_checked_app, optimize=True)
+
+    def test_compiles_every_instance_when_a_branch_spans_a_sentinel(self):
+        client = AssemblingAlgod(optimize=True)
+        template = self._template(branching_app)
+
+        for app_id in self.APP_IDS:
+            direct = assemble(template.teal_source({"app_id": app_id}), optimize=True)
+            self.assertEqual(template.program(client, app_id=app_id), direct)
+
+        self.assertFalse(template.patchable)
+        self.assertEqual(client.compiles, 1 + len(self.APP_IDS))
+
+    def test_rejects_missing_parameters(self):
+        with self.assertRaises(ValueError):
+            self._template(nft_multi_escrow).program(AssemblingAlgod(optimize=True), asa_id=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
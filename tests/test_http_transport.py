@@ -0,0 +1,86 @@
+import asyncio
+import json
+import unittest
+
+from algosdk import error
+
+from src.blockchain_utils.async_clients import AsyncAlgodClient, AsyncIndexerClient
+from src.blockchain_utils.http_transport import PooledAlgodClient, PooledIndexerClient
+
+
+class RecordingTransport:
+    """
+    Transport answering every request with the given status and body, recording the url and headers sent.
+    """
+
+    def __init__(self, status: int = 200, body: dict = None):
+        self.status = status
+        self.body = json.dumps(body or {"z": 1, "a": {"c": 2, "b": 3}}).encode()
+        self.requests = []
+
+    def request(self, method, url, headers, data=None):
+        self.requests.append((method, url, headers))
+        return self.status, self.body
+
+
+class AsyncRecordingTransport(RecordingTransport):
+
+    async def request(self, method, url, headers, data=None):
+        return super().request(method, url, headers, data)
+
+
+class RequestBuilderTest(unittest.TestCase):
+    """
+    The blocking and the async clients build their requests and decode their responses the same way.
+    """
+
+    def _requests(self, blocking_client, async_client, requrl: str, params: dict):
+        if isinstance(blocking_client, PooledAlgodClient):
+            blocking_response = blocking_client.algod_request("GET", requrl, params=params)
+        else:
+            blocking_response = blocking_client.indexer_request("GET", requrl, params=params)
+        async_response = asyncio.run(async_client.request("GET", requrl, params=params))
+        self.assertEqual(blocking_response, async_response)
+        return blocking_client.transport.requests[-1], async_client.transport.requests[-1]
+
+    def test_algod_requests_are_the_same(self):
+        blocking_client = PooledAlgodClient("token", "http://algod", headers={"X-Extra": "1"},
+                                            transport=RecordingTransport())
+        async_client = AsyncAlgodClient("token", "http://algod", headers={"X-Extra": "1"},
+                                        transport=AsyncRecordingTransport())
+
+        blocking_request, async_request = self._requests(blocking_client, async_client, "/transactions/pending/TX",
+                                                         {"format": "json", "max": None})
+
+        self.assertEqual(blocking_request, async_request)
+        self.assertEqual(blocking_request[1], "http://algod/v2/transactions/pending/TX?format=json")
+        self.assertEqual(blocking_request[2]["X-Algo-API-Token"], "token")
+        self.assertEqual(blocking_request[2]["X-Extra"], "1")
+
+    def test_indexer_requests_are_the_same(self):
+        blocking_client = PooledIndexerClient("", "http://indexer", transport=RecordingTransport())
+        async_client = AsyncIndexerClient("", "http://indexer", transport=AsyncRecordingTransport())
+
+        blocking_request, async_request = self._requests(blocking_client, async_client, "/assets",
+                                                         {"limit": 10, "next": None})
+
+        self.assertEqual(blocking_request, async_request)
+        self.assertEqual(blocking_request[1], "http://indexer/v2/assets?limit=10")
+
+    def test_errors_are_the_same(self):
+        body = {"message": "txn dead"}
+        blocking_client = PooledAlgodClient("token", "http://algod", transport=RecordingTransport(400, body))
+        async_client = AsyncAlgodClient("token", "http://algod", transport=AsyncRecordingTransport(400, body))
+
+        with self.assertRaises(error.AlgodHTTPError) as blocking_error:
+            blocking_client.status()
+        with self.assertRaises(error.AlgodHTTPError) as async_error:
+            asyncio.run(async_client.status())
+
+        self.assertEqual(str(blocking_error.exception), "txn dead")
+        self.assertEqual(str(async_error.exception), "txn dead")
+        self.assertEqual(async_error.exception.code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
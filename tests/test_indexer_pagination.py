@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+
+from src.repository.indexer_pagination import iterate_assets, iterate_balances, iterate_pages
+
+
+class PagedIndexer:
+    """
+    Indexer serving a list of assets page by page. Like the real one, it returns a next-token with every
+    non-empty page, the last one included. The requested pages are recorded.
+    """
+
+    def __init__(self, count: int):
+        self.assets = [{"index": index} for index in range(count)]
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def search_assets(self, limit: int, next_page: str = None, **filters) -> dict:
+        with self._lock:
+            self.requests.append((next_page, filters))
+        start = int(next_page) if next_page else 0
+        page = self.assets[start:start + limit]
+        response = {"assets": page}
+        if page:
+            response["next-token"] = str(start + len(page))
+        return response
+
+    def asset_balances(self, asset_id: int, limit: int, next_page: str = None, **filters) -> dict:
+        response = self.search_assets(limit, next_page, asset_id=asset_id, **filters)
+        return {"balances": response.pop("assets"), **response}
+
+    def wait_for_requests(self, count: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.requests) >= count:
+                    return True
+            time.sleep(0.001)
+        return False
+
+
+class IndexerPaginationTest(unittest.TestCase):
+
+    def test_next_tokens_are_followed(self):
+        indexer = PagedIndexer(25)
+
+        assets = list(iterate_assets(indexer, page_size=10, creator="CREATOR"))
+
+        self.assertEqual(assets, indexer.assets)
+        self.assertEqual(indexer.requests, [(None, {"creator": "CREATOR"}),
+                                            ("10", {"creator": "CREATOR"}),
+                                            ("20", {"creator": "CREATOR"})])
+
+    def test_short_page_ends_the_scan(self):
+        indexer = PagedIndexer(25)
+
+        list(iterate_assets(indexer, page_size=10))
+
+        # The last page is short, its next-token is not followed.
+        self.assertEqual(len(indexer.requests), 3)
+
+    def test_full_last_page_ends_on_the_empty_page(self):
+        indexer = PagedIndexer(20)
+
+        self.assertEqual(len(list(iterate_assets(indexer, page_size=10))), 20)
+        self.assertEqual([next_page for next_page, _ in indexer.requests], [None, "10", "20"])
+
+    def test_next_page_is_prefetched(self):
+        indexer = PagedIndexer(25)
+        assets = iterate_assets(indexer, page_size=10)
+
+        next(assets)
+
+        self.assertTrue(indexer.wait_for_requests(2))
+        self.assertEqual(indexer.requests[1][0], "10")
+        assets.close()
+
+    def test_no_prefetch_without_it(self):
+        indexer = PagedIndexer(25)
+        assets = iterate_assets(indexer, page_size=10, prefetch=False)
+
+        next(assets)
+        time.sleep(0.05)
+
+        self.assertEqual(len(indexer.requests), 1)
+        self.assertEqual(len(list(assets)), 24)
+
+    def test_closed_iterator_stops_fetching(self):
+        indexer = PagedIndexer(100)
+        assets = iterate_assets(indexer, page_size=10)
+
+        self.assertEqual(next(assets), {"index": 0})
+        indexer.wait_for_requests(2)
+        assets.close()
+        time.sleep(0.05)
+
+        # Only the page being consumed and the prefetched one were requested.
+        self.assertEqual(len(indexer.requests), 2)
+
+    def test_pages_are_yielded_whole(self):
+        indexer = PagedIndexer(15)
+
+        pages = list(iterate_pages(indexer.search_assets, page_size=10))
+
+        self.assertEqual([len(page["assets"]) for page in pages], [10, 5, 0])
+
+    def test_balances_pass_the_asset_id(self):
+        indexer = PagedIndexer(5)
+
+        balances = list(iterate_balances(indexer, asset_id=7, page_size=10))
+
+        self.assertEqual(len(balances), 5)
+        self.assertEqual(indexer.requests, [(None, {"asset_id": 7})])
+
+
+if __name__ == '__main__':
+    unittest.main()
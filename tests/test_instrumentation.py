@@ -0,0 +1,208 @@
+import asyncio
+import contextvars
+import threading
+import unittest
+
+from src.blockchain_utils.instrumentation import (
+    BUCKET_BOUNDS, NO_LABEL, Instrumentation, JSONExporter, LatencyHistogram, LogExporter,
+)
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_percentiles_are_bucket_upper_bounds(self):
+        histogram = LatencyHistogram()
+        for duration in [0.0001] * 90 + [0.01] * 9 + [0.05]:
+            histogram.record(duration)
+
+        self.assertEqual(histogram.percentile(0.50), 0.0001)
+        self.assertEqual(histogram.percentile(0.90), 0.0001)
+        self.assertEqual(histogram.percentile(0.95), 0.0128)
+        self.assertEqual(histogram.percentile(0.99), 0.0128)
+        # The bucket of 0.05 ends at 0.0512, capped by the maximum.
+        self.assertEqual(histogram.percentile(1.0), 0.05)
+
+    def test_summary_is_exact_for_count_sum_min_max(self):
+        histogram = LatencyHistogram()
+        for duration in (0.001, 0.002, 0.003):
+            histogram.record(duration)
+
+        summary = histogram.summary()
+        self.assertEqual((summary["count"], summary["total_ms"], summary["mean_ms"]), (3, 6.0, 2.0))
+        self.assertEqual((summary["min_ms"], summary["max_ms"]), (1.0, 3.0))
+
+    def test_durations_beyond_the_last_bucket(self):
+        histogram = LatencyHistogram()
+        histogram.record(BUCKET_BOUNDS[-1] * 3)
+
+        self.assertEqual(histogram.buckets[-1], 1)
+        self.assertEqual(histogram.percentile(0.5), BUCKET_BOUNDS[-1] * 3)
+
+    def test_empty_histogram(self):
+        summary = LatencyHistogram().summary()
+
+        self.assertEqual(summary["count"], 0)
+        self.assertIsNone(summary["mean_ms"])
+        self.assertIsNone(summary["p99_ms"])
+
+
+class LabelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation(enabled=True)
+
+    def labels(self, operation: str):
+        return {label: summary["count"] for label, summary in self.instrumentation.snapshot()[operation].items()}
+
+    def test_spans_take_the_enclosing_label(self):
+        with self.instrumentation.labeled("openSell"):
+            with self.instrumentation.span("sign"):
+                pass
+            with self.instrumentation.span("submit", label="explicit"):
+                pass
+        with self.instrumentation.span("sign"):
+            pass
+
+        self.assertEqual(self.labels("sign"), {"openSell": 1, NO_LABEL: 1})
+        self.assertEqual(self.labels("submit"), {"explicit": 1})
+
+    def test_labels_are_per_thread(self):
+        barrier = threading.Barrier(2)
+
+        def run(label: str):
+            with self.instrumentation.labeled(label):
+                # Both threads are in their labeled block before either records.
+                barrier.wait()
+                with self.instrumentation.span("submit"):
+                    pass
+                barrier.wait()
+
+        threads = [threading.Thread(target=run, args=(label,)) for label in ("buy", "closeSell")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.labels("submit"), {"buy": 1, "closeSell": 1})
+
+    def test_new_threads_start_without_label(self):
+        def run():
+            with self.instrumentation.span("submit"):
+                pass
+
+        with self.instrumentation.labeled("buy"):
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join()
+            # Unless the context is carried over.
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(run,))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(self.labels("submit"), {NO_LABEL: 1, "buy": 1})
+
+    def test_labels_follow_the_asyncio_tasks(self):
+        async def call(operation: str):
+            await asyncio.sleep(0)
+            with self.instrumentation.span(operation):
+                await asyncio.sleep(0)
+
+        async def labeled_calls(label: str):
+            with self.instrumentation.labeled(label):
+                await asyncio.sleep(0)
+                # The child task inherits the label of the task creating it.
+                await asyncio.gather(call("sign"), asyncio.ensure_future(call("submit")))
+
+        async def run():
+            await asyncio.gather(labeled_calls("buy"), labeled_calls("validateBuy"))
+
+        asyncio.run(run())
+
+        self.assertEqual(self.labels("sign"), {"buy": 1, "validateBuy": 1})
+        self.assertEqual(self.labels("submit"), {"buy": 1, "validateBuy": 1})
+
+    def test_label_decorator_on_coroutines(self):
+        @self.instrumentation.label("cancelBuy")
+        async def cancel():
+            with self.instrumentation.span("submit"):
+                pass
+
+        @self.instrumentation.timed("confirm")
+        def confirm():
+            pass
+
+        asyncio.run(cancel())
+        confirm()
+
+        self.assertEqual(self.labels("submit"), {"cancelBuy": 1})
+        self.assertEqual(self.labels("confirm"), {NO_LABEL: 1})
+
+    def test_failed_spans_are_counted(self):
+        with self.assertRaises(ValueError):
+            with self.instrumentation.span("submit", label="buy"):
+                raise ValueError("rejected")
+
+        self.assertEqual(self.instrumentation.snapshot()["submit"]["buy"]["errors"], 1)
+
+
+class DisabledInstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation(enabled=False)
+        self.spans = []
+        self.instrumentation.add_listener(lambda *span: self.spans.append(span))
+
+    def test_spans_are_a_shared_no_op(self):
+        span = self.instrumentation.span("submit")
+
+        self.assertIs(self.instrumentation.span("sign", label="buy"), span)
+        self.assertIs(self.instrumentation.labeled("buy"), span)
+        with self.instrumentation.labeled("buy"), self.instrumentation.span("submit"):
+            self.assertIsNone(self.instrumentation.current_label())
+
+        self.assertEqual(self.instrumentation.snapshot(), {})
+        self.assertEqual(self.spans, [])
+
+    def test_decorated_functions_run_untimed(self):
+        @self.instrumentation.timed("confirm")
+        def confirm(txid):
+            return txid
+
+        @self.instrumentation.label("buy")
+        async def buy():
+            return self.instrumentation.current_label()
+
+        self.assertEqual(confirm("TXID"), "TXID")
+        self.assertIsNone(asyncio.run(buy()))
+        self.assertEqual(self.instrumentation.snapshot(), {})
+
+    def test_decorators_follow_enable(self):
+        @self.instrumentation.timed("confirm")
+        def confirm():
+            pass
+
+        confirm()
+        self.instrumentation.enable()
+        confirm()
+
+        self.assertEqual(self.instrumentation.snapshot()["confirm"][NO_LABEL]["count"], 1)
+        self.assertEqual(len(self.spans), 1)
+
+
+class ExporterTest(unittest.TestCase):
+
+    def test_exporters_write_the_snapshot(self):
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.record("submit", 0.002, label="buy")
+        lines, payloads = [], []
+
+        instrumentation.export(LogExporter(write=lines.append), JSONExporter(write=payloads.append))
+
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith("[timing] submit buy count=1 errors=0 mean=2.0ms"))
+        self.assertEqual(len(payloads), 1)
+        self.assertIn('"submit"', payloads[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import base64
+import unittest
+
+from src.repository.app_state_cache import AppGlobalState
+from src.repository.listing_index import ListingIndex
+
+ADMIN = "ADMIN"
+
+
+def price_delta(price: int) -> list:
+    return [{"key": base64.b64encode(b"ASA_PRICE").decode(), "value": {"action": 2, "uint": price}}]
+
+
+class FakeIndexer:
+    """
+    Indexer serving a fixed list of application calls, which records the filters of every search.
+    """
+
+    def __init__(self, current_round: int, transactions: list):
+        self.current_round = current_round
+        self.transactions = transactions
+        self.searches = []
+
+    def health(self):
+        return {"round": self.current_round}
+
+    def search_transactions(self, limit=None, next_page=None, min_round=None, max_round=None,
+                            application_id=None, address=None, address_role=None, txn_type=None, **kwargs):
+        self.searches.append(dict(application_id=application_id, address=address, min_round=min_round,
+                                  max_round=max_round))
+        if application_id is None and address is None:
+            raise AssertionError("Unfiltered scan of the application calls.")
+
+        def matches(transaction):
+            if not min_round <= transaction["confirmed-round"] <= max_round:
+                return False
+            if application_id is not None:
+                return application_id in (transaction["application-transaction"]["application-id"],
+                                          transaction.get("created-application-index"))
+            return transaction["sender"] == address
+
+        return {"transactions": [transaction for transaction in self.transactions if matches(transaction)]}
+
+
+def app_call(confirmed_round: int, sender: str, app_id: int, price: int, created: bool = False) -> dict:
+    transaction = {"confirmed-round": confirmed_round, "sender": sender, "tx-type": "appl",
+                   "application-transaction": {"application-id": 0 if created else app_id},
+                   "global-state-delta": price_delta(price)}
+    if created:
+        transaction["created-application-index"] = app_id
+    return transaction
+
+
+class ListingIndexSyncTest(unittest.TestCase):
+
+    def test_sync_starts_at_the_first_tracking_round(self):
+        indexer = FakeIndexer(current_round=1000, transactions=[])
+        listing_index = ListingIndex(indexer=indexer)
+        listing_index.track(7, state=AppGlobalState(7, {"ASA_PRICE": 100}, round=990))
+        self.assertEqual(listing_index.synced_round, 990)
+
+        listing_index.track_creator(ADMIN)
+        self.assertEqual(listing_index.synced_round, 990)
+
+        listing_index.sync()
+        self.assertTrue(indexer.searches)
+        self.assertTrue(all(search["min_round"] == 991 for search in indexer.searches))
+
+    def test_sync_only_reads_tracked_applications_and_creators(self):
+        indexer = FakeIndexer(current_round=500, transactions=[])
+        listing_index = ListingIndex(indexer=indexer)
+        listing_index.track_creator(ADMIN)
+        listing_index.track(7, state=AppGlobalState(7, {"ASA_PRICE": 100}, round=500))
+
+        indexer.transactions = [
+            app_call(501, "OTHER", 99, 1, created=True),
+            app_call(502, ADMIN, 8, 300, created=True),
+            app_call(503, "BUYER", 7, 150),
+            app_call(504, "SELLER", 8, 350),
+            app_call(505, "OTHER", 99, 2),
+        ]
+        indexer.current_round = 505
+        self.assertEqual(listing_index.sync(), 505)
+
+        self.assertEqual(listing_index.listing(7).price, 150)
+        self.assertEqual(listing_index.listing(8).price, 350)
+        self.assertIsNone(listing_index.listing(99))
+        self.assertEqual({(search["application_id"], search["address"]) for search in indexer.searches},
+                         {(None, ADMIN), (7, None), (8, None)})
+
+
+if __name__ == "__main__":
+    unittest.main()
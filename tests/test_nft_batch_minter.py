@@ -0,0 +1,96 @@
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk.error import AlgodHTTPError
+
+from src.services.nft_batch_minter import NFTBatchMinter, NFTSpec
+from src.services.onboarding_pipeline import OnboardingPipeline
+from src.tools.local_algod import LocalAlgod
+
+
+class RejectingAlgod(LocalAlgod):
+    """
+    LocalAlgod rejecting the creation of the assets with the given name, and with it the whole group.
+    The sizes of the accepted sends are recorded.
+    """
+
+    def __init__(self, rejected_name: str = None, send_error: Exception = None, **kwargs):
+        super().__init__(**kwargs)
+        self.rejected_name = rejected_name
+        self.send_error = send_error
+        self.sends = []
+
+    def _check(self, signed_txn):
+        if self.rejected_name is not None and getattr(signed_txn.transaction, "asset_name", None) == self.rejected_name:
+            raise AlgodHTTPError(f"asset name {self.rejected_name} is not allowed", 400)
+        super()._check(signed_txn)
+
+    def _submit(self, signed_txns):
+        if self.send_error is not None:
+            raise self.send_error
+        txid = super()._submit(signed_txns)
+        self.sends.append(len(signed_txns))
+        return txid
+
+
+class NFTBatchMinterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.specs = [NFTSpec("U", f"Item {index}") for index in range(20)]
+
+    def _minter(self, client) -> NFTBatchMinter:
+        return NFTBatchMinter(nft_creator_address=self.admin_address, nft_creator_pk=self.admin_pk, client=client)
+
+    def test_specs_are_minted_in_groups_of_16(self):
+        client = RejectingAlgod(first_round=10)
+        announced = []
+
+        results = self._minter(client).mint(self.specs, before_send=announced.append)
+
+        self.assertEqual(client.sends, [16, 4])
+        self.assertEqual(client.calls["suggested_params"], 1)
+        self.assertEqual([len(sending) for sending in announced], [16, 4])
+        self.assertEqual([result.spec for result in results], self.specs)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(len({result.nft_id for result in results}), 20)
+        self.assertEqual([result.tx_id for result in results], [txid for sending in announced
+                                                                 for _, txid, _ in sending])
+
+    def test_rejected_group_is_sent_one_transaction_at_a_time(self):
+        client = RejectingAlgod(rejected_name="Item 3", first_round=10)
+        announced = []
+
+        results = self._minter(client).mint(self.specs, before_send=announced.append)
+
+        # The first group is rejected and its 16 members are sent alone, 15 of them are accepted.
+        self.assertEqual(client.sends, [1] * 15 + [4])
+        self.assertEqual([len(sending) for sending in announced], [16] + [1] * 16 + [4])
+        self.assertEqual([result.succeeded for result in results], [index != 3 for index in range(20)])
+        self.assertIsInstance(results[3].error, AlgodHTTPError)
+        self.assertIsNone(results[3].tx_id)
+        self.assertEqual(len({result.nft_id for result in results if result.succeeded}), 19)
+
+    def test_group_with_unknown_outcome_is_not_sent_again(self):
+        client = RejectingAlgod(send_error=ConnectionError("connection reset"), first_round=10)
+
+        results = self._minter(client).mint(self.specs[:3])
+
+        self.assertEqual(client.calls.get("send_transaction", 0), 0)
+        self.assertEqual(client.calls["send_transactions"], 1)
+        self.assertTrue(all(isinstance(result.error, ConnectionError) for result in results))
+
+    def test_pipeline_returns_the_failed_mints(self):
+        client = RejectingAlgod(rejected_name="Item 1", first_round=10)
+        pipeline = OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address, client=client)
+
+        nft_services, failed_mints = pipeline.mint(self.specs[:3])
+
+        self.assertEqual([nft_service.asset_name for nft_service in nft_services], ["Item 0", "Item 2"])
+        self.assertTrue(all(nft_service.nft_id for nft_service in nft_services))
+        self.assertEqual([failed_mint.spec for failed_mint in failed_mints], [self.specs[1]])
+        self.assertIn("not allowed", str(failed_mints[0].error))
+
+
+if __name__ == '__main__':
+    unittest.main()
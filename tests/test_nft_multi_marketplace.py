@@ -0,0 +1,235 @@
+import base64
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk import error
+from algosdk.encoding import decode_address
+from algosdk.future import transaction as algo_txn
+from pyteal import Mode, compileTeal
+
+from src.repository.marketplace_repository import Listing
+from src.services.nft_multi_marketplace import NFTMultiMarketplace
+from src.services.nft_service import NFTService
+from src.smart_contracts import NFTMultiMarketplaceASC1, nft_multi_escrow
+from src.tools.local_algod import LocalAlgod, MIN_FEE
+
+
+ZERO_ADDRESS = bytes(32)
+AppMethods = NFTMultiMarketplaceASC1.AppMethods
+AppState = NFTMultiMarketplaceASC1.AppState
+
+
+class MultiMarketplaceAlgod(LocalAlgod):
+    """
+    LocalAlgod applying the NoOp calls to the NFTMultiMarketplaceASC1 applications the way the contract does:
+    the assertions of each method reject the group, its global state writes are kept and returned by
+    application_info. LocalAlgod does not evaluate TEAL, this model of the contract stands in for it.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.global_states = dict()
+
+    @staticmethod
+    def _require(condition: bool, method: str):
+        if not condition:
+            raise error.AlgodHTTPError(f"transaction rejected by logic: {method}", 400)
+
+    def _evaluate(self, app_id: int, group: list, index: int, state: dict):
+        txn = group[index]
+        args = txn.app_args
+        method = args[0].decode()
+        admin = decode_address(self._applications[app_id]["params"]["creator"])
+        sender = decode_address(txn.sender)
+        escrow = state.get(b"ESCROW_ADDRESS")
+
+        def require(condition: bool):
+            self._require(condition, method)
+
+        if method == AppMethods.initialize_escrow:
+            require(escrow is None and sender == admin and len(args) == 2)
+            state[b"ESCROW_ADDRESS"] = args[1]
+            return
+
+        key = txn.foreign_assets[0].to_bytes(8, "big")
+        if method == AppMethods.add_listing:
+            require(key not in state and sender == admin and len(args) == 2)
+            require(len(group) == 1 or (len(group) == 2 and index == 1))
+            # The global schema of the application holds max_listings listings besides its 2 variables.
+            require(len([listing_key for listing_key in state if len(listing_key) == 8])
+                    < NFTMultiMarketplaceASC1.max_listings)
+            state[key] = args[1] + args[1] + ZERO_ADDRESS + bytes(8) + AppState.active.to_bytes(8, "big")
+            return
+
+        require(key in state)
+        record = state[key]
+        owner, creator, buyer = record[0:32], record[32:64], record[64:96]
+        price, listing_state = int.from_bytes(record[96:104], "big"), int.from_bytes(record[104:112], "big")
+
+        def store(new_owner, new_buyer, new_price, new_state):
+            state[key] = (new_owner + creator + new_buyer +
+                          new_price.to_bytes(8, "big") + new_state.to_bytes(8, "big"))
+
+        def is_payment(txn, sender, receiver, amount) -> bool:
+            return (isinstance(txn, algo_txn.PaymentTxn) and decode_address(txn.sender) == sender and
+                    decode_address(txn.receiver) == receiver and txn.amt == amount)
+
+        if method == AppMethods.remove_listing:
+            require(len(group) == 1 and sender == admin and listing_state == AppState.active)
+            del state[key]
+        elif method == AppMethods.open_sell:
+            require(len(group) == 1 and len(args) == 2 and sender == owner)
+            require(listing_state in (AppState.active, AppState.selling_open))
+            store(owner, ZERO_ADDRESS, int.from_bytes(args[1], "big"), AppState.selling_open)
+        elif method == AppMethods.buy:
+            require(len(group) == 2 and index == 0 and listing_state == AppState.selling_open)
+            require(is_payment(group[1], sender, escrow, price))
+            store(owner, sender, price, AppState.buying_in_progress)
+        elif method == AppMethods.validate_buy:
+            royalties = price * NFTMultiMarketplaceASC1.creator_royalties // 100
+            require(len(group) == 4 and index == 0 and sender == buyer)
+            require(listing_state == AppState.buying_in_progress)
+            require(is_payment(group[1], escrow, owner, price - royalties))
+            require(is_payment(group[2], escrow, creator, royalties))
+            transfer = group[3]
+            require(isinstance(transfer, algo_txn.AssetTransferTxn) and decode_address(transfer.sender) == escrow)
+            require(transfer.index == txn.foreign_assets[0] and transfer.amount == 1)
+            require(decode_address(transfer.revocation_target) == owner)
+            require(decode_address(transfer.receiver) == buyer)
+            store(buyer, ZERO_ADDRESS, 0, AppState.active)
+        elif method == AppMethods.cancel_buy:
+            require(len(group) == 2 and index == 0 and sender == owner)
+            require(listing_state == AppState.buying_in_progress)
+            require(is_payment(group[1], escrow, buyer, price))
+            store(owner, ZERO_ADDRESS, price, AppState.selling_open)
+        elif method == AppMethods.close_sell:
+            require(len(group) == 1 and sender == owner and listing_state == AppState.selling_open)
+            store(owner, ZERO_ADDRESS, 0, AppState.active)
+        else:
+            require(False)
+
+    def _submit(self, signed_txns):
+        with self._lock:
+            group = [signed_txn.transaction for signed_txn in signed_txns]
+            new_states = dict()
+            for index, txn in enumerate(group):
+                if isinstance(txn, algo_txn.ApplicationCallTxn) and txn.index:
+                    state = new_states.setdefault(txn.index, dict(self.global_states.get(txn.index, dict())))
+                    self._evaluate(txn.index, group, index, state)
+
+            txid = super()._submit(signed_txns)
+            self.global_states.update(new_states)
+            return txid
+
+    def application_info(self, application_id: int, **kwargs) -> dict:
+        application = super().application_info(application_id, **kwargs)
+        with self._lock:
+            global_state = [
+                {"key": base64.b64encode(key).decode(),
+                 "value": {"type": 1, "bytes": base64.b64encode(value).decode()}}
+                for key, value in self.global_states.get(application_id, dict()).items()
+            ]
+        return dict(application, params=dict(application["params"], **{"global-state": global_state}))
+
+
+class EscrowFeeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.buyer_pk, self.buyer_address = algo_acc.generate_account()
+        self.marketplace = NFTMultiMarketplace(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                               client=LocalAlgod(), app_id=1)
+        self.listing = Listing(nft_id=2, owner=self.admin_address, creator=self.admin_address,
+                               buyer=self.buyer_address, price=1_000_000, state=0)
+
+    def test_escrow_only_accepts_transactions_without_fee(self):
+        teal_source = compileTeal(nft_multi_escrow(app_id=1), mode=Mode.Signature, version=4)
+        self.assertIn("txn Fee\nint 0\n==\nassert", teal_source)
+
+    def test_caller_pays_the_fees_of_the_validate_group(self):
+        transactions, _ = self.marketplace.validate_buy_group(self.listing, buyer_pk=self.buyer_pk)
+        self.assertEqual(transactions[0].fee, len(transactions) * MIN_FEE)
+        self.assertEqual([txn.fee for txn in transactions[1:]], [0] * (len(transactions) - 1))
+
+    def test_caller_pays_the_fees_of_the_cancel_group(self):
+        transactions, _ = self.marketplace.cancel_buy_group(self.listing, caller_pk=self.admin_pk)
+        self.assertEqual([txn.fee for txn in transactions], [2 * MIN_FEE, 0])
+
+
+class MultiMarketplaceLifecycleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MultiMarketplaceAlgod(first_round=10, verify_signatures=True)
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.buyer_pk, self.buyer_address = algo_acc.generate_account()
+
+        self.marketplace = NFTMultiMarketplace(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                               client=self.client)
+        self.marketplace.app_initialization()
+        self.marketplace.setup_escrow()
+
+    def _nft_service(self, nft_id: int) -> NFTService:
+        nft_service = NFTService(nft_creator_address=self.admin_address, nft_creator_pk=self.admin_pk,
+                                 client=self.client, unit_name="U", asset_name=f"Item {nft_id}")
+        nft_service.nft_id = nft_id
+        return nft_service
+
+    def _sends(self) -> int:
+        return self.client.calls.get("send_transaction", 0) + self.client.calls.get("send_transactions", 0)
+
+    def test_list_buy_cancel_and_validate(self):
+        nft_id = 1000
+        self.marketplace.add_listing(self._nft_service(nft_id))
+        self.assertEqual(self.marketplace.listing(nft_id).state, AppState.active)
+
+        self.marketplace.open_sell(nft_id, sell_price=1_000_000, caller_pk=self.admin_pk)
+        self.assertEqual(self.marketplace.listing(nft_id).state, AppState.selling_open)
+
+        self.marketplace.buy_nft(nft_id, buyer_address=self.buyer_address, buyer_pk=self.buyer_pk,
+                                 buy_price=1_000_000)
+        listing = self.marketplace.listing(nft_id)
+        self.assertEqual((listing.state, listing.buyer), (AppState.buying_in_progress, self.buyer_address))
+
+        self.marketplace.cancel_buy(nft_id, caller_pk=self.admin_pk)
+        listing = self.marketplace.listing(nft_id)
+        self.assertEqual((listing.state, listing.price), (AppState.selling_open, 1_000_000))
+
+        self.marketplace.buy_nft(nft_id, buyer_address=self.buyer_address, buyer_pk=self.buyer_pk,
+                                 buy_price=1_000_000)
+        self.marketplace.validate_buy(nft_id, buyer_pk=self.buyer_pk)
+        listing = self.marketplace.listing(nft_id)
+        self.assertEqual((listing.state, listing.owner, listing.creator),
+                         (AppState.active, self.buyer_address, self.admin_address))
+
+    def test_buy_at_the_wrong_price_is_rejected(self):
+        nft_id = 1000
+        self.marketplace.add_listing(self._nft_service(nft_id))
+        self.marketplace.open_sell(nft_id, sell_price=1_000_000, caller_pk=self.admin_pk)
+
+        with self.assertRaises(error.AlgodHTTPError):
+            self.marketplace.buy_nft(nft_id, buyer_address=self.buyer_address, buyer_pk=self.buyer_pk,
+                                     buy_price=1)
+        self.assertEqual(self.marketplace.listing(nft_id).state, AppState.selling_open)
+
+    def test_listing_beyond_the_capacity_is_refused_before_sending(self):
+        max_listings = NFTMultiMarketplaceASC1.max_listings
+        self.marketplace.add_listings([self._nft_service(1000 + index) for index in range(max_listings - 1)])
+        sends = self._sends()
+
+        with self.assertRaisesRegex(ValueError, f"{max_listings - 1} of its {max_listings} listings"):
+            self.marketplace.add_listings([self._nft_service(2000), self._nft_service(2001)])
+        self.assertEqual(self._sends(), sends)
+
+        self.marketplace.add_listing(self._nft_service(2000))
+        with self.assertRaises(ValueError):
+            self.marketplace.add_listing(self._nft_service(2001))
+        self.assertEqual(self._sends(), sends + 1)
+
+        # A removed listing frees its slot.
+        self.marketplace.remove_listing(2000)
+        self.marketplace.add_listing(self._nft_service(2001))
+        self.assertEqual(len(self.client.global_states[self.marketplace.app_id]), max_listings + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
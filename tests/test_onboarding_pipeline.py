@@ -0,0 +1,259 @@
+import copy
+import unittest
+from unittest import mock
+
+from algosdk import account as algo_acc
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction as algo_txn
+
+from src.repository.deployment_journal import DeploymentJournal, DeploymentStep
+from src.services.network_interaction import NetworkInteraction
+from src.services.nft_batch_minter import NFTBatchMinter, NFTSpec
+from src.services.onboarding_pipeline import OnboardingPipeline
+from src.tools.local_algod import LocalAlgod
+
+
+class ForgetfulAlgod(LocalAlgod):
+    """
+    LocalAlgod which, like a restarted node, no longer knows the transactions sent before forget().
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.forgotten = set()
+
+    def forget(self):
+        with self._lock:
+            self.forgotten.update(self._transactions)
+
+    def pending_transaction_info(self, transaction_id: str, **kwargs) -> dict:
+        if transaction_id in self.forgotten:
+            raise AlgodHTTPError("txn does not exist", 404)
+        return super().pending_transaction_info(transaction_id, **kwargs)
+
+
+class FailingAlgod(LocalAlgod):
+    """
+    LocalAlgod failing the given send_transaction calls, by number, with the given exception.
+    """
+
+    def __init__(self, failures=None, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures or dict()
+        self.sent = 0
+
+    def send_transaction(self, txn, **kwargs) -> str:
+        self.sent += 1
+        failure = self.failures.pop(self.sent, None)
+        if failure is not None:
+            raise failure
+        return super().send_transaction(txn, **kwargs)
+
+
+class RecordingAlgod(LocalAlgod):
+    """
+    LocalAlgod recording the transactions of every send, in order.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent_groups = []
+
+    def _submit(self, signed_txns):
+        txid = super()._submit(signed_txns)
+        self.sent_groups.append([signed_txn.transaction for signed_txn in signed_txns])
+        return txid
+
+
+class FakeIndexer:
+
+    def __init__(self, client: LocalAlgod, transactions=None):
+        self.client = client
+        self.transactions = transactions or dict()
+
+    def health(self):
+        return {"round": self.client.last_round}
+
+    def search_transactions(self, txid: str):
+        transaction = self.transactions.get(txid)
+        return {"transactions": [transaction] if transaction else []}
+
+
+class OnboardingRecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ForgetfulAlgod(first_round=10)
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.spec = NFTSpec("U", "Recovered", None)
+        self.journal = DeploymentJournal()
+
+    def _crash_after_mint_sent(self):
+        """
+        Mints the NFT and journals the mint as sent, as if the process died before seeing the confirmation.
+        """
+        minter = NFTBatchMinter(nft_creator_address=self.admin_address, nft_creator_pk=self.admin_pk,
+                                client=self.client)
+        submitted = []
+        mint_result = minter.mint([self.spec], before_send=submitted.extend)[0]
+        _, txid, last_valid_round = submitted[0]
+
+        record = self.journal.plan([self.spec])[0]
+        self.journal.update(record, DeploymentStep.mint_sent, mint_txid=txid, last_valid_round=last_valid_round)
+        self.client.forget()
+        return mint_result, txid
+
+    def _mints(self) -> int:
+        return self.client.calls.get("send_transactions", 0) + self.client.calls.get("send_transaction", 0)
+
+    def test_unknown_mint_is_not_sent_again_without_indexer(self):
+        self._crash_after_mint_sent()
+        sent_before = self._mints()
+
+        pipeline = OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                      client=self.client, journal=self.journal)
+        self.assertEqual(pipeline.resume(), [])
+
+        self.assertEqual(self._mints(), sent_before)
+        record = self.journal.get(self.spec.unit_name, self.spec.asset_name)
+        self.assertEqual(record.step, DeploymentStep.mint_sent)
+        self.assertIn("indexer", record.error)
+
+    def test_confirmed_mint_is_resumed_from_the_indexer(self):
+        mint_result, txid = self._crash_after_mint_sent()
+        indexer = FakeIndexer(self.client, {txid: {"confirmed-round": 11, "created-asset-index": mint_result.nft_id}})
+
+        pipeline = OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                      client=self.client, journal=self.journal, indexer=indexer)
+        services = pipeline.resume()
+
+        self.assertEqual(len(services), 1)
+        self.assertEqual(services[0][1].nft_id, mint_result.nft_id)
+        record = self.journal.get(self.spec.unit_name, self.spec.asset_name)
+        self.assertEqual(record.step, DeploymentStep.completed)
+        self.assertEqual(record.nft_id, mint_result.nft_id)
+
+    def test_dead_mint_is_sent_again(self):
+        record = self.journal.plan([self.spec])[0]
+        self.journal.update(record, DeploymentStep.mint_sent, mint_txid="NEVERSENT", last_valid_round=5)
+
+        pipeline = OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                      client=self.client, journal=self.journal, indexer=FakeIndexer(self.client))
+        services = pipeline.resume()
+
+        self.assertEqual(len(services), 1)
+        record = self.journal.get(self.spec.unit_name, self.spec.asset_name)
+        self.assertEqual(record.step, DeploymentStep.completed)
+        self.assertNotEqual(record.mint_txid, "NEVERSENT")
+
+
+class OnboardingCrashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.specs = [NFTSpec("U", f"Item {index}", None) for index in range(5)]
+        self.journal = DeploymentJournal()
+
+    def _pipeline(self, client, indexer=None) -> OnboardingPipeline:
+        return OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address, client=client,
+                                  journal=self.journal, indexer=indexer)
+
+    def _steps(self):
+        return [self.journal.get(spec.unit_name, spec.asset_name).step for spec in self.specs]
+
+    def test_crash_during_application_stage_never_creates_twice(self):
+        # The third application creation dies with the connection, the process with it.
+        client = FailingAlgod(failures={3: ConnectionError("connection reset")})
+        with self.assertRaises(ConnectionError):
+            self._pipeline(client).onboard(self.specs)
+
+        self.assertEqual(self._steps(), [DeploymentStep.app_sent] * 3 + [DeploymentStep.minted] * 2)
+        self.assertEqual(len(client._applications), 2)
+
+        # Without an indexer, the creation whose outcome is unknown is left alone.
+        services = self._pipeline(client).onboard(self.specs)
+        self.assertEqual(len(services), 4)
+        self.assertEqual(len(client._applications), 4)
+        self.assertEqual(self._steps()[2], DeploymentStep.app_sent)
+
+        # Once its last valid round passed, the indexer proves it dead and it is created.
+        record = self.journal.get(self.specs[2].unit_name, self.specs[2].asset_name)
+        client.status_after_block(record.last_valid_round + 1)
+        services = self._pipeline(client, indexer=FakeIndexer(client)).onboard(self.specs)
+        self.assertEqual(len(services), 5)
+        self.assertEqual(len(client._applications), 5)
+        self.assertEqual(self._steps(), [DeploymentStep.completed] * 5)
+
+    def test_rejected_application_is_created_by_the_next_run(self):
+        client = FailingAlgod(failures={2: AlgodHTTPError("too many requests", 429)})
+        services = self._pipeline(client).onboard(self.specs)
+
+        self.assertEqual(len(services), 4)
+        record = self.journal.get(self.specs[1].unit_name, self.specs[1].asset_name)
+        self.assertEqual(record.step, DeploymentStep.minted)
+        self.assertIsNone(record.app_txid)
+        self.assertIn("too many requests", record.error)
+
+        self.assertEqual(len(self._pipeline(client).onboard(self.specs)), 5)
+        self.assertEqual(len(client._applications), 5)
+
+
+
+class OnboardingStagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = RecordingAlgod(first_round=10, verify_signatures=True)
+        self.admin_pk, self.admin_address = algo_acc.generate_account()
+        self.pipeline = OnboardingPipeline(admin_pk=self.admin_pk, admin_address=self.admin_address,
+                                           client=self.client)
+        self.specs = [NFTSpec("U", f"Item {index}", None) for index in range(5)]
+
+    def test_each_stage_is_sent_whole_then_confirmed_once(self):
+        with mock.patch.object(NetworkInteraction, "wait_for_confirmations",
+                               side_effect=NetworkInteraction.wait_for_confirmations) as wait_for_confirmations:
+            services = self.pipeline.onboard(self.specs)
+
+        self.assertEqual(len(services), 5)
+        # One group of mints, one creation per application, one escrow setup group per application.
+        self.assertEqual([len(group) for group in self.client.sent_groups], [5] + [1] * 5 + [3] * 5)
+        self.assertTrue(all(isinstance(txn, algo_txn.AssetConfigTxn) for txn in self.client.sent_groups[0]))
+        self.assertTrue(all(isinstance(group[0], algo_txn.ApplicationCallTxn) and not group[0].index
+                            for group in self.client.sent_groups[1:6]))
+        # The applications and the escrows are confirmed once per stage, not once per NFT.
+        self.assertEqual([len(call.args[1]) for call in wait_for_confirmations.call_args_list], [5, 5])
+
+    def test_escrow_setup_is_one_atomic_group_of_three(self):
+        marketplace_service, nft_service = self.pipeline.onboard(self.specs[:1])[0]
+        escrow_group = self.client.sent_groups[-1]
+        clawback_change, initialize_escrow, fund_escrow = escrow_group
+
+        ungrouped = [copy.copy(txn) for txn in escrow_group]
+        for txn in ungrouped:
+            txn.group = None
+        self.assertEqual({txn.group for txn in escrow_group}, {algo_txn.calculate_group_id(ungrouped)})
+
+        self.assertIsInstance(clawback_change, algo_txn.AssetConfigTxn)
+        self.assertEqual(clawback_change.index, nft_service.nft_id)
+        self.assertEqual(clawback_change.clawback, marketplace_service.escrow_address)
+        self.assertEqual((clawback_change.manager, clawback_change.reserve, clawback_change.freeze),
+                         ("", "", ""))
+
+        self.assertIsInstance(initialize_escrow, algo_txn.ApplicationCallTxn)
+        self.assertEqual(initialize_escrow.index, marketplace_service.app_id)
+        self.assertEqual(initialize_escrow.app_args[0], b"initializeEscrow")
+        self.assertEqual(initialize_escrow.foreign_assets, [nft_service.nft_id])
+
+        self.assertIsInstance(fund_escrow, algo_txn.PaymentTxn)
+        self.assertEqual((fund_escrow.sender, fund_escrow.receiver, fund_escrow.amt),
+                         (self.admin_address, marketplace_service.escrow_address, 1000000))
+
+    def test_escrow_setup_group_is_signed_by_the_creator_and_the_admin(self):
+        marketplace_service, nft_service = self.pipeline.onboard(self.specs[:1])[0]
+
+        transactions, private_keys = marketplace_service.escrow_setup_group(nft_service)
+
+        self.assertEqual(private_keys, [nft_service.nft_creator_pk, self.admin_pk, self.admin_pk])
+        self.assertEqual([txn.sender for txn in transactions], [self.admin_address] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from algosdk import account as algo_acc
+
+from src.blockchain_utils.signer import Signer
+from src.services.nft_marketplace import NFTMarketplace
+from src.services.presigned_buy import PresignedBuyBook
+from src.tools.local_algod import LocalAlgod
+
+
+class BrokenSigner(Signer):
+
+    def __init__(self, address: str):
+        self.address = address
+
+    def sign(self, transaction):
+        raise RuntimeError("signer unavailable")
+
+
+class PresignedBuyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = LocalAlgod(first_round=10)
+        admin_pk, admin_address = algo_acc.generate_account()
+        self.buyer_pk, self.buyer_address = algo_acc.generate_account()
+
+        self.marketplace = NFTMarketplace(admin_pk=admin_pk, admin_address=admin_address, nft_id=1,
+                                          client=self.client)
+        self.marketplace.app_id = 5
+        self.book = PresignedBuyBook(self.client, validity_window=30, refresh_margin=10, check_interval=60)
+
+    def tearDown(self):
+        self.book.close()
+
+    def _prepare(self):
+        return self.book.prepare(self.marketplace, buyer_address=self.buyer_address, buyer_pk=self.buyer_pk,
+                                 buy_price=100000)
+
+    def test_submit_sends_the_prepared_group_only(self):
+        presigned_buy = self._prepare()
+        payment_txid = presigned_buy.signed_group[1].get_txid()
+        params_fetches = self.client.calls["suggested_params"]
+
+        self.assertEqual(self.book.submit(self.marketplace.app_id, self.buyer_address), payment_txid)
+        self.assertEqual(self.client.calls["send_transactions"], 1)
+        self.assertEqual(self.client.calls["suggested_params"], params_fetches)
+        self.assertIsNone(self.book.get(self.marketplace.app_id, self.buyer_address))
+
+    def test_refresh_signs_again_with_new_params(self):
+        presigned_buy = self._prepare()
+        last_valid_round = presigned_buy.last_valid_round
+        self.assertFalse(presigned_buy.refresh(current_round=last_valid_round - 20))
+
+        self.client.status_after_block(last_valid_round - 6)
+        self.assertTrue(presigned_buy.refresh(current_round=self.client.last_round))
+        self.assertGreater(presigned_buy.last_valid_round, last_valid_round)
+
+    def test_expired_group_is_signed_again_on_submit(self):
+        presigned_buy = self._prepare()
+        expired_round = presigned_buy.last_valid_round
+        self.client.status_after_block(expired_round + 1)
+
+        self.book.submit(self.marketplace.app_id, self.buyer_address)
+        self.assertGreater(presigned_buy.last_valid_round, expired_round)
+        # The dead group, then the group signed with the new params.
+        self.assertEqual(self.client.calls["send_transactions"], 2)
+
+    def test_unsuccessful_refresh_is_recorded(self):
+        presigned_buy = self._prepare()
+        presigned_buy.signer = BrokenSigner(self.buyer_address)
+        self.client.status_after_block(presigned_buy.last_valid_round - 6)
+        self.book.params_provider.observe_round(self.client.last_round)
+
+        with self.assertLogs("src.services.presigned_buy", level="WARNING"):
+            self.assertEqual(self.book.refresh(), 0)
+        self.assertIsInstance(presigned_buy.refresh_error, RuntimeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from src.blockchain_utils.program_cache import CompiledProgramCache, get_pyteal_version, program_cache_key
+from src.services.network_interaction import NetworkInteraction
+from src.tools.local_algod import LocalAlgod
+
+
+SOURCE = "#pragma version 4\nint 1\nreturn"
+
+
+class CountingCompiler:
+    def __init__(self):
+        self.sources = []
+
+    def __call__(self, teal_source: str) -> bytes:
+        self.sources.append(teal_source)
+        return f"compiled:{teal_source}".encode()
+
+
+class ProgramCacheKeyTest(unittest.TestCase):
+
+    def test_key_changes_with_every_input(self):
+        key = program_cache_key(SOURCE, teal_version=4, pyteal_version="0.8.0")
+
+        self.assertEqual(key, program_cache_key(SOURCE, teal_version=4, pyteal_version="0.8.0"))
+        self.assertNotEqual(key, program_cache_key(SOURCE + "\n", teal_version=4, pyteal_version="0.8.0"))
+        self.assertNotEqual(key, program_cache_key(SOURCE, teal_version=5, pyteal_version="0.8.0"))
+        self.assertNotEqual(key, program_cache_key(SOURCE, teal_version=4, pyteal_version="0.9.0"))
+
+    def test_key_defaults_to_the_installed_pyteal(self):
+        self.assertEqual(program_cache_key(SOURCE, teal_version=4),
+                         program_cache_key(SOURCE, teal_version=4, pyteal_version=get_pyteal_version()))
+
+
+class CompiledProgramCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        self.compiler = CountingCompiler()
+
+    def test_memory_hit(self):
+        cache = CompiledProgramCache()
+
+        first = cache.get_or_compile(SOURCE, teal_version=4, compile_function=self.compiler)
+        second = cache.get_or_compile(SOURCE, teal_version=4, compile_function=self.compiler)
+
+        self.assertEqual(first, f"compiled:{SOURCE}".encode())
+        self.assertIs(second, first)
+        self.assertEqual(self.compiler.sources, [SOURCE])
+
+    def test_disk_hit_from_another_cache(self):
+        CompiledProgramCache(cache_dir=self.cache_dir).get_or_compile(SOURCE, 4, self.compiler)
+
+        program = CompiledProgramCache(cache_dir=self.cache_dir).get_or_compile(SOURCE, 4, self.compiler)
+
+        self.assertEqual(program, f"compiled:{SOURCE}".encode())
+        self.assertEqual(self.compiler.sources, [SOURCE])
+        self.assertEqual(os.listdir(self.cache_dir), [f"{program_cache_key(SOURCE, 4)}.teal.b64"])
+
+    def test_cleared_cache_reads_the_disk(self):
+        cache = CompiledProgramCache(cache_dir=self.cache_dir)
+        cache.get_or_compile(SOURCE, 4, self.compiler)
+
+        cache.clear()
+
+        self.assertEqual(cache.get_or_compile(SOURCE, 4, self.compiler), f"compiled:{SOURCE}".encode())
+        self.assertEqual(len(self.compiler.sources), 1)
+
+    def test_cleared_cache_without_directory_compiles_again(self):
+        cache = CompiledProgramCache()
+        cache.get_or_compile(SOURCE, 4, self.compiler)
+
+        cache.clear()
+        cache.get_or_compile(SOURCE, 4, self.compiler)
+
+        self.assertEqual(len(self.compiler.sources), 2)
+
+    def test_changed_source_or_version_misses(self):
+        cache = CompiledProgramCache(cache_dir=self.cache_dir)
+        other_source = SOURCE.replace("int 1", "int 2")
+
+        cache.get_or_compile(SOURCE, 4, self.compiler)
+        cache.get_or_compile(other_source, 4, self.compiler)
+        cache.get_or_compile(SOURCE, 5, self.compiler)
+        cache.get_or_compile(SOURCE, 4, self.compiler)
+
+        self.assertEqual(self.compiler.sources, [SOURCE, other_source, SOURCE])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+    def test_failed_compile_is_not_cached(self):
+        cache = CompiledProgramCache(cache_dir=self.cache_dir)
+
+        def failing_compile(teal_source):
+            raise RuntimeError("algod unreachable")
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compile(SOURCE, 4, failing_compile)
+
+        self.assertIsNone(cache.get(program_cache_key(SOURCE, 4)))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_network_interaction_compiles_once(self):
+        client = LocalAlgod()
+        cache = CompiledProgramCache()
+
+        first = NetworkInteraction.compile_program_cached(client, SOURCE, teal_version=4, cache=cache)
+        second = NetworkInteraction.compile_program_cached(client, SOURCE, teal_version=4, cache=cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(client.calls["compile"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
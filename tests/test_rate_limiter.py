@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from algosdk import error
+
+from src.blockchain_utils.async_clients import AsyncAlgodClient, ThreadedHTTPTransport
+from src.blockchain_utils.endpoint_router import Endpoint, EndpointRouter
+from src.blockchain_utils.http_transport import UrllibHTTPTransport
+from src.blockchain_utils.rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport
+from tests.test_endpoint_router import stand_in_node
+
+
+class RateLimitedTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.limiter = RateLimitedTransport(UrllibHTTPTransport(), requests_per_second=100, max_retries=2,
+                                            backoff_base=0.001)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def node(self, name: str, status: int = 200):
+        server, handler = stand_in_node(name, status=status)
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}", handler
+
+    def test_retries_reads_on_server_errors(self):
+        address, handler = self.node("failing", status=503)
+        status, _ = self.limiter.request("GET", address + "/v2/status", headers=dict())
+        self.assertEqual(status, 503)
+        self.assertEqual(handler.hits, 3)
+
+    def test_leaves_server_errors_to_the_router(self):
+        failing_address, failing_handler = self.node("failing", status=503)
+        healthy_address, _ = self.node("healthy")
+        router = EndpointRouter([Endpoint(failing_address), Endpoint(healthy_address)],
+                                transport=self.limiter.without_server_retries(), hedge_factor=0)
+
+        status, _ = router.request("GET", lambda endpoint: (endpoint.address + "/v2/status", dict()))
+        self.assertEqual(status, 200)
+        self.assertEqual(failing_handler.hits, 1)
+        # The counters are shared with the limiter the router transport derives from.
+        self.assertEqual(self.limiter.stats()[failing_address[len("http://"):]]["server_errors"], 1)
+
+    def test_async_clients_share_the_buckets(self):
+        address, handler = self.node("throttling", status=429)
+        transport = AsyncRateLimitedTransport(ThreadedHTTPTransport(), self.limiter)
+        client = AsyncAlgodClient("token", address, transport=transport)
+
+        async def status():
+            try:
+                return await client.status()
+            finally:
+                await client.close()
+
+        with self.assertRaises(error.AlgodHTTPError):
+            asyncio.run(status())
+        self.assertEqual(handler.hits, 3)
+        self.assertLess(self.limiter.bucket(address[len("http://"):]).rate, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import copy
+import unittest
+
+from algosdk import account as algo_acc
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+
+from src.blockchain_utils.signer import AccountSigner, KMDSigner, Signer, as_signer
+from src.tools.local_algod import LocalAlgod
+from src.tools.local_kmd import LocalKMD
+
+
+class SignerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.params = LocalAlgod(first_round=10).suggested_params()
+        self.private_key, self.address = algo_acc.generate_account()
+
+    def _payments(self, count: int, sender: str = None):
+        sender = sender or self.address
+        return [algo_txn.PaymentTxn(sender=sender, sp=self.params, receiver=self.address, amt=index)
+                for index in range(count)]
+
+    def assertSignedLikeTheSdk(self, signed_txn, private_key):
+        self.assertEqual(encoding.msgpack_encode(signed_txn),
+                         encoding.msgpack_encode(signed_txn.transaction.sign(private_key)))
+
+    def test_signer_requires_sign(self):
+        class AddressOnlySigner(Signer):
+            address = "ADDRESS"
+
+        with self.assertRaises(TypeError):
+            Signer()
+        with self.assertRaises(TypeError):
+            AddressOnlySigner()
+
+    def test_account_signer_signs_like_the_sdk(self):
+        signer = AccountSigner(self.private_key)
+        txn = self._payments(1)[0]
+
+        signed_txn = signer.sign(txn)
+
+        self.assertEqual(signer.address, self.address)
+        self.assertIsNone(signed_txn.authorizing_address)
+        self.assertSignedLikeTheSdk(signed_txn, self.private_key)
+        self.assertNotIn(self.private_key, repr(signer))
+
+    def test_rekeyed_sender_is_authorized_by_the_signer(self):
+        _, rekeyed_address = algo_acc.generate_account()
+        txn = self._payments(1, sender=rekeyed_address)[0]
+
+        signed_txn = AccountSigner(self.private_key).sign(txn)
+
+        self.assertEqual(signed_txn.authorizing_address, self.address)
+        self.assertSignedLikeTheSdk(signed_txn, self.private_key)
+
+    def test_as_signer_shares_one_signer_per_key(self):
+        signer = as_signer(self.private_key)
+
+        self.assertIsInstance(signer, AccountSigner)
+        self.assertIs(as_signer(self.private_key), signer)
+        self.assertIs(as_signer(signer), signer)
+        self.assertSignedLikeTheSdk(signer.sign(self._payments(1)[0]), self.private_key)
+
+    def test_sign_group_assigns_the_group_id(self):
+        transactions = self._payments(3)
+        group_id = algo_txn.calculate_group_id([copy.copy(txn) for txn in transactions])
+
+        signed_transactions = as_signer(self.private_key).sign_group(transactions)
+
+        self.assertEqual([signed_txn.transaction.group for signed_txn in signed_transactions], [group_id] * 3)
+        for signed_txn in signed_transactions:
+            self.assertSignedLikeTheSdk(signed_txn, self.private_key)
+
+    def test_kmd_signer_renews_its_expired_handle(self):
+        kmd = LocalKMD()
+        wallet_id = kmd.create_wallet("marketplace", "password")["id"]
+        kmd.import_key(kmd.init_wallet_handle(wallet_id, "password"), self.private_key)
+        signer = KMDSigner(kmd, wallet_id=wallet_id, wallet_password="password", address=self.address)
+
+        first, second = self._payments(2)
+        self.assertSignedLikeTheSdk(signer.sign(first), self.private_key)
+        kmd.release_wallet_handle(signer._handle)
+        self.assertSignedLikeTheSdk(signer.sign(second), self.private_key)
+
+        self.assertEqual(kmd.calls["init_wallet_handle"], 3)
+        signer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+
+from src.blockchain_utils.suggested_params import (
+    MAX_TRANSACTION_LIFE, AsyncSuggestedParamsProvider, SuggestedParamsProvider,
+)
+from src.tools.local_algod import LocalAlgod
+
+
+class AsyncLocalAlgod:
+    """
+    LocalAlgod whose suggested_params is a coroutine, yielding once so that concurrent callers overlap.
+    """
+
+    def __init__(self, algod: LocalAlgod):
+        self.algod = algod
+
+    async def suggested_params(self):
+        await asyncio.sleep(0)
+        return self.algod.suggested_params()
+
+
+class SuggestedParamsProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = LocalAlgod(first_round=10)
+        self.provider = SuggestedParamsProvider(self.client, ttl=30.0, max_round_drift=5, round_time=4.5,
+                                                validity_window=100, fee=2000)
+
+    def age(self, seconds: float):
+        # Moves the fetch of the cached params back in time.
+        self.provider._fetched_at -= seconds
+
+    def test_params_are_shared_until_the_ttl(self):
+        first = self.provider.get()
+        self.provider.get()
+        self.age(20.0)
+        second = self.provider.get()
+
+        self.assertEqual(self.client.calls["suggested_params"], 1)
+        self.assertIsNot(first, second)
+        self.assertEqual((first.first, first.last, first.fee, first.flat_fee), (10, 110, 2000, True))
+
+    def test_expired_params_are_fetched_again(self):
+        self.provider.get()
+        self.client.status_after_block(12)
+
+        self.age(30.0)
+        params = self.provider.get()
+
+        self.assertEqual(self.client.calls["suggested_params"], 2)
+        self.assertEqual(params.first, 13)
+
+    def test_round_drift_invalidates_before_the_ttl(self):
+        provider = SuggestedParamsProvider(self.client, ttl=30.0, max_round_drift=2, round_time=4.5)
+        provider.get()
+
+        provider._fetched_at -= 9.5
+        provider.get()
+        self.assertEqual(self.client.calls["suggested_params"], 1)
+
+        provider._fetched_at -= 4.5
+        provider.get()
+        self.assertEqual(self.client.calls["suggested_params"], 2)
+
+    def test_last_round_follows_the_estimated_round(self):
+        self.provider.get()
+        self.age(9.5)
+
+        params = self.provider.get()
+
+        self.assertEqual(self.provider.current_round(), 12)
+        self.assertEqual((params.first, params.last), (10, 112))
+
+    def test_last_round_stays_within_the_transaction_life(self):
+        params = self.provider.get(validity_window=5000)
+
+        self.assertEqual(params.last, params.first + MAX_TRANSACTION_LIFE)
+
+    def test_observed_round_beyond_the_drift_invalidates(self):
+        self.provider.get()
+
+        self.provider.observe_round(15)
+        self.provider.get()
+        self.assertEqual(self.client.calls["suggested_params"], 1)
+
+        self.client.status_after_block(15)
+        self.provider.observe_round(16)
+        params = self.provider.get()
+        self.assertEqual(self.client.calls["suggested_params"], 2)
+        self.assertEqual(params.first, 16)
+
+    def test_observed_round_before_a_fetch_is_ignored(self):
+        self.provider.observe_round(100)
+
+        self.assertEqual(self.provider.get().first, 10)
+        self.assertEqual(self.client.calls["suggested_params"], 1)
+
+    def test_shared_provider_per_client(self):
+        provider = SuggestedParamsProvider.shared(self.client)
+
+        self.assertIs(SuggestedParamsProvider.shared(self.client), provider)
+        self.assertIsNot(SuggestedParamsProvider.shared(LocalAlgod()), provider)
+
+
+class AsyncSuggestedParamsProviderTest(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_fetch(self):
+        algod = LocalAlgod(first_round=10)
+        provider = AsyncSuggestedParamsProvider(AsyncLocalAlgod(algod))
+
+        async def get_all():
+            return await asyncio.gather(*[provider.get_async() for _ in range(5)])
+
+        all_params = asyncio.run(get_all())
+
+        self.assertEqual(algod.calls["suggested_params"], 1)
+        self.assertEqual({params.first for params in all_params}, {10})
+
+    def test_observed_round_invalidates(self):
+        algod = LocalAlgod(first_round=10)
+        provider = AsyncSuggestedParamsProvider(AsyncLocalAlgod(algod), max_round_drift=5)
+
+        asyncio.run(provider.get_async())
+        algod.status_after_block(20)
+        provider.observe_round(21)
+        params = asyncio.run(provider.get_async())
+
+        self.assertEqual(algod.calls["suggested_params"], 2)
+        self.assertEqual(params.first, 21)
+
+
+if __name__ == '__main__':
+    unittest.main()